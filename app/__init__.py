@@ -4,6 +4,7 @@ import logging
 from logging.handlers import RotatingFileHandler
 from flask import Flask
 from app.task_runner import ThreadPool
+from app.request_logging import RequestLog, ASYNC_LOGGING, LOG_PAYLOAD_MAX_CHARS, LOG_SAMPLE_RATE
 
 if not os.path.exists('results'):
     os.mkdir('results')
@@ -27,10 +28,16 @@ rot_handler.setFormatter(GMTFormatter(
 
 webserver.logger = logging.getLogger("webserver")
 webserver.logger.setLevel(logging.INFO)
-webserver.logger.addHandler(rot_handler)
+
+# the records are written by a background thread, unless TP_LOGGING is "sync" or "off"
+webserver.request_log = RequestLog(webserver.logger, rot_handler,
+                                   os.environ.get('TP_LOGGING', ASYNC_LOGGING),
+                                   int(os.environ.get('TP_LOG_PAYLOAD_MAX_CHARS',
+                                                      LOG_PAYLOAD_MAX_CHARS)),
+                                   float(os.environ.get('TP_LOG_SAMPLE_RATE', LOG_SAMPLE_RATE)))
+webserver.request_log.start()
 
 from app import routes
 
 webserver.tasks_runner = ThreadPool()
 webserver.tasks_runner.start()
-webserver.job_counter = 1
@@ -0,0 +1,135 @@
+import math
+import time
+from threading import Lock
+
+# default limits of the admission control, overridable through the TP_QUEUE_MAX_DEPTH
+# and TP_MAX_IN_FLIGHT env vars (0 for no limit)
+QUEUE_MAX_DEPTH = 10000
+MAX_IN_FLIGHT = 0
+
+# seconds over which the drain rate of the jobs is measured
+DRAIN_WINDOW = 10
+
+# bounds of the Retry-After of the rejected requests, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+def parse_in_flight_limits(value) -> tuple:
+    '''
+    Parses TP_MAX_IN_FLIGHT: a limit for every endpoint and/or "endpoint=limit" items,
+    comma-separated, e.g. "200,mean_by_category=20". Returns (default limit, limits)
+    '''
+    default = MAX_IN_FLIGHT
+    limits = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            endpoint, limit = item.split("=", 1)
+            limits[endpoint.strip()] = int(limit)
+        elif item.strip():
+            default = int(item)
+
+    return default, limits
+
+class AdmissionControl:
+    '''
+    Bounds the jobs accepted by the server: the depth of the jobs queue and the number
+    of jobs of each endpoint in flight (received and not finished yet). A request over
+    a limit is rejected right away, instead of growing the queue and the latency of every
+    job, with a retry delay: the time needed to finish the jobs ahead of it (the queued
+    ones, or those of its endpoint in flight) at the rate the jobs were finished over the
+    last DRAIN_WINDOW seconds.
+    '''
+    def __init__(self, max_depth: int, default_in_flight: int, in_flight_limits: dict,
+                 clock=time.monotonic):
+        self.max_depth = max_depth
+        self.default_in_flight = default_in_flight
+        self.in_flight_limits = in_flight_limits # endpoint -> limit, 0 for no limit
+        self.clock = clock # returns the current time in seconds, of the drain rate window
+        self.lock = Lock() # protects the fields below
+        self.in_flight = {} # endpoint -> number of jobs
+        self.finished = {} # second -> number of jobs finished during that second
+
+    def get_limit(self, endpoint: str) -> int:
+        '''
+        Returns the in-flight limit of an endpoint, 0 for no limit
+        '''
+        return self.in_flight_limits.get(endpoint, self.default_in_flight)
+
+    def admit(self, endpoints: list, depth: int):
+        '''
+        Admits the jobs of a request (one per endpoint) if the jobs queue, holding "depth"
+        jobs, has room for all of them and their endpoints are under their in-flight limits.
+        Returns None once they are counted in flight, otherwise a (reason, retry_after) pair.
+        '''
+        with self.lock:
+            if (self.max_depth > 0) and (depth + len(endpoints) > self.max_depth):
+                return 'the jobs queue is full', self.get_retry_after(depth)
+
+            requested = {}
+            for endpoint in endpoints:
+                requested[endpoint] = requested.get(endpoint, 0) + 1
+
+            for endpoint, count in requested.items():
+                limit = self.get_limit(endpoint)
+                in_flight = self.in_flight.get(endpoint, 0)
+                if (limit > 0) and (in_flight + count > limit):
+                    return f'too many {endpoint} jobs in flight', \
+                           self.get_retry_after(in_flight)
+
+            for endpoint, count in requested.items():
+                self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + count
+
+            return None
+
+    def release(self, endpoint: str, count: int = 1):
+        '''
+        Counts finished jobs (done or failed) of an endpoint, no longer in flight
+        '''
+        second = int(self.clock())
+        with self.lock:
+            self.in_flight[endpoint] = max(0, self.in_flight.get(endpoint, 0) - count)
+            self.finished[second] = self.finished.get(second, 0) + count
+
+            # forget the seconds out of the drain window
+            if len(self.finished) > DRAIN_WINDOW:
+                for old_second in [key for key in self.finished
+                                   if key <= second - DRAIN_WINDOW]:
+                    del self.finished[old_second]
+
+    def get_drain_rate(self) -> float:
+        '''
+        Returns the number of jobs finished per second over the last DRAIN_WINDOW
+        seconds at most, the current one included. The caller holds the lock.
+        '''
+        now = int(self.clock())
+        seconds = [second for second in self.finished if second > now - DRAIN_WINDOW]
+        if not seconds:
+            return 0.0
+
+        # the window starts with the first second a job finished in, e.g. after startup
+        return sum(self.finished[second] for second in seconds) / (now - min(seconds) + 1)
+
+    def get_retry_after(self, jobs_ahead: int) -> int:
+        '''
+        Returns the seconds needed to finish "jobs_ahead" jobs at the drain rate,
+        within [MIN_RETRY_AFTER, MAX_RETRY_AFTER]. The caller holds the lock.
+        '''
+        rate = self.get_drain_rate()
+        if rate <= 0:
+            # no job finished lately, e.g. right after a burst at startup
+            return MIN_RETRY_AFTER
+
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, math.ceil(jobs_ahead / rate)))
+
+    def get_stats(self) -> dict:
+        '''
+        Returns the limits, the jobs in flight and the drain rate
+        '''
+        with self.lock:
+            return {
+                'queue_capacity': self.max_depth,
+                'in_flight': dict(self.in_flight),
+                'in_flight_limit': self.default_in_flight,
+                'in_flight_limits': dict(self.in_flight_limits),
+                'drain_rate': self.get_drain_rate()
+            }
@@ -0,0 +1,188 @@
+import sys
+import asyncio
+from io import BytesIO
+from urllib.parse import parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from app.utils import JobStatus
+from app.routes import MAX_RESULT_WAIT_MS
+
+# default number of threads running the Flask routes, overridable through TP_ASGI_THREADS
+ASGI_THREADS = 32
+
+# path prefix of the results requests, long-polled on the event loop
+RESULTS_PATH = "/api/get_results/"
+
+async def read_body(receive) -> bytes:
+    '''
+    Returns the body of an http request, received in one or more messages
+    '''
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+
+    return b''.join(chunks)
+
+def build_environ(scope: dict, body: bytes) -> dict:
+    '''
+    Returns the WSGI environ of an ASGI http request
+    '''
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI strings hold the raw bytes, as latin-1
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            # repeated headers are joined, as in a WSGI server
+            key = 'HTTP_' + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    return environ
+
+def call_wsgi(wsgi_app, environ: dict) -> tuple:
+    '''
+    Runs a request through a WSGI app, returns its (status code, headers, body)
+    '''
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        # pylint: disable=unused-argument
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                               for name, value in headers]
+
+    chunks = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+    return response['status'], response['headers'], body
+
+def get_long_poll(scope: dict, query: list):
+    '''
+    Returns the (job id, wait in seconds) of a long-polled results request, or None
+    '''
+    if (scope['method'] != 'GET') or (not scope['path'].startswith(RESULTS_PATH)):
+        return None
+
+    job_id = scope['path'][len(RESULTS_PATH):]
+    wait_ms = dict(query).get('wait', '0')
+    if (not job_id.isnumeric()) or (not wait_ms.isnumeric()) or (int(wait_ms) == 0):
+        return None
+
+    return int(job_id), min(int(wait_ms), MAX_RESULT_WAIT_MS) / 1000
+
+def set_done(future):
+    '''
+    Wakes up the waiter of a future, unless it has timed out meanwhile
+    '''
+    if not future.done():
+        future.set_result(None)
+
+class AsgiApp:
+    '''
+    ASGI entry point of the web server, serving the same routes as the Flask app. A long-polled
+    "get_results" request waits on the event loop, for a future completed by the worker that
+    finishes the job, instead of holding a thread: a pending request only costs a coroutine.
+    Every other request, and the results request once the wait is over, runs the Flask route
+    on a thread of a bounded pool.
+    '''
+    def __init__(self, webserver, num_threads: int = ASGI_THREADS):
+        self.webserver = webserver
+        self.executor = ThreadPoolExecutor(num_threads, thread_name_prefix="asgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.run_lifespan(receive, send)
+            return
+
+        if scope['type'] != 'http':
+            return
+
+        body = await read_body(receive)
+        query = parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+
+        long_poll = get_long_poll(scope, query)
+        if long_poll is not None:
+            await self.wait_for_job(*long_poll)
+
+            # the job is finished or the wait is over, the route must not wait again
+            query_string = urlencode([(key, value) for key, value in query if key != 'wait'])
+            scope = dict(scope, query_string=query_string.encode('latin-1'))
+
+        status, headers, body = await asyncio.get_running_loop().run_in_executor(
+            self.executor, call_wsgi, self.webserver.wsgi_app, build_environ(scope, body))
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def wait_for_job(self, job_id: int, timeout: float):
+        '''
+        Waits until a running job is finished or "timeout" seconds elapse
+        '''
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+
+        def wake():
+            # called by the thread finishing the job
+            try:
+                loop.call_soon_threadsafe(set_done, finished)
+            except RuntimeError:
+                # the event loop has been closed
+                pass
+
+        job_registry = self.webserver.tasks_runner.job_registry
+        if job_registry.add_callback(job_id, wake) != JobStatus.RUNNING:
+            return
+
+        # on a timeout, or if the client disconnects, the job must not keep the callback
+        try:
+            await asyncio.wait_for(finished, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            job_registry.remove_callback(job_id, wake)
+
+    async def run_lifespan(self, receive, send):
+        '''
+        Answers the startup and shutdown messages of the server
+        '''
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
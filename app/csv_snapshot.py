@@ -0,0 +1,151 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy
+import pandas
+
+# bumped whenever the layout of the snapshot files changes
+SNAPSHOT_VERSION = 1
+
+META_FILE = "meta.json"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def get_snapshot_dir(csv_path: str) -> str:
+    '''
+    Returns the directory holding the snapshot of a csv file, next to the csv file
+    '''
+    return csv_path + ".snapshot"
+
+def get_csv_hash(csv_path: str) -> str:
+    '''
+    Returns the sha256 digest of a csv file contents
+    '''
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as csv_file:
+        for chunk in iter(lambda: csv_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+def get_column_file(snapshot_dir: str, column: str, part: str) -> str:
+    '''
+    Returns the path of a .npy file of a column, the column name is hex encoded
+    since it may hold characters not allowed in file names
+    '''
+    return os.path.join(snapshot_dir, column.encode("utf-8").hex() + "." + part + ".npy")
+
+def write_meta(snapshot_dir: str, meta: dict):
+    '''
+    Writes the meta file of a snapshot, replacing the previous one at once
+    '''
+    tmp_file = os.path.join(snapshot_dir, META_FILE + ".tmp-" + str(os.getpid()))
+    with open(tmp_file, "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(tmp_file, os.path.join(snapshot_dir, META_FILE))
+
+def is_snapshot_valid(csv_path: str, meta: dict, columns: dict) -> bool:
+    '''
+    Checks that a snapshot holds the given columns and has been built from the current csv file.
+    A csv file with the same size but another mtime is compared by hash, if the contents
+    are the same the new mtime is set in "meta".
+    '''
+    if (meta.get("version") != SNAPSHOT_VERSION) or (meta.get("columns") != columns):
+        return False
+
+    csv_stat = os.stat(csv_path)
+    if meta.get("size") != csv_stat.st_size:
+        return False
+
+    if meta.get("mtime_ns") == csv_stat.st_mtime_ns:
+        return True
+
+    # the file has been touched or copied, it is still valid if the contents are the same
+    if meta.get("sha256") != get_csv_hash(csv_path):
+        return False
+
+    meta["mtime_ns"] = csv_stat.st_mtime_ns
+    return True
+
+def load_snapshot(csv_path: str, columns: dict):
+    '''
+    Returns the entries stored in the snapshot of a csv file, with the columns memory-mapped
+    (the values and the categorical codes are not copied), or None if there is no valid
+    snapshot holding the given {column: dtype} columns
+    '''
+    snapshot_dir = get_snapshot_dir(csv_path)
+
+    try:
+        with open(os.path.join(snapshot_dir, META_FILE), "r", encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+
+        mtime_ns = meta.get("mtime_ns")
+        if not is_snapshot_valid(csv_path, meta, columns):
+            return None
+
+        # the csv file has been checked by hash, the next starts only compare its new mtime
+        if meta["mtime_ns"] != mtime_ns:
+            try:
+                write_meta(snapshot_dir, meta)
+            except OSError as e:
+                print(f"Could not update the snapshot of {csv_path}: {e}")
+
+        entries = {}
+        for column, dtype in columns.items():
+            if dtype == "category":
+                codes = numpy.load(get_column_file(snapshot_dir, column, "codes"), mmap_mode="r")
+                categories = numpy.load(get_column_file(snapshot_dir, column, "categories"))
+                # the codes have been written from a valid categorical, checking them would
+                # read the whole column
+                entries[column] = pandas.Categorical.from_codes(
+                    codes, dtype=pandas.CategoricalDtype(categories.tolist()), validate=False)
+            else:
+                entries[column] = numpy.load(get_column_file(snapshot_dir, column, "values"),
+                                             mmap_mode="r")
+
+        return pandas.DataFrame(entries, copy=False)
+
+    except (OSError, ValueError, KeyError):
+        return None
+
+def write_snapshot(csv_path: str, entries, columns: dict):
+    '''
+    Writes the given {column: dtype} columns of the entries parsed from a csv file as a
+    snapshot next to it, one .npy file per column (categorical columns as codes and
+    categories). The snapshot is built in a temporary directory, then moved in place.
+    '''
+    snapshot_dir = get_snapshot_dir(csv_path)
+    tmp_dir = snapshot_dir + ".tmp-" + str(os.getpid())
+
+    try:
+        csv_stat = os.stat(csv_path)
+        os.makedirs(tmp_dir)
+
+        for column, dtype in columns.items():
+            if dtype == "category":
+                values = entries[column].cat
+                numpy.save(get_column_file(tmp_dir, column, "codes"), values.codes.to_numpy())
+                numpy.save(get_column_file(tmp_dir, column, "categories"),
+                           numpy.array(values.categories.tolist(), dtype=str))
+            else:
+                numpy.save(get_column_file(tmp_dir, column, "values"),
+                           entries[column].to_numpy(dtype=dtype))
+
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "columns": columns,
+            "size": csv_stat.st_size,
+            "mtime_ns": csv_stat.st_mtime_ns,
+            "sha256": get_csv_hash(csv_path)
+        }
+        write_meta(tmp_dir, meta)
+
+        # replace the stale snapshot, if any
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.rename(tmp_dir, snapshot_dir)
+
+    except OSError as e:
+        # the server still works without a snapshot, e.g. from a read-only directory
+        print(f"Could not write the snapshot of {csv_path}: {e}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
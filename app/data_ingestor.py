@@ -1,41 +1,261 @@
+import os
+import io
+import time
+import hashlib
+from threading import Lock
 import pandas
+from pandas.api.types import union_categoricals
+from app.csv_snapshot import load_snapshot, write_snapshot
+
+# the only csv columns read by the analysis functions, the compact ingest loads just these
+USED_COLUMNS = ["Question", "LocationDesc", "Data_Value",
+                "StratificationCategory1", "Stratification1"]
+
+# types of the used columns in the compact ingest, the repeated strings are stored as
+# categoricals (integer codes into a single copy of each distinct string), same order as above
+COMPACT_DTYPES = {
+    "Question": "category",
+    "LocationDesc": "category",
+    "Data_Value": "float64",
+    "StratificationCategory1": "category",
+    "Stratification1": "category"
+}
+
+# rows parsed at once when the ingest progress is reported
+INGEST_CHUNK_ROWS = 100000
+
+# columns by which the "Data_Value" sums and counts are pre-aggregated
+AGGREGATE_KEYS = ["Question", "LocationDesc", "StratificationCategory1", "Stratification1"]
+
+# bytes at the start of the csv file hashed to recognize it, along with its inode
+CSV_PREFIX_SIZE = 64 * 1024
+
+class IngestProgress:
+    '''
+    Progress of a dataset load: rows parsed so far, elapsed time and outcome
+    '''
+    def __init__(self):
+        self.lock = Lock() # protects the fields below
+        self.rows_parsed = 0
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self.error = None
+
+    def add_rows(self, num_rows: int):
+        '''
+        Counts newly parsed rows
+        '''
+        with self.lock:
+            self.rows_parsed += num_rows
+
+    def finish(self, error=None):
+        '''
+        Marks the load as ended, successfully unless an error is given
+        '''
+        with self.lock:
+            self.end_time = time.perf_counter()
+            self.error = error
+
+    def get_status(self):
+        '''
+        Returns the state of the load ("loading", "ready" or "failed"),
+        the rows parsed so far and the elapsed time, in seconds
+        '''
+        with self.lock:
+            if self.end_time is None:
+                state = "loading"
+                elapsed = time.perf_counter() - self.start_time
+            else:
+                state = "ready" if self.error is None else "failed"
+                elapsed = self.end_time - self.start_time
+
+            return {
+                'state': state,
+                'rows_parsed': self.rows_parsed,
+                'elapsed_s': round(elapsed, 3)
+            }
 
 class DataIngestor:
-    def __init__(self, csv_path: str):
-        self.__questions_best_is_min = [
-            'Percent of adults aged 18 years and older who have an overweight classification',
-            'Percent of adults aged 18 years and older who have obesity',
-            'Percent of adults who engage in no leisure-time physical activity',
-            'Percent of adults who report consuming fruit less than one time daily',
-            'Percent of adults who report consuming vegetables less than one time daily'
-        ]
-
-        self.__questions_best_is_max = [
-            'Percent of adults who achieve at least 150 minutes a week of '
-            'moderate-intensity aerobic physical activity or 75 minutes a week of '
-            'vigorous-intensity aerobic activity (or an equivalent combination)',
-
-            'Percent of adults who achieve at least 150 minutes a week of '
-            'moderate-intensity aerobic physical activity or 75 minutes a week of '
-            'vigorous-intensity aerobic physical activity and engage in '
-            'muscle-strengthening activities on 2 or more days a week',
-
-            'Percent of adults who achieve at least 300 minutes a week of '
-            'moderate-intensity aerobic physical activity or 150 minutes a week of '
-            'vigorous-intensity aerobic activity (or an equivalent combination)',
-
-            'Percent of adults who engage in muscle-strengthening activities '
-            'on 2 or more days a week'
-        ]
-
-        # read csv from csv_path
-        self.__csv_file = pandas.read_csv(csv_path)
+    # the questions whose best states have the lowest values, and the highest values
+    __questions_best_is_min = [
+        'Percent of adults aged 18 years and older who have an overweight classification',
+        'Percent of adults aged 18 years and older who have obesity',
+        'Percent of adults who engage in no leisure-time physical activity',
+        'Percent of adults who report consuming fruit less than one time daily',
+        'Percent of adults who report consuming vegetables less than one time daily'
+    ]
+
+    __questions_best_is_max = [
+        'Percent of adults who achieve at least 150 minutes a week of '
+        'moderate-intensity aerobic physical activity or 75 minutes a week of '
+        'vigorous-intensity aerobic activity (or an equivalent combination)',
+
+        'Percent of adults who achieve at least 150 minutes a week of '
+        'moderate-intensity aerobic physical activity or 75 minutes a week of '
+        'vigorous-intensity aerobic physical activity and engage in '
+        'muscle-strengthening activities on 2 or more days a week',
+
+        'Percent of adults who achieve at least 300 minutes a week of '
+        'moderate-intensity aerobic physical activity or 150 minutes a week of '
+        'vigorous-intensity aerobic activity (or an equivalent combination)',
+
+        'Percent of adults who engage in muscle-strengthening activities '
+        'on 2 or more days a week'
+    ]
+
+    def __init__(self, csv_path: str, compact: bool = True, snapshot: bool = True,
+                 progress: IngestProgress = None, version: int = 1):
+        # read csv from csv_path, only the used columns, with compact types, unless disabled
+        if compact:
+            csv_file = read_compact_csv(csv_path, snapshot, progress)
+        else:
+            csv_file = read_csv_rows(csv_path, progress)
+
+        # the bytes consumed so far and what identifies the csv file, to tell
+        # the rows appended to it later from a replaced file
+        with open(csv_path, "rb") as csv_source:
+            csv_offset = csv_source.seek(0, os.SEEK_END)
+            csv_identity = get_csv_identity(csv_source, min(csv_offset, CSV_PREFIX_SIZE))
+
+        # build the (question, state, stratification) aggregates cube once, at load time
+        self.__set_dataset((csv_path, compact, csv_offset, csv_identity), [csv_file],
+                           get_cube(build_aggregates(csv_file)), version)
+
+    @classmethod
+    def __from_dataset(cls, source: tuple, entries: list, cube: tuple, version: int):
+        '''
+        Returns a dataset version built from already read entries and their aggregates
+        cube, without reading the csv file again (see __set_dataset)
+        '''
+        data_ingestor = cls.__new__(cls)
+        data_ingestor.__set_dataset(source, entries, cube, version)
+
+        return data_ingestor
+
+    def __set_dataset(self, source: tuple, entries: list, cube: tuple, version: int):
+        '''
+        Sets the fields of a dataset version: its source (the csv path, whether it is read
+        compact, the bytes read so far and the identity of the file), its entries (the rows
+        read from the csv file, then one DataFrame per append) and the aggregates cube of all
+        the rows (see get_cube)
+        '''
+        # the bytes of the csv file consumed so far are those from which its new rows are read
+        self.__csv_path, self.__compact, self.__csv_offset, self.__csv_identity = source
+        self.__csv_file, *self.__appended_rows = entries
+
+        # the dataset version, incremented by each reload of the csv file and each append
+        self.__version = version
+
+        # the csv file contents concatenated with the appended rows, built on first use
+        self.__entries = None
+
+        # the aggregates cube, the index of its groups, built at the first append, and the
+        # number of groups of each question, used to estimate the cost of a job
+        self.__aggregates, self.__aggregates_index, self.__question_groups = cube
+
+    def get_version(self):
+        '''
+        Returns the dataset version
+        '''
+        return self.__version
 
     def get_csv_file(self):
         '''
-        Returns the csv file contents
+        Returns the csv file contents, along with the appended rows
+        '''
+        if not self.__appended_rows:
+            return self.__csv_file
+
+        # concurrent first calls may both build it, the result is the same
+        if self.__entries is None:
+            self.__entries = concat_entries([self.__csv_file] + self.__appended_rows)
+
+        return self.__entries
+
+    def get_csv_offset(self):
+        '''
+        Returns the number of bytes of the csv file consumed so far
+        '''
+        return self.__csv_offset
+
+    def read_csv_tail(self):
+        '''
+        Returns the rows written at the end of the csv file since it was consumed, up to
+        the last complete line, and the new offset. Returns (None, offset) without
+        new rows and (None, None) if the file has been truncated, rewritten or replaced
+        (it is no longer the same file, or its first bytes have changed).
+        '''
+        with open(self.__csv_path, "rb") as csv_file:
+            size = csv_file.seek(0, os.SEEK_END)
+            if (size < self.__csv_offset) or \
+               (get_csv_identity(csv_file, self.__csv_identity[2]) != self.__csv_identity):
+                return None, None
+
+            csv_file.seek(self.__csv_offset)
+            tail = csv_file.read(size - self.__csv_offset)
+
+        # a line still being written is left for the next read
+        tail = tail[:tail.rfind(b"\n") + 1]
+        if not tail.strip():
+            return None, self.__csv_offset + len(tail)
+
+        columns = pandas.read_csv(self.__csv_path, nrows=0).columns
+        if self.__compact:
+            rows = pandas.read_csv(io.BytesIO(tail), header=None, names=columns,
+                                   usecols=USED_COLUMNS, dtype=COMPACT_DTYPES)[USED_COLUMNS]
+        else:
+            rows = pandas.read_csv(io.BytesIO(tail), header=None, names=columns)
+
+        return rows, self.__csv_offset + len(tail)
+
+    def append_rows(self, rows, version: int, csv_offset: int = None):
+        '''
+        Returns a new dataset version holding the current rows and the given ones. The
+        current version is left untouched and the new one shares its rows, only the new
+        rows are aggregated and merged into the aggregates cube (see merge_aggregates).
+        '''
+        if self.__compact:
+            rows = rows[USED_COLUMNS].astype(COMPACT_DTYPES)
+        else:
+            rows = rows.astype({"Data_Value": "float64"})
+
+        source = (self.__csv_path, self.__compact,
+                  self.__csv_offset if csv_offset is None else csv_offset, self.__csv_identity)
+
+        if self.__aggregates_index is None:
+            # built once, then shared by the next versions as long as no group is added
+            self.__aggregates_index = pandas.MultiIndex.from_frame(
+                self.__aggregates[AGGREGATE_KEYS])
+
+        cube = (self.__aggregates, self.__aggregates_index, self.__question_groups)
+
+        return DataIngestor.__from_dataset(
+            source, [self.__csv_file] + self.__appended_rows + [rows],
+            merge_aggregates(cube, build_aggregates(rows)), version)
+
+    def get_memory_usage(self):
+        '''
+        Returns the memory used by the csv file contents and by the aggregates cube, in bytes
         '''
-        return self.__csv_file
+        return {
+            "csv_file": int(self.__csv_file.memory_usage(deep=True).sum()) +
+                        sum(int(rows.memory_usage(deep=True).sum())
+                            for rows in self.__appended_rows),
+            "aggregates": int(self.__aggregates.memory_usage(deep=True).sum())
+        }
+
+    def get_aggregates(self):
+        '''
+        Returns the "Data_Value" sum and count of every
+        (Question, LocationDesc, StratificationCategory1, Stratification1) group
+        '''
+        return self.__aggregates
+
+    def get_question_groups_count(self, question):
+        '''
+        Returns the number of aggregates cube groups of a question
+        '''
+        return self.__question_groups.get(question, 0)
 
     def get_questions_best_is_max(self):
         '''
@@ -48,3 +268,127 @@ class DataIngestor:
         Returns "questions_best_is_min" list contents
         '''
         return self.__questions_best_is_min
+
+def get_csv_identity(csv_file, prefix_size: int) -> tuple:
+    '''
+    Returns what identifies an open csv file: its device, its inode and the size and
+    sha256 digest of its first "prefix_size" bytes
+    '''
+    stat = os.fstat(csv_file.fileno())
+    csv_file.seek(0)
+    prefix = csv_file.read(prefix_size)
+
+    return stat.st_dev, stat.st_ino, len(prefix), hashlib.sha256(prefix).hexdigest()
+
+def read_csv_rows(csv_path: str, progress: IngestProgress, usecols=None, dtype=None):
+    '''
+    Parses the csv file, in chunks of INGEST_CHUNK_ROWS rows counted
+    by the progress, if one is given
+    '''
+    if progress is None:
+        return pandas.read_csv(csv_path, usecols=usecols, dtype=dtype)
+
+    # the categoricals of different chunks have different categories, the
+    # strings are parsed as objects and converted once all the chunks are read
+    chunk_dtype = None
+    if dtype is not None:
+        chunk_dtype = {column: "object" if column_dtype == "category" else column_dtype
+                       for column, column_dtype in dtype.items()}
+
+    chunks = []
+    for chunk in pandas.read_csv(csv_path, usecols=usecols, dtype=chunk_dtype,
+                                 chunksize=INGEST_CHUNK_ROWS):
+        chunks.append(chunk)
+        progress.add_rows(len(chunk))
+
+    entries = pandas.concat(chunks, ignore_index=True)
+    return entries if dtype is None else entries.astype(dtype)
+
+def read_compact_csv(csv_path: str, snapshot: bool, progress: IngestProgress = None):
+    '''
+    Reads the used columns of the csv file, from its binary snapshot when there is an
+    up to date one, otherwise parses the csv file and (re)writes the snapshot
+    '''
+    if snapshot:
+        entries = load_snapshot(csv_path, COMPACT_DTYPES)
+        if entries is not None:
+            if progress is not None:
+                progress.add_rows(len(entries))
+            return entries
+
+    # "usecols" keeps the columns in the csv file order, the snapshot in the USED_COLUMNS order
+    entries = read_csv_rows(csv_path, progress, USED_COLUMNS, COMPACT_DTYPES)[USED_COLUMNS]
+
+    if snapshot:
+        write_snapshot(csv_path, entries, COMPACT_DTYPES)
+
+    return entries
+
+def build_aggregates(entries):
+    '''
+    Reduces the csv entries to one row per AGGREGATE_KEYS group, holding the
+    "Data_Value_Sum" and "Data_Value_Count" of the group
+    '''
+    # only the observed combinations of the categorical keys make groups
+    groups = entries.groupby(AGGREGATE_KEYS, dropna=False, sort=True,
+                             observed=True)["Data_Value"]
+
+    aggregates = groups.agg(["sum", "count"]).reset_index()
+    aggregates = aggregates.rename(columns={"sum": "Data_Value_Sum", "count": "Data_Value_Count"})
+
+    # drop the groups without any "Data_Value"
+    return aggregates[aggregates["Data_Value_Count"] > 0].reset_index(drop=True)
+
+def concat_entries(frames):
+    '''
+    Concatenates entries, the categorical columns get the union of the
+    categories of all the frames, in lexical order, like the csv ingest
+    '''
+    frames = list(frames)
+
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pandas.CategoricalDtype):
+            categories = union_categoricals([frame[column].astype("category") for frame in frames],
+                                            sort_categories=True).categories
+            frames = [frame.assign(**{column: pandas.Categorical(frame[column], categories)})
+                      for frame in frames]
+
+    return pandas.concat(frames, ignore_index=True)
+
+def get_cube(aggregates) -> tuple:
+    '''
+    Returns the (aggregates, index of their AGGREGATE_KEYS, number of groups of each
+    question) cube of a loaded dataset, its index is only built by the first append
+    '''
+    return aggregates, None, aggregates["Question"].value_counts().to_dict()
+
+def merge_aggregates(cube: tuple, new_aggregates) -> tuple:
+    '''
+    Returns the cube (see get_cube, with its index) with the "Data_Value" sums and counts of
+    new aggregates added to its matching groups, the new groups are appended. The groups of
+    the new aggregates are looked up in the index, shared with the previous version: only
+    the groups they touch are updated, in a copy of the sum and count columns (the previous
+    version stays untouched, the key columns are shared).
+    '''
+    aggregates, aggregates_index, question_groups = cube
+    new_index = pandas.MultiIndex.from_frame(new_aggregates[AGGREGATE_KEYS])
+    positions = aggregates_index.get_indexer(new_index)
+    found = positions >= 0
+
+    sums = aggregates["Data_Value_Sum"].to_numpy(copy=True)
+    counts = aggregates["Data_Value_Count"].to_numpy(copy=True)
+    sums[positions[found]] += new_aggregates["Data_Value_Sum"].to_numpy()[found]
+    counts[positions[found]] += new_aggregates["Data_Value_Count"].to_numpy()[found]
+    aggregates = aggregates.assign(Data_Value_Sum=sums, Data_Value_Count=counts)
+
+    if found.all():
+        return aggregates, aggregates_index, question_groups
+
+    # the groups seen for the first time, rare once the dataset is loaded
+    new_groups = new_aggregates[~found]
+    question_groups = dict(question_groups)
+    for question, count in new_groups["Question"].value_counts().items():
+        question_groups[question] = question_groups.get(question, 0) + count
+
+    return (concat_entries([aggregates, new_groups]), aggregates_index.append(new_index[~found]),
+            question_groups)
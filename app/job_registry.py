@@ -0,0 +1,304 @@
+import time
+import math
+from array import array
+from threading import Event, Lock
+from .utils import JobStatus
+
+# default retention of the finished jobs, overridable through the
+# TP_JOBS_MAX_RETAINED and TP_JOBS_MAX_AGE (in seconds, 0 for no limit) env vars
+JOBS_MAX_RETAINED = 100000
+JOBS_MAX_AGE = 0
+
+# timestamps of the trace of a job, the enqueue time is recorded when the job is registered,
+# the persist time once its result is stored, the other ones are passed by "finish"
+TRACE_FIELDS = ('enqueue_time', 'dequeue_time', 'compute_start_time', 'compute_end_time',
+                'persist_time')
+
+# worker id of the jobs not computed by a worker thread (cached or computed in "sync" mode)
+NO_WORKER = -1
+
+class StragglerSlots:
+    '''
+    The entries of a job not evicted yet (e.g. still running) left below "base_id" by a
+    compaction of the arrays, in arrays of a single entry like those of the registry
+    '''
+    __slots__ = ('statuses', 'versions', 'traces', 'worker_ids')
+
+    def __init__(self, registry, index: int):
+        self.statuses = registry.statuses[index:index + 1]
+        self.versions = registry.versions[index:index + 1]
+        self.traces = registry.traces[index * len(TRACE_FIELDS):(index + 1) * len(TRACE_FIELDS)]
+        self.worker_ids = registry.worker_ids[index:index + 1]
+
+class JobRegistry:
+    '''
+    Assigns the job ids and keeps the status and the trace of the jobs. The statuses, the
+    dataset versions of the results and the traces are kept in dense arrays indexed by
+    "job id - base_id", the finished jobs are evicted in the order they finished, once
+    there are more than "max_retained" of them or once they are older than "max_age"
+    seconds. The evicted ids have the EXPIRED status, the jobs below "base_id" still
+    retained (e.g. running for long) are kept aside, so that they never hold back the
+    compaction of the arrays.
+    '''
+    def __init__(self, max_retained=JOBS_MAX_RETAINED, max_age=JOBS_MAX_AGE):
+        self.max_retained = max_retained
+        self.max_age = max_age
+        self.lock = Lock() # protects all the fields below
+        self.base_id = 1 # id of the first entry of the per-job arrays
+        self.num_expired = 0 # EXPIRED entries of "statuses"
+        self.stragglers = {} # job id below "base_id" -> StragglerSlots, until it is evicted
+        self.statuses = array('b') # JobStatus values
+        self.versions = array('i') # dataset versions of the results
+        self.traces = array('d') # TRACE_FIELDS timestamps of each job, NaN if not recorded
+        self.worker_ids = array('i') # ids of the workers that computed the jobs, never reused
+        self.finished_ids = array('q') # ids of the finished jobs, in finish order
+        self.finish_times = array('d') # finish times of "finished_ids"
+        self.finished_head = 0 # first entry of "finished_ids" not evicted yet
+        self.num_running = 0
+        self.events = {} # job id -> Event set when the job is finished, for the waiters
+        self.callbacks = {} # job id -> functions called when the job is finished
+
+    def register(self) -> int:
+        '''
+        Assigns the next job id and marks the job as running
+        '''
+        with self.lock:
+            self.statuses.append(JobStatus.RUNNING.value)
+            self.versions.append(0)
+            self.traces.append(time.time())
+            self.traces.extend([math.nan] * (len(TRACE_FIELDS) - 1))
+            self.worker_ids.append(NO_WORKER)
+            self.num_running += 1
+
+            return self.base_id + len(self.statuses) - 1
+
+    def get_num_registered(self) -> int:
+        '''
+        Returns the number of job ids assigned so far
+        '''
+        with self.lock:
+            return self.base_id + len(self.statuses) - 1
+
+    def get_num_running(self) -> int:
+        '''
+        Returns the number of jobs not finished yet
+        '''
+        with self.lock:
+            return self.num_running
+
+    def get_status(self, job_id: int):
+        '''
+        Returns the status of a job, or None for an id not assigned yet
+        '''
+        with self.lock:
+            return self.get_status_locked(job_id)
+
+    def get_status_locked(self, job_id: int):
+        '''
+        Returns the status of a job, the caller holds the lock
+        '''
+        if (job_id < 1) or (job_id - self.base_id >= len(self.statuses)):
+            return None
+
+        slots, index = self.locate_locked(job_id)
+        if slots is None:
+            return JobStatus.EXPIRED
+
+        return JobStatus(slots.statuses[index])
+
+    def locate_locked(self, job_id: int) -> tuple:
+        '''
+        Returns the arrays holding the entries of an assigned job (the registry, or its
+        StragglerSlots) and its index in them, (None, None) for an evicted job below
+        "base_id". The caller holds the lock.
+        '''
+        if job_id >= self.base_id:
+            return self, job_id - self.base_id
+
+        slots = self.stragglers.get(job_id)
+        return (slots, 0) if slots is not None else (None, None)
+
+    def get_version(self, job_id: int):
+        '''
+        Returns the dataset version of the result of a finished job, or None
+        '''
+        with self.lock:
+            if self.get_status_locked(job_id) not in (JobStatus.DONE, JobStatus.FAILED):
+                return None
+
+            slots, index = self.locate_locked(job_id)
+            return slots.versions[index]
+
+    def get_trace(self, job_id: int):
+        '''
+        Returns the trace of a job that has not been evicted, or None: the Unix timestamps
+        of TRACE_FIELDS (None if not recorded) and the id of the worker that computed it
+        '''
+        with self.lock:
+            if self.get_status_locked(job_id) in (None, JobStatus.EXPIRED):
+                return None
+
+            slots, index = self.locate_locked(job_id)
+            timestamps = slots.traces[index * len(TRACE_FIELDS):(index + 1) * len(TRACE_FIELDS)]
+            worker_id = slots.worker_ids[index]
+
+        trace = {'worker_id': worker_id if worker_id != NO_WORKER else None}
+        for field, timestamp in zip(TRACE_FIELDS, timestamps):
+            trace[field] = None if math.isnan(timestamp) else timestamp
+
+        return trace
+
+    def get_statuses(self) -> dict:
+        '''
+        Returns the status of every job that has not been evicted
+        '''
+        with self.lock:
+            statuses = {job_id: JobStatus(slots.statuses[0])
+                        for job_id, slots in sorted(self.stragglers.items())}
+            statuses.update({self.base_id + index: JobStatus(status)
+                             for index, status in enumerate(self.statuses)
+                             if status != JobStatus.EXPIRED.value})
+            return statuses
+
+    def finish(self, job_id: int, status: JobStatus, version: int = 0, trace=None) -> list:
+        '''
+        Marks a running job as DONE or FAILED, wakes up its waiters and evicts the finished
+        jobs over the retention limits. Returns the ids of the evicted jobs. "trace" holds
+        the worker_id and the dequeue/compute timestamps of the job, if it has been computed.
+        '''
+        with self.lock:
+            if self.get_status_locked(job_id) != JobStatus.RUNNING:
+                return []
+
+            slots, index = self.locate_locked(job_id)
+            slots.statuses[index] = status.value
+            slots.versions[index] = version
+            self.num_running -= 1
+
+            offset = index * len(TRACE_FIELDS)
+            if trace is not None:
+                for field_index in range(1, len(TRACE_FIELDS) - 1):
+                    slots.traces[offset + field_index] = trace.get(TRACE_FIELDS[field_index],
+                                                                   math.nan)
+                slots.worker_ids[index] = trace.get('worker_id', NO_WORKER)
+            slots.traces[offset + len(TRACE_FIELDS) - 1] = time.time()
+
+            self.finished_ids.append(job_id)
+            self.finish_times.append(time.monotonic())
+            event = self.events.pop(job_id, None)
+            callbacks = self.callbacks.pop(job_id, [])
+
+            evicted_ids = self.evict_locked()
+
+        # wake up all the requests waiting for this job
+        if event is not None:
+            event.set()
+        for callback in callbacks:
+            callback()
+
+        return evicted_ids
+
+    def evict_expired(self) -> list:
+        '''
+        Evicts the finished jobs over the retention limits, returns their ids
+        '''
+        with self.lock:
+            return self.evict_locked()
+
+    def evict_locked(self) -> list:
+        '''
+        Evicts the finished jobs over the retention limits, the caller holds the lock
+        '''
+        evicted_ids = []
+        now = time.monotonic()
+
+        while self.finished_head < len(self.finished_ids):
+            over_count = len(self.finished_ids) - self.finished_head > self.max_retained
+            over_age = (self.max_age > 0) and \
+                       (now - self.finish_times[self.finished_head] > self.max_age)
+            if not (over_count or over_age):
+                break
+
+            job_id = self.finished_ids[self.finished_head]
+            if job_id >= self.base_id:
+                self.statuses[job_id - self.base_id] = JobStatus.EXPIRED.value
+                self.num_expired += 1
+            else:
+                del self.stragglers[job_id]
+            self.finished_head += 1
+            evicted_ids.append(job_id)
+
+        if evicted_ids:
+            self.compact_locked()
+
+        return evicted_ids
+
+    def compact_locked(self):
+        '''
+        Drops the evicted entries of the arrays, once they make up half of them,
+        so that each entry is moved a constant number of times on average
+        '''
+        if self.finished_head * 2 >= len(self.finished_ids):
+            del self.finished_ids[:self.finished_head]
+            del self.finish_times[:self.finished_head]
+            self.finished_head = 0
+
+        if (self.num_expired == 0) or (self.num_expired * 2 < len(self.statuses)):
+            return
+
+        # the arrays are cut after the last evicted entry, the entries not evicted
+        # below the cut (e.g. a job stuck running) are kept aside
+        cut = len(self.statuses)
+        while self.statuses[cut - 1] != JobStatus.EXPIRED.value:
+            cut -= 1
+
+        for index in range(cut):
+            if self.statuses[index] != JobStatus.EXPIRED.value:
+                self.stragglers[self.base_id + index] = StragglerSlots(self, index)
+
+        del self.statuses[:cut]
+        del self.versions[:cut]
+        del self.traces[:cut * len(TRACE_FIELDS)]
+        del self.worker_ids[:cut]
+        self.base_id += cut
+        self.num_expired = 0
+
+    def wait(self, job_id: int, timeout: float):
+        '''
+        Blocks until the job is finished or "timeout" seconds elapse,
+        returns the job status (None for an id not assigned yet)
+        '''
+        with self.lock:
+            if self.get_status_locked(job_id) != JobStatus.RUNNING:
+                return self.get_status_locked(job_id)
+
+            # all the waiters of a job share the same event
+            event = self.events.setdefault(job_id, Event())
+
+        event.wait(timeout)
+
+        with self.lock:
+            return self.get_status_locked(job_id)
+
+    def add_callback(self, job_id: int, callback):
+        '''
+        Registers a function called, from the finishing thread, once a running job is
+        finished. Returns the job status, the callback is only registered if it is RUNNING.
+        '''
+        with self.lock:
+            status = self.get_status_locked(job_id)
+            if status == JobStatus.RUNNING:
+                self.callbacks.setdefault(job_id, []).append(callback)
+
+            return status
+
+    def remove_callback(self, job_id: int, callback):
+        '''
+        Unregisters a callback of a job that is no longer waited for
+        '''
+        with self.lock:
+            callbacks = self.callbacks.get(job_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.callbacks.pop(job_id, None)
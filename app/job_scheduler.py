@@ -0,0 +1,152 @@
+import queue
+import time
+from collections import deque
+from threading import Condition
+
+# lanes of the jobs queue, from the cheapest jobs to the most expensive ones
+INTERACTIVE_LANE = "interactive"
+STANDARD_LANE = "standard"
+BULK_LANE = "bulk"
+LANES = (INTERACTIVE_LANE, STANDARD_LANE, BULK_LANE)
+
+# single lane of the "fifo" scheduler
+FIFO_LANE = "fifo"
+
+# schedulers of the jobs queue, selected through the TP_SCHEDULER env var
+LANES_SCHEDULER = "lanes"
+FIFO_SCHEDULER = "fifo"
+
+# share of the dequeues each lane gets while all of them hold jobs,
+# overridable through the TP_SCHEDULER_WEIGHTS env var (e.g. "8,4,1")
+LANE_WEIGHTS = (8, 4, 1)
+
+# the jobs estimated to cost at most the first limit go to the interactive lane, those
+# over the second one to the bulk lane, overridable through TP_SCHEDULER_LANE_COSTS
+LANE_COST_LIMITS = (2000, 5000)
+
+# priority hints of the clients, moving a job that many lanes from the one of its cost
+PRIORITY_HINTS = {
+    "high": -1,
+    "normal": 0,
+    "low": 1
+}
+
+def get_cost_lane(cost: int, cost_limits=LANE_COST_LIMITS, priority=None) -> str:
+    '''
+    Returns the lane of a job of the given estimated cost, moved by its priority hint
+    '''
+    index = sum(1 for limit in cost_limits if cost > limit)
+    index += PRIORITY_HINTS.get(priority, 0) if isinstance(priority, str) else 0
+    return LANES[min(max(index, 0), len(LANES) - 1)]
+
+def get_num_item_jobs(item) -> int:
+    '''
+    Returns the number of jobs of a queued item: the items of a batch, or 1
+    '''
+    return len(item['jobs']) if 'jobs' in item else 1
+
+class JobScheduler:
+    '''
+    Jobs queue made of one FIFO lane per job class. The lanes holding jobs are served
+    by smooth weighted round-robin, so that a burst of expensive jobs only gets its
+    lane's share of the workers instead of delaying every job queued after it, and no
+    lane starves: a busy lane gets at least weight / sum(weights) of the dequeues, however
+    full the others are. The items put without a lane (the shutdown sentinels) are
+    returned only once every lane is empty.
+    '''
+    def __init__(self, weights: dict):
+        self.condition = Condition() # protects all the fields below
+        self.weights = dict(weights) # lane -> weight
+        self.lanes = {lane: deque() for lane in weights}
+        self.credits = {lane: 0 for lane in weights}
+        self.last_items = deque() # items put without a lane
+        self.size = 0
+        self.num_jobs = 0 # jobs in the lanes, every item of a batch counted
+
+    def put(self, item, lane=None):
+        '''
+        Appends an item to a lane, or after all the jobs if no lane is given
+        '''
+        with self.condition:
+            if lane is None:
+                self.last_items.append(item)
+            else:
+                self.lanes[lane].append(item)
+                self.num_jobs += get_num_item_jobs(item)
+            self.size += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        '''
+        Removes and returns the next item, raises queue.Empty if there is none
+        after "timeout" seconds (None blocks until there is one)
+        '''
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.size > 0, timeout):
+                raise queue.Empty
+
+            self.size -= 1
+            busy_lanes = [lane for lane, items in self.lanes.items() if items]
+            if not busy_lanes:
+                return self.last_items.popleft()
+
+            # every busy lane earns its weight, the richest one is served and pays the total
+            for lane in busy_lanes:
+                self.credits[lane] += self.weights[lane]
+            served = max(busy_lanes, key=lambda lane: self.credits[lane])
+            self.credits[served] -= sum(self.weights[lane] for lane in busy_lanes)
+
+            # an emptied lane does not keep its credits for a later burst
+            if len(self.lanes[served]) == 1:
+                self.credits[served] = 0
+
+            item = self.lanes[served].popleft()
+            self.num_jobs -= get_num_item_jobs(item)
+            return item
+
+    def qsize(self) -> int:
+        '''
+        Returns the number of queued items, shutdown sentinels included
+        '''
+        with self.condition:
+            return self.size
+
+    def get_num_jobs(self) -> int:
+        '''
+        Returns the number of queued jobs, each item of a batch counted,
+        shutdown sentinels excluded
+        '''
+        with self.condition:
+            return self.num_jobs
+
+    def empty(self) -> bool:
+        '''
+        Checks that no item is queued
+        '''
+        return self.qsize() == 0
+
+    def get_head_wait(self) -> float:
+        '''
+        Returns the time the oldest job at the head of a lane has been queued for,
+        in seconds, from the "enqueue_time" of the jobs
+        '''
+        with self.condition:
+            heads = [items[0]['enqueue_time'] for items in self.lanes.values() if items]
+
+        return time.perf_counter() - min(heads) if heads else 0.0
+
+    def get_depths(self) -> dict:
+        '''
+        Returns the number of jobs queued in each lane
+        '''
+        with self.condition:
+            return {lane: len(items) for lane, items in self.lanes.items()}
+
+def create_job_scheduler(scheduler: str, weights=LANE_WEIGHTS) -> JobScheduler:
+    '''
+    Returns the jobs queue of a scheduler: "lanes" or a single "fifo" lane
+    '''
+    if scheduler == FIFO_SCHEDULER:
+        return JobScheduler({FIFO_LANE: 1})
+
+    return JobScheduler(dict(zip(LANES, weights)))
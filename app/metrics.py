@@ -0,0 +1,271 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+# upper bounds of the latency histograms buckets, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    '''
+    Number of observations per bucket, sum and count of a latency, in seconds.
+    It is not thread-safe, the JobMetrics lock protects it.
+    '''
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # the last one counts the values over all buckets
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, value: float):
+        '''
+        Records an observation, in the first bucket whose upper bound is not below it
+        '''
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        '''
+        Returns a copy of the histogram
+        '''
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+class JobMetrics:
+    '''
+    Per-endpoint counters of the submitted, completed and failed jobs and histograms of
+    their queue wait and execution times, along with the queue wait of each scheduler lane.
+    Recording takes one lock and a few dict updates, so that the metrics can be kept on
+    in production.
+    '''
+    def __init__(self):
+        self.lock = Lock() # protects all the fields below
+        self.submitted = {} # endpoint -> number of jobs
+        self.completed = {}
+        self.failed = {}
+        self.rejected = {}
+        self.queue_wait = {} # endpoint -> Histogram
+        self.execution = {}
+        self.lane_wait = {} # lane -> Histogram
+
+    def add_submitted(self, endpoint: str, count: int = 1):
+        '''
+        Counts jobs received for an endpoint
+        '''
+        with self.lock:
+            self.submitted[endpoint] = self.submitted.get(endpoint, 0) + count
+
+    def add_completed(self, endpoint: str, count: int = 1):
+        '''
+        Counts jobs of an endpoint that received their result
+        '''
+        with self.lock:
+            self.completed[endpoint] = self.completed.get(endpoint, 0) + count
+
+    def add_failed(self, endpoint: str, count: int = 1):
+        '''
+        Counts jobs of an endpoint that could not be computed
+        '''
+        with self.lock:
+            self.failed[endpoint] = self.failed.get(endpoint, 0) + count
+
+    def add_rejected(self, endpoint: str, count: int = 1):
+        '''
+        Counts jobs of an endpoint refused by the admission control
+        '''
+        with self.lock:
+            self.rejected[endpoint] = self.rejected.get(endpoint, 0) + count
+
+    def add_queue_wait(self, endpoint: str, seconds: float):
+        '''
+        Records the time a job spent in the jobs queue
+        '''
+        with self.lock:
+            if endpoint not in self.queue_wait:
+                self.queue_wait[endpoint] = Histogram()
+            self.queue_wait[endpoint].add(seconds)
+
+    def add_execution(self, endpoint: str, seconds: float):
+        '''
+        Records the time a worker spent computing a job
+        '''
+        with self.lock:
+            if endpoint not in self.execution:
+                self.execution[endpoint] = Histogram()
+            self.execution[endpoint].add(seconds)
+
+    def add_lane_wait(self, lane: str, seconds: float):
+        '''
+        Records the time a job spent in a lane of the jobs queue
+        '''
+        with self.lock:
+            if lane not in self.lane_wait:
+                self.lane_wait[lane] = Histogram()
+            self.lane_wait[lane].add(seconds)
+
+    def get_stats(self) -> dict:
+        '''
+        Returns a consistent copy of the counters and histograms
+        '''
+        with self.lock:
+            return {
+                'submitted': dict(self.submitted),
+                'completed': dict(self.completed),
+                'failed': dict(self.failed),
+                'rejected': dict(self.rejected),
+                'queue_wait': {key: value.copy() for key, value in self.queue_wait.items()},
+                'execution': {key: value.copy() for key, value in self.execution.items()},
+                'lane_wait': {key: value.copy() for key, value in self.lane_wait.items()}
+            }
+
+def format_labels(labels: dict) -> str:
+    '''
+    Returns the labels of a sample in the Prometheus format, e.g. {endpoint="best5"}
+    '''
+    if not labels:
+        return ""
+
+    # backslashes, quotes and new lines are escaped in the label values
+    values = [f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"')
+              .replace("\n", "\\n") + '"' for name, value in labels.items()]
+    return "{" + ",".join(values) + "}"
+
+def format_number(value) -> str:
+    '''
+    Returns the value of a sample, the floats with all their digits
+    '''
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def add_metric(lines: list, name: str, metric_type: str, description: str, samples):
+    '''
+    Appends a metric and its samples, (labels, value) pairs, to the exposition lines
+    '''
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for labels, value in samples:
+        lines.append(f"{name}{format_labels(labels)} {format_number(value)}")
+
+def add_histograms(lines: list, name: str, description: str, histograms: dict,
+                   label: str = 'endpoint'):
+    '''
+    Appends a histogram metric to the exposition lines, "histograms" maps the "label"
+    values (the endpoints by default) to their Histogram
+    '''
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} histogram")
+    for value, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            labels = format_labels({label: value, 'le': bound})
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+
+        labels = format_labels({label: value})
+        lines.append(f"{name}_sum{labels} {format_number(histogram.sum)}")
+        lines.append(f"{name}_count{labels} {histogram.count}")
+
+def format_metrics(thread_pool, log_records_dropped: int = 0) -> str:
+    '''
+    Returns the metrics of a ThreadPool in the Prometheus text format
+    '''
+    lines = []
+    stats = thread_pool.metrics.get_stats()
+
+    add_metric(lines, "webserver_jobs_queue_depth", "gauge",
+               "Jobs waiting in the jobs queue.",
+               [({}, thread_pool.jobs_queue.get_num_jobs())])
+    add_metric(lines, "webserver_jobs_queue_capacity", "gauge",
+               "Jobs the jobs queue accepts before rejecting new ones (0 for no limit).",
+               [({}, thread_pool.admission.max_depth)])
+    add_metric(lines, "webserver_jobs_lane_depth", "gauge",
+               "Jobs waiting in each lane of the jobs queue.",
+               [({'lane': lane}, depth)
+                for lane, depth in thread_pool.jobs_queue.get_depths().items()])
+    add_metric(lines, "webserver_jobs_running", "gauge",
+               "Jobs registered and not finished yet.",
+               [({}, thread_pool.job_registry.get_num_running())])
+
+    for counter, description in (("submitted", "Jobs received"),
+                                 ("completed", "Jobs that received their result"),
+                                 ("failed", "Jobs that could not be computed"),
+                                 ("rejected", "Jobs refused because the server was overloaded")):
+        add_metric(lines, f"webserver_jobs_{counter}_total", "counter",
+                   f"{description}, per endpoint.",
+                   [({'endpoint': endpoint}, count)
+                    for endpoint, count in sorted(stats[counter].items())])
+
+    add_histograms(lines, "webserver_job_queue_wait_seconds",
+                   "Time spent by the jobs in the jobs queue, per endpoint.",
+                   stats['queue_wait'])
+    add_histograms(lines, "webserver_job_execution_seconds",
+                   "Time spent by the workers computing the jobs, per endpoint.",
+                   stats['execution'])
+    add_histograms(lines, "webserver_job_lane_wait_seconds",
+                   "Time spent by the jobs in the jobs queue, per scheduler lane.",
+                   stats['lane_wait'], 'lane')
+
+    pool = thread_pool.get_pool_stats()
+    add_metric(lines, "webserver_workers", "gauge",
+               "Workers in the pool.", [({}, len(pool['workers']))])
+    add_metric(lines, "webserver_workers_limit", "gauge",
+               "Minimum and maximum size of the workers pool.",
+               [({'bound': "min"}, pool['min_threads']), ({'bound': "max"}, pool['max_threads'])])
+    add_metric(lines, "webserver_worker_pool_resizes_total", "counter",
+               "Workers added to the pool because the jobs waited too long in the queue, "
+               "and idle workers retired from it.",
+               [({'direction': direction}, count)
+                for direction, count in pool['resizes'].items()])
+
+    now = time.perf_counter()
+    workers = [({'worker': runner.thread_id}, runner.get_busy_time(), now - runner.start_time)
+               for runner in pool['workers']]
+    add_metric(lines, "webserver_worker_busy_seconds_total", "counter",
+               "Time spent by each worker computing jobs.",
+               [(labels, busy) for labels, busy, _ in workers])
+    add_metric(lines, "webserver_worker_busy_ratio", "gauge",
+               "Fraction of its lifetime each worker spent computing jobs.",
+               [(labels, busy / uptime if uptime > 0 else 0.0)
+                for labels, busy, uptime in workers])
+
+    wakeup = thread_pool.wakeup_latency.get_stats()
+    add_metric(lines, "webserver_worker_wakeup_seconds", "summary",
+               "Time between a job being queued and an idle worker picking it up.", [])
+    lines.append(f"webserver_worker_wakeup_seconds_sum "
+                 f"{format_number(wakeup['mean_ms'] * wakeup['count'] / 1000)}")
+    lines.append(f"webserver_worker_wakeup_seconds_count {wakeup['count']}")
+    add_metric(lines, "webserver_worker_wakeup_max_seconds", "gauge",
+               "Longest time an idle worker took to pick up a job.",
+               [({}, wakeup['max_ms'] / 1000)])
+
+    cache = thread_pool.result_cache.get_stats()
+    lookups = cache['hits'] + cache['misses']
+    add_metric(lines, "webserver_result_cache_hits_total", "counter",
+               "Jobs answered from the results cache.", [({}, cache['hits'])])
+    add_metric(lines, "webserver_result_cache_misses_total", "counter",
+               "Jobs computed or attached to an identical job in flight.",
+               [({}, cache['misses'])])
+    add_metric(lines, "webserver_result_cache_hit_ratio", "gauge",
+               "Fraction of the cache lookups answered from the cache.",
+               [({}, cache['hits'] / lookups if lookups else 0.0)])
+    add_metric(lines, "webserver_result_cache_entries", "gauge",
+               "Results held by the results cache.", [({}, cache['entries'])])
+    add_metric(lines, "webserver_result_cache_bytes", "gauge",
+               "Size of the results held by the results cache.", [({}, cache['size_bytes'])])
+
+    add_metric(lines, "webserver_dataset_version", "gauge",
+               "Version of the dataset the new jobs are computed on.",
+               [({}, thread_pool.dataset_version)])
+    add_metric(lines, "webserver_log_records_dropped_total", "counter",
+               "Log records dropped because the logging queue was full.",
+               [({}, log_records_dropped)])
+
+    return "\n".join(lines) + "\n"
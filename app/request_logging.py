@@ -0,0 +1,197 @@
+import copy
+import atexit
+import random
+import logging
+from queue import Queue, Full
+from logging.handlers import QueueHandler, QueueListener
+
+# logging modes, selected through the TP_LOGGING env var
+ASYNC_LOGGING = "async"
+SYNC_LOGGING = "sync"
+NO_LOGGING = "off"
+
+# capacity of the records queue, the records are dropped while it is full
+LOG_QUEUE_SIZE = 10000
+
+# default length of the logged payload summaries (0 for the full payloads)
+# and fraction of the success-path requests whose logs are kept
+LOG_PAYLOAD_MAX_CHARS = 512
+LOG_SAMPLE_RATE = 1.0
+
+def iter_payload_parts(payload):
+    '''
+    Yields the parts of the payload repr, so that a summary stops formatting at its length limit
+    '''
+    if isinstance(payload, dict):
+        yield "{"
+        for index, (key, value) in enumerate(payload.items()):
+            if index > 0:
+                yield ", "
+            yield repr(key) + ": "
+            yield from iter_payload_parts(value)
+        yield "}"
+    elif isinstance(payload, list):
+        yield "["
+        for index, value in enumerate(payload):
+            if index > 0:
+                yield ", "
+            yield from iter_payload_parts(value)
+        yield "]"
+    else:
+        yield repr(payload)
+
+def summarize_payload(payload, max_chars: int) -> str:
+    '''
+    Returns the payload as text, cut after "max_chars" characters (0 for no limit),
+    without formatting the rest of it
+    '''
+    if (max_chars <= 0) or not isinstance(payload, (dict, list)):
+        text = str(payload)
+        return text if max_chars <= 0 else text[:max_chars]
+
+    parts = []
+    length = 0
+    for part in iter_payload_parts(payload):
+        if length + len(part) > max_chars:
+            parts.append(part[:max_chars - length])
+            parts.append(f"... ({len(payload)} items)")
+            break
+
+        parts.append(part)
+        length += len(part)
+
+    return "".join(parts)
+
+class PayloadSummary:
+    '''
+    A payload passed as a log argument, summarized only if the record is emitted
+    '''
+    def __init__(self, payload, max_chars: int):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self):
+        return summarize_payload(self.payload, self.max_chars)
+
+class AsyncLogHandler(QueueHandler):
+    '''
+    Puts the log records in a bounded queue, consumed by a QueueListener thread which
+    formats and writes them. Only the message is merged on the logging thread, since
+    its arguments may be changed afterwards. The records are dropped (and counted)
+    while the queue is full, instead of blocking the requests.
+    '''
+    def __init__(self, log_queue: Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the record may still be handled by the other handlers of the logger
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        # the traceback holds the frames, it is formatted here
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info) \
+                              if self.formatter else None
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+class RequestLog:
+    '''
+    Logging of the requests to the file handler: through a background writer thread
+    ("async" mode), directly from the request threads ("sync" mode) or disabled ("off").
+    The payloads are logged as summaries of at most "payload_max_chars" characters and
+    the success-path logs are kept for a "sample_rate" fraction of the requests.
+    '''
+    def __init__(self, logger, handler, mode=ASYNC_LOGGING,
+                 payload_max_chars=LOG_PAYLOAD_MAX_CHARS, sample_rate=LOG_SAMPLE_RATE):
+        self.logger = logger
+        self.handler = handler
+        self.mode = mode
+        self.payload_max_chars = payload_max_chars
+        self.sample_rate = sample_rate
+        self.queue_handler = None
+        self.listener = None
+
+    def start(self):
+        '''
+        Attaches the handlers to the logger and starts the writer thread, in "async" mode
+        '''
+        if self.mode == NO_LOGGING:
+            self.logger.disabled = True
+            return
+
+        self.logger.disabled = False
+
+        if self.mode == SYNC_LOGGING:
+            self.logger.addHandler(self.handler)
+            return
+
+        self.queue_handler = AsyncLogHandler(Queue(LOG_QUEUE_SIZE))
+        self.queue_handler.setFormatter(self.handler.formatter)
+        self.listener = QueueListener(self.queue_handler.queue, self.handler)
+        self.listener.start()
+        self.logger.addHandler(self.queue_handler)
+
+        # the records still queued at exit are written
+        atexit.register(self.stop)
+
+    def stop(self):
+        '''
+        Detaches the handlers, the queued records are written before returning
+        '''
+        self.logger.removeHandler(self.handler)
+
+        if self.listener is not None:
+            self.logger.removeHandler(self.queue_handler)
+            self.listener.stop()
+            self.listener = None
+            atexit.unregister(self.stop)
+
+        self.handler.flush()
+
+    def get_dropped(self) -> int:
+        '''
+        Returns the number of records dropped because the queue was full
+        '''
+        return self.queue_handler.dropped if self.queue_handler is not None else 0
+
+    def sample(self) -> bool:
+        '''
+        Decides whether the success-path logs of a request are kept
+        '''
+        return random.random() < self.sample_rate
+
+    def summary(self, payload):
+        '''
+        Wraps a payload logged as an argument, the other arguments are returned as they are
+        '''
+        if not isinstance(payload, (dict, list)):
+            return payload
+
+        return PayloadSummary(payload, self.payload_max_chars)
+
+def create_file_log(name: str, file_name: str) -> RequestLog:
+    '''
+    Returns a started RequestLog writing the bare messages of the "name" logger
+    to a file, one per line, through the background writer thread
+    '''
+    handler = logging.FileHandler(file_name, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    file_log = RequestLog(logger, handler, ASYNC_LOGGING, 0)
+    file_log.start()
+
+    return file_log
@@ -0,0 +1,178 @@
+import os
+from collections import OrderedDict
+from threading import Thread, Event, Lock
+
+# result store backends, selected through the TP_RESULT_STORE env var
+MEMORY_STORE = "memory"
+DISK_STORE = "disk"
+
+RESULTS_DIR = "./results"
+
+class MemoryResultStore:
+    '''
+    Keeps the serialized results of the jobs in memory
+    '''
+    def __init__(self):
+        self.results = {} # job id -> serialized result
+        self.lock = Lock() # protects "results" dictionary
+
+    def put(self, job_id: int, serialized: bytes):
+        '''
+        Stores the serialized result of a job
+        '''
+        with self.lock:
+            self.results[job_id] = serialized
+
+    def get(self, job_id: int):
+        '''
+        Returns the serialized result of a job, or None if it is not stored
+        '''
+        with self.lock:
+            return self.results.get(job_id)
+
+    def remove(self, job_id: int):
+        '''
+        Drops the result of a job
+        '''
+        with self.lock:
+            self.results.pop(job_id, None)
+
+class DiskResultStore:
+    '''
+    Stores the serialized results of the jobs as "out-<job_id>.json" files.
+    Without a memory cap the files are written synchronously. With a memory cap
+    the results are kept in memory and a background thread spills the oldest
+    (coldest) ones to disk whenever the memory in use exceeds the cap.
+    '''
+    def __init__(self, results_dir=RESULTS_DIR, memory_cap=0):
+        self.results_dir = results_dir
+        self.memory_cap = memory_cap
+        self.lock = Lock() # protects the fields below
+        self.in_memory = OrderedDict() # job id -> serialized result, oldest first
+        self.memory_size = 0
+        self.on_disk = set() # ids of the jobs whose result has been written to disk
+        self.spill_event = Event() # set when the memory in use exceeds the cap
+
+        if memory_cap > 0:
+            Thread(target=self.spill_cold_results, daemon=True).start()
+
+    def get_file_name(self, job_id: int) -> str:
+        '''
+        Returns the path of the result file of a job
+        '''
+        return os.path.join(self.results_dir, "out-" + str(job_id) + ".json")
+
+    def write_file(self, job_id: int, serialized: bytes):
+        '''
+        Writes the result file of a job
+        '''
+        with open(self.get_file_name(job_id), "wb") as output_file:
+            output_file.write(serialized)
+
+    def remove_file(self, job_id: int):
+        '''
+        Removes the result file of a job, if it exists
+        '''
+        try:
+            os.remove(self.get_file_name(job_id))
+        except OSError:
+            pass
+
+    def put(self, job_id: int, serialized: bytes):
+        '''
+        Stores the serialized result of a job
+        '''
+        if self.memory_cap <= 0:
+            self.write_file(job_id, serialized)
+            with self.lock:
+                self.on_disk.add(job_id)
+            return
+
+        with self.lock:
+            self.in_memory[job_id] = serialized
+            self.memory_size += len(serialized)
+
+            if self.memory_size > self.memory_cap:
+                self.spill_event.set()
+
+    def get(self, job_id: int):
+        '''
+        Returns the serialized result of a job, or None if it is not stored
+        '''
+        with self.lock:
+            if job_id in self.in_memory:
+                return self.in_memory[job_id]
+
+            if job_id not in self.on_disk:
+                return None
+
+        # read the file outside the lock, the job may be evicted meanwhile
+        try:
+            with open(self.get_file_name(job_id), "rb") as job_data:
+                return job_data.read()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, job_id: int):
+        '''
+        Drops the result of a job, from memory and from disk
+        '''
+        with self.lock:
+            if job_id in self.in_memory:
+                self.memory_size -= len(self.in_memory.pop(job_id))
+
+            if job_id not in self.on_disk:
+                return
+
+            self.on_disk.discard(job_id)
+
+        self.remove_file(job_id)
+
+    def spill_cold_results(self):
+        '''
+        Background thread, writes the oldest results to disk until the memory
+        in use drops under the cap
+        '''
+        while True:
+            self.spill_event.wait()
+
+            while True:
+                with self.lock:
+                    if (self.memory_size <= self.memory_cap) or (not self.in_memory):
+                        self.spill_event.clear()
+                        break
+
+                    job_id, serialized = next(iter(self.in_memory.items()))
+
+                # the result stays readable from memory while it is being written
+                try:
+                    self.write_file(job_id, serialized)
+                except OSError as e:
+                    # e.g. the disk is full, the results stay in memory and
+                    # the spilling is tried again by the next put over the cap
+                    print(f"There was an error spilling the result of the job "
+                          f"with id = {job_id}: {e}")
+                    self.remove_file(job_id)
+                    self.spill_event.clear()
+                    break
+
+                with self.lock:
+                    spilled = self.in_memory.get(job_id) is serialized
+                    if spilled:
+                        del self.in_memory[job_id]
+                        self.memory_size -= len(serialized)
+                        self.on_disk.add(job_id)
+
+                if not spilled:
+                    # the result has been removed while it was being written
+                    self.remove_file(job_id)
+
+def create_result_store():
+    '''
+    Creates the result store selected through the TP_RESULT_STORE env var,
+    TP_RESULT_STORE_MEMORY_CAP sets the memory cap (in bytes) of the disk store
+    '''
+    if os.environ.get('TP_RESULT_STORE', MEMORY_STORE) == DISK_STORE:
+        return DiskResultStore(RESULTS_DIR, int(os.environ.get('TP_RESULT_STORE_MEMORY_CAP', 0)))
+
+    return MemoryResultStore()
@@ -1,38 +1,100 @@
-import json
-from flask import request, jsonify
+import time
+import pandas
+from flask import request, jsonify, g
 from app import webserver
 from .utils import JobStatus
+from .task_runner import LOADING_REJECT
+from .thread_utils import ThreadUtils
+from .data_ingestor import USED_COLUMNS
+from .metrics import format_metrics, PROMETHEUS_CONTENT_TYPE
+from .serialization import RawJson, dumps_response
+
+# endpoints that also require the "state" field
+STATE_ENDPOINTS = ["state_mean", "state_diff_from_mean", "state_mean_by_category"]
+
+# upper bound of the "wait" parameter of "/api/get_results", in milliseconds
+MAX_RESULT_WAIT_MS = 30000
+
+@webserver.before_request
+def sample_request_logs():
+    '''
+    Decides once per request whether its success-path logs are kept
+    '''
+    g.log_sampled = webserver.request_log.sample()
+
+def log_request(message: str, *args):
+    '''
+    Logs a received request, only for the sampled requests
+    '''
+    if g.log_sampled:
+        # the record is attributed to the route function
+        webserver.logger.info(message, *[webserver.request_log.summary(arg) for arg in args],
+                              stacklevel=2)
+
+def log_response(message: str, *args):
+    '''
+    Logs a response, the last argument: the error responses are always logged,
+    the other ones only for the sampled requests
+    '''
+    if g.log_sampled or str(args[-1].get('status')).startswith('error'):
+        webserver.logger.info(message, *[webserver.request_log.summary(arg) for arg in args],
+                              stacklevel=2)
 
 def process_post_request(function_name: str, data: dict):
     '''
     Process a POST request
     '''
-    webserver.logger.info("\"POST /api/%s\" - \"Received data: %s\"", function_name, data)
+    log_request("\"POST /api/%s\" - \"Received data: %s\"", function_name, data)
 
     if webserver.tasks_runner.shutdown_event.is_set():
         response = {
             'status': 'error',
             'reason': 'shutting down'
         }
-        webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+        log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
         return jsonify(response)
 
-    # append the job to the queue
+    response = get_loading_response()
+    if response is not None:
+        log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+        return jsonify(response), 503 if response['status'] == 'error' else 200
+
+    # fail fast while the server is over its queue depth or in-flight limits
+    rejection = webserver.tasks_runner.admit_jobs([function_name])
+    if rejection is not None:
+        return get_overloaded_response(f"/api/{function_name}", *rejection)
+
+    # append the job to the queue, in "sync" mode cached or cheap jobs are answered inline
     try:
-        job_id = append_job(data, function_name)
-        response = {
-            'status': 'success',
-            'job_id': job_id
-        }
-        webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
-        return jsonify(response)
+        if request.args.get('sync', '0') not in ('0', 'false'):
+            job_id = register_job(data, function_name)
+            serialized = webserver.tasks_runner.add_job_sync(data)
+        else:
+            job_id = append_job(data, function_name)
+            serialized = None
+
+        if serialized is not None:
+            response = {
+                'status': 'done',
+                'job_id': job_id,
+                'dataset_version': webserver.tasks_runner.job_registry.get_version(job_id),
+                'data': RawJson(serialized)
+            }
+        else:
+            response = {
+                'status': 'success',
+                'job_id': job_id
+            }
+        log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+        return json_response(response)
 
     except KeyError as e:
         webserver.logger.exception("Exception occured while appending the post request job to the queue: %s", e)
         response = {
             'status': 'error: exception while putting the post request job in queue'
         }
-        webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+        fail_registered_job(data, function_name)
+        log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
         return jsonify(response)
 
     except TypeError as e:
@@ -40,36 +102,59 @@ def process_post_request(function_name: str, data: dict):
         response = {
             'status': 'error: exception while putting the post request job in queue'
         }
-        webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+        fail_registered_job(data, function_name)
+        log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
         return jsonify(response)
 
-def get_job_result(job_id):
+def get_job_result(job_id, job_status):
     '''
     Returns the job result of the corresponding job id
     '''
-    if webserver.tasks_runner.jobs[job_id] == JobStatus.DONE:
-        file_name = "./results/" + "out-" + str(job_id) + ".json"
-        with open(file_name, "r", encoding="utf-8") as job_data:
+    if job_status == JobStatus.DONE:
+        dataset_version = webserver.tasks_runner.job_registry.get_version(job_id)
+
+        # the result store keeps the result serialized, it is spliced into the response
+        serialized = webserver.tasks_runner.result_store.get(job_id)
+
+        # the job may have been evicted meanwhile
+        if serialized is not None:
             return {
                 'status': 'done',
-                'data': json.load(job_data)
+                'dataset_version': dataset_version,
+                'data': RawJson(serialized)
             }
-    elif webserver.tasks_runner.jobs[job_id] == JobStatus.RUNNING:
+
+        job_status = JobStatus.EXPIRED
+
+    if job_status == JobStatus.RUNNING:
         return {
             'status': 'running'
         }
-    else:
+    if job_status == JobStatus.FAILED:
         return {
             'status': 'error',
-            'reason': 'unrecognized job state'
+            'reason': 'the job could not be computed'
+        }
+    if job_status == JobStatus.EXPIRED:
+        return {
+            'status': 'expired',
+            'reason': 'the job has been evicted from the jobs registry'
         }
 
+    return {
+        'status': 'error',
+        'reason': 'unrecognized job state'
+    }
+
 @webserver.route('/api/get_results/<job_id>', methods=['GET'])
 def get_response(job_id):
     '''
-    Returns the response of a request
+    Returns the response of a request. With the optional "wait" query parameter
+    (in milliseconds), a running job is waited for up to that long before responding.
+    With "trace=1", the response also holds the execution trace of the job.
     '''
-    webserver.logger.info("\"GET /api/get_results/%s\"", job_id)
+    log_request("\"GET /api/get_results/%s\"", job_id)
+    wait_ms = request.args.get('wait', '0')
 
     if not job_id.isnumeric():
         webserver.logger.info("\"GET /api/get_results/%s\" -- The job id is not numeric.\"", job_id)
@@ -77,33 +162,49 @@ def get_response(job_id):
             'status': 'error',
             'reason': 'the job id is not numeric'
         }
-        webserver.logger.info("\"GET /api/get_results/%s\" - \"Responding with: %s\"", job_id, response)
+        log_response("\"GET /api/get_results/%s\" - \"Responding with: %s\"", job_id, response)
+        return jsonify(response)
+
+    if not wait_ms.isnumeric():
+        response = {
+            'status': 'error',
+            'reason': 'the wait parameter is not numeric'
+        }
+        log_response("\"GET /api/get_results/%s\" - \"Responding with: %s\"", job_id, response)
         return jsonify(response)
 
     # convert job_id from string to int
     job_id = int(job_id)
+    wait_ms = min(int(wait_ms), MAX_RESULT_WAIT_MS)
 
     try:
-        job_result = {}
-        # check the requested job state
-        with webserver.tasks_runner.jobs_lock:
-            if job_id in webserver.tasks_runner.jobs:
-                job_result = get_job_result(job_id)
-            else:
-                job_result = {
-                    'status': 'error',
-                    'reason': 'invalid job id'
-                }
-
-        webserver.logger.info("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, job_result)
-        return jsonify(job_result)
+        # check the requested job state, the result is fetched outside the registry lock
+        job_status = webserver.tasks_runner.job_registry.get_status(job_id)
+
+        if (job_status == JobStatus.RUNNING) and (wait_ms > 0):
+            # long poll: block until the job is done or the wait time elapses
+            job_status = webserver.tasks_runner.job_registry.wait(job_id, wait_ms / 1000)
+
+        if job_status is not None:
+            job_result = get_job_result(job_id, job_status)
+
+            if request.args.get('trace', '0') not in ('0', 'false'):
+                job_result['trace'] = get_job_trace(job_id)
+        else:
+            job_result = {
+                'status': 'error',
+                'reason': 'invalid job id'
+            }
+
+        log_response("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, job_result)
+        return json_response(job_result)
 
     except KeyError as e:
         webserver.logger.info("Exception occured while checking the job status: %s", e)
         response = {
             'status': 'error: exception while checking the job status'
         }
-        webserver.logger.info("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, response)
+        log_response("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, response)
         return jsonify(response)
 
     except TypeError as e:
@@ -111,7 +212,7 @@ def get_response(job_id):
         response = {
             'status': 'error: exception while checking the job status'
         }
-        webserver.logger.info("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, response)
+        log_response("\"GET /api/get_results/%d\" - \"Responding with: %s\"", job_id, response)
         return jsonify(response)
 
 @webserver.route('/api/jobs', methods=['GET'])
@@ -119,10 +220,11 @@ def get_jobs_status():
     '''
     Returns the status of all jobs
     '''
-    webserver.logger.info("\"GET /api/jobs\"")
-    jobs = {}
-    with webserver.tasks_runner.jobs_lock:
-        jobs = webserver.tasks_runner.jobs
+    log_request("\"GET /api/jobs\"")
+
+    # the jobs older than the retention age are evicted first
+    webserver.tasks_runner.evict_expired_jobs()
+    jobs = webserver.tasks_runner.job_registry.get_statuses()
 
     result = {}
     # convert enum values into strings
@@ -131,13 +233,15 @@ def get_jobs_status():
             result[key] = "running"
         elif value == JobStatus.DONE:
             result[key] = "done"
+        elif value == JobStatus.FAILED:
+            result[key] = "failed"
 
     response = {
         'status': "done",
         "data": result
     }
 
-    webserver.logger.info("\"GET /api/jobs\" - \"Responding with: %s\"", response)
+    log_response("\"GET /api/jobs\" - \"Responding with: %s\"", response)
     return jsonify(response)
 
 @webserver.route('/api/num_jobs', methods=['GET'])
@@ -145,20 +249,69 @@ def get_num_jobs():
     '''
     Returns the number of running jobs
     '''
-    webserver.logger.info("\"GET /api/num_jobs\"")
-    done_jobs_counter = 0
-
-    with webserver.tasks_runner.done_jobs_counter_lock:
-        done_jobs_counter = webserver.tasks_runner.done_jobs_counter
+    log_request("\"GET /api/num_jobs\"")
 
+    admission = webserver.tasks_runner.admission.get_stats()
     response = {
             'status': "done",
-            "data": webserver.tasks_runner.job_counter - done_jobs_counter
+            "data": webserver.tasks_runner.job_registry.get_num_running(),
+            "queue_depth": webserver.tasks_runner.jobs_queue.get_num_jobs(),
+            "queue_capacity": admission['queue_capacity'],
+            "lanes": webserver.tasks_runner.jobs_queue.get_depths(),
+            "in_flight": admission['in_flight'],
+            "in_flight_limit": admission['in_flight_limit'],
+            "in_flight_limits": admission['in_flight_limits'],
+            "drain_rate": admission['drain_rate']
         }
 
-    webserver.logger.info("\"GET /api/jobs\" - \"Responding with: %s\"", response)
+    log_response("\"GET /api/jobs\" - \"Responding with: %s\"", response)
+    return jsonify(response)
+
+@webserver.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    '''
+    Returns the queue, jobs, workers and cache metrics in the Prometheus text format
+    '''
+    log_request("\"GET /api/metrics\"")
+
+    metrics = format_metrics(webserver.tasks_runner, webserver.request_log.get_dropped())
+
+    return metrics, 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+@webserver.route('/api/health', methods=['GET'])
+def get_health():
+    '''
+    Liveness check, answered as soon as the server is up, with the dataset load progress
+    '''
+    response = {
+        'status': 'ok',
+        'ingest': webserver.tasks_runner.ingest_progress.get_status()
+    }
+
+    log_response("\"GET /api/health\" - \"Responding with: %s\"", response)
     return jsonify(response)
 
+@webserver.route('/api/ready', methods=['GET'])
+def get_ready():
+    '''
+    Readiness check, answered with 503 until the dataset is loaded
+    and once the server is shutting down
+    '''
+    ingest = webserver.tasks_runner.ingest_progress.get_status()
+
+    if webserver.tasks_runner.shutdown_event.is_set():
+        status = 'shutting down'
+    else:
+        status = ingest['state']
+
+    response = {
+        'status': status,
+        'ingest': ingest
+    }
+
+    log_response("\"GET /api/ready\" - \"Responding with: %s\"", response)
+    return jsonify(response), 200 if status == 'ready' else 503
+
 @webserver.route('/api/states_mean', methods=['POST'])
 def states_mean_request():
     '''
@@ -258,16 +411,146 @@ def state_mean_by_category_request():
 
     return process_post_request("state_mean_by_category", request.json)
 
+@webserver.route('/api/batch', methods=['POST'])
+def batch_request():
+    '''
+    Processes "batch" API requests: a list of {endpoint, question, state} items,
+    executed by a worker as a single unit
+    '''
+    log_request("\"POST /api/batch\" - \"Received data: %s\"", request.json)
+
+    items = request.json
+    if isinstance(items, dict):
+        items = items.get('items')
+
+    reason = get_batch_items_error(items)
+    max_depth = webserver.tasks_runner.admission.max_depth
+    if (reason is None) and (0 < max_depth < len(items)):
+        # such a batch would never fit in the jobs queue, retrying it is pointless
+        reason = f'the batch holds more items than the jobs queue capacity ({max_depth})'
+    if webserver.tasks_runner.shutdown_event.is_set():
+        reason = 'shutting down'
+
+    if reason is not None:
+        response = {
+            'status': 'error',
+            'reason': reason
+        }
+        log_response("\"POST /api/batch\" - \"Responding with: %s\"", response)
+        return jsonify(response)
+
+    response = get_loading_response()
+    if response is not None:
+        log_response("\"POST /api/batch\" - \"Responding with: %s\"", response)
+        return jsonify(response), 503 if response['status'] == 'error' else 200
+
+    rejection = webserver.tasks_runner.admit_jobs([item['endpoint'] for item in items])
+    if rejection is not None:
+        return get_overloaded_response("/api/batch", *rejection)
+
+    jobs = []
+    for item in items:
+        job = {key: item[key] for key in ('question', 'state') if key in item}
+        register_job(job, item['endpoint'])
+        jobs.append(job)
+
+    # the jobs are queued together, as a single unit, with the optional priority hint
+    priority = request.json.get('priority') if isinstance(request.json, dict) else None
+    webserver.tasks_runner.add_batch(jobs, priority)
+
+    with webserver.tasks_runner.batch_counter_lock:
+        webserver.tasks_runner.batch_counter += 1
+        batch_id = webserver.tasks_runner.batch_counter
+
+    response = {
+        'status': 'success',
+        'batch_id': batch_id,
+        'job_ids': [job['job_id'] for job in jobs]
+    }
+    log_response("\"POST /api/batch\" - \"Responding with: %s\"", response)
+    return jsonify(response)
+
+@webserver.route('/api/admin/reload', methods=['POST'])
+def reload_request():
+    '''
+    Loads the csv file again and swaps the new dataset version in, the running jobs
+    finish on the version they started with
+    '''
+    log_request("\"POST /api/admin/reload\"")
+
+    if not webserver.tasks_runner.is_ready():
+        response = {
+            'status': 'error',
+            'reason': 'the dataset is not loaded'
+        }
+        log_response("\"POST /api/admin/reload\" - \"Responding with: %s\"", response)
+        return jsonify(response)
+
+    start_time = time.perf_counter()
+
+    try:
+        dataset_version = webserver.tasks_runner.reload_dataset()
+        response = {
+            'status': 'done',
+            'dataset_version': dataset_version,
+            'elapsed_s': round(time.perf_counter() - start_time, 3)
+        }
+    except (OSError, ValueError, KeyError) as e:
+        webserver.logger.exception("Exception occured while reloading the dataset: %s", e)
+        response = {
+            'status': 'error',
+            'reason': 'the dataset could not be reloaded, the current version is kept'
+        }
+
+    log_response("\"POST /api/admin/reload\" - \"Responding with: %s\"", response)
+    return jsonify(response)
+
+@webserver.route('/api/admin/append', methods=['POST'])
+def append_request():
+    '''
+    Appends a list of rows, holding the USED_COLUMNS fields, to the dataset
+    as a new dataset version. Only the new rows are aggregated.
+    '''
+    log_request("\"POST /api/admin/append\" - \"Received data: %s\"", request.json)
+
+    rows = request.json
+    if isinstance(rows, dict):
+        rows = rows.get('rows')
+
+    reason = get_append_rows_error(rows)
+    if not webserver.tasks_runner.is_ready():
+        reason = 'the dataset is not loaded'
+    if not webserver.tasks_runner.appends_enabled:
+        reason = 'appending rows is not supported by the process backend, use /api/admin/reload'
+
+    if reason is not None:
+        response = {
+            'status': 'error',
+            'reason': reason
+        }
+        log_response("\"POST /api/admin/append\" - \"Responding with: %s\"", response)
+        return jsonify(response)
+
+    dataset_version = webserver.tasks_runner.append_rows(pandas.DataFrame(rows,
+                                                                         columns=USED_COLUMNS))
+    response = {
+        'status': 'done',
+        'dataset_version': dataset_version,
+        'rows_appended': len(rows)
+    }
+    log_response("\"POST /api/admin/append\" - \"Responding with: %s\"", response)
+    return jsonify(response)
+
 @webserver.route('/api/graceful_shutdown', methods=['GET'])
 def graceful_shutdown():
     '''
     Processes "graceful_shutdown" API requests
     '''
     webserver.logger.info("\"GET /api/graceful_shutdown\"")
-    webserver.tasks_runner.shutdown_event.set()
+    webserver.tasks_runner.shutdown()
 
-    # the queue is not empty
-    if not webserver.tasks_runner.jobs_queue.empty():
+    # some workers are still running (they exit once they take their sentinel, after the jobs)
+    if not webserver.tasks_runner.is_drained():
         response = {
             "status": "running",
         }
@@ -275,9 +558,10 @@ def graceful_shutdown():
         webserver.logger.info("\"GET /graceful_shutdown\" - \"Responding with: %s\"", response)
         return jsonify(response)
 
-    webserver.logger.info("The server has been shut down successfully.")
+    webserver.logger.info("The server has been shut down successfully. Workers wake-up latency: %s",
+                          webserver.tasks_runner.wakeup_latency.get_stats())
 
-    # the queue is empty
+    # every worker has exited, the jobs queue has been drained
     response = {
         "status": "done",
     }
@@ -291,7 +575,7 @@ def index():
     '''
     Processes "/" and "/index" API requests
     '''
-    webserver.logger.info("\"GET /index\"")
+    log_request("\"GET /index\"")
     routes = get_defined_routes()
     msg = "Hello, World!\n Interact with the webserver using one of the defined routes:\n"
 
@@ -313,49 +597,178 @@ def get_defined_routes():
         routes.append(f"Endpoint: \"{rule}\" Methods: \"{methods}\"")
     return routes
 
-def append_job(data: dict, function_name: str) -> int:
+def register_job(data: dict, function_name: str) -> int:
     '''
-    Appends a job to the queue
+    Assigns a job id to a job and marks it as running
     '''
     # append api endpoint name as json parameter
     param = {"endpoint": function_name}
     data.update(param)
 
-    # increment the job counter
-    webserver.tasks_runner.job_counter += 1
-
-    # get current job id
-    job_id = webserver.tasks_runner.job_counter
+    # get the next job id, the job is registered as "running"
+    job_id = webserver.tasks_runner.job_registry.register()
 
     # append the job id as dictionary parameter
     data.update({"job_id": job_id})
 
-    with webserver.tasks_runner.jobs_lock:
-        # add current job in jobs dictionary and set it as "running"
-        webserver.tasks_runner.jobs[job_id] = JobStatus.RUNNING
+    # return the corresponding job_id of the job
+    return job_id
 
-    # append the job to the queue
-    webserver.tasks_runner.jobs_queue.put(data)
+def fail_registered_job(data: dict, function_name: str):
+    '''
+    Marks the job of a request that could not be scheduled as failed, so that it
+    does not stay running, and releases its admission
+    '''
+    if 'job_id' in data:
+        webserver.tasks_runner.fail_job(data)
+    else:
+        webserver.tasks_runner.admission.release(function_name)
+
+def append_job(data: dict, function_name: str) -> int:
+    '''
+    Appends a job to the queue
+    '''
+    job_id = register_job(data, function_name)
+
+    # append the job to the queue, unless its result is cached or already being computed
+    webserver.tasks_runner.add_job(data)
 
-    # return the corresponding job_id of the job
     return job_id
 
+def get_job_trace(job_id: int):
+    '''
+    Returns the trace of a job: its timestamps, the id of the worker that computed it
+    and the durations between the timestamps, in milliseconds (None if not recorded)
+    '''
+    trace = webserver.tasks_runner.job_registry.get_trace(job_id)
+    if trace is None:
+        return None
+
+    durations = {
+        'queue_wait_ms': ('enqueue_time', 'dequeue_time'),
+        'compute_ms': ('compute_start_time', 'compute_end_time'),
+        'persist_ms': ('compute_end_time', 'persist_time'),
+        'total_ms': ('enqueue_time', 'persist_time')
+    }
+    for name, (start, end) in durations.items():
+        if (trace[start] is not None) and (trace[end] is not None):
+            trace[name] = (trace[end] - trace[start]) * 1000
+        else:
+            trace[name] = None
+
+    return trace
+
+def get_loading_response():
+    '''
+    Returns the response to a job submitted before the dataset is ready, or None if the job
+    can be accepted: while loading, the jobs are queued unless TP_LOADING_POLICY is "reject",
+    once the load has failed, the jobs are rejected (with 503)
+    '''
+    if webserver.tasks_runner.is_ready():
+        return None
+
+    ingest = webserver.tasks_runner.ingest_progress.get_status()
+
+    if ingest['state'] == 'failed':
+        return {
+            'status': 'error',
+            'reason': 'the dataset could not be loaded'
+        }
+
+    if webserver.tasks_runner.loading_policy == LOADING_REJECT:
+        return {
+            'status': 'loading',
+            'rows_parsed': ingest['rows_parsed'],
+            'elapsed_s': ingest['elapsed_s']
+        }
+
+    return None
+
+def json_response(response: dict):
+    '''
+    Returns a JSON response like jsonify, with the already serialized results spliced in
+    '''
+    return webserver.response_class(dumps_response(response) + b"\n", mimetype='application/json')
+
+def get_overloaded_response(path: str, reason: str, retry_after: int):
+    '''
+    Returns the 429 response to a POST rejected by the admission control
+    '''
+    response = {
+        'status': 'overloaded',
+        'reason': reason,
+        'retry_after': retry_after
+    }
+    log_response("\"POST %s\" - \"Responding with: %s\"", path, response)
+    return jsonify(response), 429, {'Retry-After': str(retry_after)}
+
+def get_append_rows_error(rows):
+    '''
+    Returns the reason why a list of rows to append is invalid, or None if it is valid
+    '''
+    if (not isinstance(rows, list)) or (not rows):
+        return 'the rows must be a non-empty list'
+
+    for position, row in enumerate(rows):
+        if (not isinstance(row, dict)) or any(column not in row for column in USED_COLUMNS):
+            return f'row {position} must hold the fields {", ".join(USED_COLUMNS)}'
+
+        if any(not isinstance(row[column], str) for column in USED_COLUMNS
+               if column != 'Data_Value'):
+            return f'the text fields of row {position} must be strings'
+
+        value = row['Data_Value']
+        if (value is not None) and (isinstance(value, bool) or
+                                    not isinstance(value, (int, float))):
+            return f'the "Data_Value" of row {position} must be a number or null'
+
+    return None
+
+def get_batch_items_error(items):
+    '''
+    Returns the reason why a list of batch items is invalid, or None if it is valid
+    '''
+    if (not isinstance(items, list)) or (not items):
+        return 'the batch must be a non-empty list of items'
+
+    for position, item in enumerate(items):
+        if (not isinstance(item, dict)) or \
+           (item.get('endpoint') not in ThreadUtils.endpoint_func_map):
+            return f'item {position} does not have a valid endpoint'
+
+        if not "question" in item:
+            return f'item {position} does not contain the question field'
+
+        if item['endpoint'] in STATE_ENDPOINTS and (not "state" in item):
+            return f'item {position} does not contain the state field'
+
+        # the fields are hashed by the results cache, they are checked before any job is registered
+        if (not isinstance(item['question'], str)) or \
+           (not isinstance(item.get('state', ''), str)):
+            return f'item {position} has a question or state which is not a string'
+
+    return None
+
 def missing_question_message(function_name):
-    webserver.logger.info("\"POST /api/%s\" - \"The json does not contain the question field. Received json: %s\"", function_name, request.json)
+    webserver.logger.info("\"POST /api/%s\" - \"The json does not contain the question field. "
+                          "Received json: %s\"", function_name,
+                          webserver.request_log.summary(request.json))
     response = {
         'status': 'error',
         'reason': 'the json does not contain the question field'
     }
-    webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+    log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
 
     return jsonify(response)
 
 def missing_question_or_state_message(function_name):
-    webserver.logger.info("\"POST /api/%s\" - \"The json does not contain all the required fields. Received json: %s\"", function_name, request.json)
+    webserver.logger.info("\"POST /api/%s\" - \"The json does not contain all the required fields. "
+                          "Received json: %s\"", function_name,
+                          webserver.request_log.summary(request.json))
     response = {
         'status': 'error',
         'reason': 'the json does not contain all the required fields'
     }
-    webserver.logger.info("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
+    log_response("\"POST /api/%s\" - \"Responding with: %s\"", function_name, response)
 
     return jsonify(response)
@@ -0,0 +1,44 @@
+import json
+
+# orjson (in the requirements) is the faster encoder, json is used where it is not installed.
+# orjson writes the non-ASCII characters as UTF-8 instead of \u escapes and may spell some
+# floats differently (e.g. 1e-5 for 1e-05), the responses hold the same JSON once parsed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(value) -> bytes:
+    '''
+    Serializes a value as JSON (UTF-8), in the form of Flask's jsonify: sorted keys and
+    compact separators, so that a serialized result can be sent as it is
+    '''
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS |
+                            orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+class RawJson:
+    '''
+    A value of a response which is already serialized (a stored result), spliced
+    as it is into the response instead of being parsed and serialized again
+    '''
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __repr__(self):
+        # the responses are logged with their data
+        return self.data.decode("utf-8")
+
+def dumps_response(response: dict) -> bytes:
+    '''
+    Serializes a response, e.g. {"status": "done", "data": RawJson(...)}, with its
+    keys sorted as jsonify does and its RawJson values spliced in
+    '''
+    fields = [dumps(key) + b":" + (value.data if isinstance(value, RawJson) else dumps(value))
+              for key, value in sorted(response.items())]
+
+    return b"{" + b",".join(fields) + b"}"
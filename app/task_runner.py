@@ -1,122 +1,1049 @@
 import queue
-from queue import Queue
 from threading import Thread, Event, Lock
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import os
 import sys
+import time
 import multiprocessing
 import json
-from app.data_ingestor import DataIngestor
-import app.thread_utils
-from app.thread_utils import ThreadUtils
-from .utils import JobStatus
+from app.data_ingestor import DataIngestor, IngestProgress
+from app.thread_utils import ThreadUtils, QuestionAggregates
+from app.result_store import create_result_store
+from app.serialization import dumps
+from app.job_registry import JobRegistry, JOBS_MAX_RETAINED, JOBS_MAX_AGE
+from app.metrics import JobMetrics
+from app.request_logging import create_file_log
+from app.admission import AdmissionControl, parse_in_flight_limits, QUEUE_MAX_DEPTH
+from app.job_scheduler import create_job_scheduler, get_cost_lane, LANES_SCHEDULER, \
+                              FIFO_SCHEDULER, FIFO_LANE, LANE_WEIGHTS, LANE_COST_LIMITS
+from .utils import JobStatus, CacheLookup
 
-class ThreadPool:
+# default limits of the results cache, overridable through the
+# TP_CACHE_MAX_ENTRIES and TP_CACHE_MAX_BYTES env vars
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+DEFAULT_CSV_PATH = "./nutrition_activity_obesity_usa_subset.csv"
+
+# seconds an idle worker blocks on the jobs queue before re-checking the shutdown event
+QUEUE_GET_TIMEOUT = 1.0
+
+# default queue wait over which a worker is added to the pool, overridable through the
+# TP_POOL_TARGET_WAIT env var, and time after which an idle added worker is retired,
+# overridable through TP_POOL_IDLE_TIMEOUT, both in seconds
+POOL_TARGET_WAIT = 0.1
+POOL_IDLE_TIMEOUT = 30.0
+
+# put in the jobs queue once per worker by "shutdown", after the pending jobs
+SHUTDOWN_SENTINEL = None
+
+# relative cost of a job, per aggregates cube group of its question
+ENDPOINT_COST_WEIGHTS = {
+    "state_mean": 1,
+    "global_mean": 1,
+    "state_diff_from_mean": 1,
+    "state_mean_by_category": 1,
+    "states_mean": 2,
+    "best5": 2,
+    "worst5": 2,
+    "diff_from_mean": 2,
+    "mean_by_category": 4
+}
+
+# jobs estimated to cost less than this are computed on the request thread in "sync" mode,
+# overridable through the TP_SYNC_COST_THRESHOLD env var
+SYNC_COST_THRESHOLD = 5000
+
+# what happens to the jobs received while the dataset is loaded in the background
+# (TP_BACKGROUND_INGEST=1), selected through the TP_LOADING_POLICY env var
+LOADING_QUEUE = "queue"
+LOADING_REJECT = "reject"
+
+# endpoint of the queued jobs holding a batch of jobs
+BATCH_ENDPOINT = "batch"
+
+# execution backends, selected through the TP_BACKEND env var
+THREAD_BACKEND = "thread"
+PROCESS_BACKEND = "process"
+
+# dataset of the worker processes of the "process" backend. It is set in the parent
+# right before the workers are forked, so they share its memory pages copy-on-write
+# instead of receiving a pickled copy of it.
+_forked_data_ingestor = None
+_fork_lock = Lock() # sets "_forked_data_ingestor" and forks the worker processes of one dataset
+
+def get_job_key(job: dict) -> tuple:
+    '''
+    Returns the normalized parameters of a job, identical jobs have the same key
+    '''
+    return (job['endpoint'], job.get('question'), job.get('state'))
+
+def estimate_job_cost(job: dict, data_ingestor: DataIngestor) -> int:
+    '''
+    Returns the estimated cost of a job, from its endpoint and the
+    number of aggregates cube groups of its question
+    '''
+    return ENDPOINT_COST_WEIGHTS.get(job['endpoint'], max(ENDPOINT_COST_WEIGHTS.values())) * \
+           data_ingestor.get_question_groups_count(job.get('question'))
+
+def parse_ints(value, default) -> tuple:
+    '''
+    Returns the comma-separated integers of an env var, e.g. "8,4,1", or the default
+    '''
+    if not value:
+        return default
+
+    return tuple(int(item) for item in value.split(","))
+
+def get_attached_trace(job: dict):
+    '''
+    Returns the trace of the jobs attached to a computed job: they may have been received
+    after the computation started, they only record its worker and its end
+    '''
+    if 'trace' not in job:
+        return None
+
+    return {key: job['trace'][key] for key in ('worker_id', 'compute_end_time')
+            if key in job['trace']}
+
+def compute_job_result(job: dict, data_ingestor: DataIngestor, entries=None) -> dict:
+    '''
+    Runs the analysis function of a job on the given dataset and returns its result,
+    "entries" may be the QuestionAggregates of the job question
+    '''
+    function = ThreadUtils.endpoint_func_map[job['endpoint']]
+
+    if entries is None:
+        entries = data_ingestor.get_aggregates()
+
+    result = {}
+    if (job['endpoint'] == "best5") or (job['endpoint'] == "worst5"):
+        result = function(job['question'],
+                          data_ingestor.get_questions_best_is_min(),
+                          data_ingestor.get_questions_best_is_max(),
+                          entries)
+
+    elif ('question' in job) and ('state' in job):
+        result = function(job['question'], job['state'], entries)
+
+    elif 'question' in job:
+        result = function(job['question'], entries)
+
+    return result
+
+def compute_batch_results(jobs: list, data_ingestor: DataIngestor) -> list:
+    '''
+    Runs the jobs of a batch. The question entries are filtered once per question
+    and the jobs of the same question share the intermediate aggregates (states
+    means, global mean). Returns the results in the jobs order, None for the failed jobs.
+    '''
+    aggregates = data_ingestor.get_aggregates()
+    question_aggregates = {}
+
+    results = []
+    for job in jobs:
+        if job['question'] not in question_aggregates:
+            question_aggregates[job['question']] = QuestionAggregates(job['question'], aggregates)
+
+        try:
+            results.append(compute_job_result(job, data_ingestor,
+                                              question_aggregates[job['question']]))
+        except (KeyError, TypeError, ZeroDivisionError) as e:
+            print(f"There was an error executing the job with id = {job.get('job_id')}: {e}")
+            results.append(None)
+
+    return results
+
+def compute_job_result_in_process(job: dict) -> dict:
+    '''
+    Entry point of the "process" backend workers, runs a job on the forked dataset
+    '''
+    return compute_job_result(job, _forked_data_ingestor)
+
+def compute_batch_results_in_process(jobs: list) -> list:
+    '''
+    Entry point of the "process" backend workers, runs a batch on the forked dataset
+    '''
+    return compute_batch_results(jobs, _forked_data_ingestor)
+
+def get_job_params(job: dict) -> dict:
+    '''
+    Returns the job fields needed to compute its result
+    '''
+    return {key: job[key] for key in ('endpoint', 'question', 'state', 'job_id') if key in job}
+
+def create_process_executor(data_ingestor: DataIngestor, num_workers: int):
+    '''
+    Forks "num_workers" processes sharing the dataset copy-on-write
+    '''
+    # the server is threaded by the time of a reload (request threads, log writer), a forked
+    # child only gets a copy of the thread that forked it, along with the locks held by the
+    # others. Forking is safe here since the children never touch these locks: they only run
+    # compute_*_in_process on the forked aggregates cube, with pandas and numpy, and exchange
+    # the jobs through the executor pipes. The interpreter resets its own locks (GIL, imports,
+    # threading, logging handlers) and those of malloc in the child. "spawn" or "forkserver"
+    # would import the app package in every worker, which starts a whole server.
+    global _forked_data_ingestor # pylint: disable=global-statement
+    with _fork_lock:
+        _forked_data_ingestor = data_ingestor
+
+        executor = ProcessPoolExecutor(max_workers=num_workers,
+                                       mp_context=multiprocessing.get_context("fork"))
+
+        # with "fork", the executor starts all its workers at the first submit,
+        # force it now, while the dataset global is the right one
+        executor.submit(os.getpid).result()
+
+    return executor
+
+class ResultCache:
+    '''
+    Bounded LRU cache of the job results, keyed by the normalized job parameters.
+    It also keeps track of the computations in flight, so that identical jobs
+    are computed only once.
+    '''
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = Lock() # protects all the fields below
+        self.entries = OrderedDict() # key -> serialized result
+        self.size_bytes = 0
+        self.in_flight = {} # key -> ids of the jobs waiting for the key result
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, job: dict, version: int = 0):
+        '''
+        Looks up the result of a job on a dataset version. Returns a (CacheLookup, key, result)
+        tuple, on ATTACHED the job will receive the result of the identical job in flight,
+        on MISS the caller must compute the job and then call "complete" with the key
+        '''
+        with self.lock:
+            # the results of older dataset versions are never looked up again, they age out
+            key = (version,) + get_job_key(job)
+
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return CacheLookup.HIT, key, self.entries[key]
+
+            self.misses += 1
+            if key in self.in_flight:
+                self.in_flight[key].append(job['job_id'])
+                return CacheLookup.ATTACHED, key, None
+
+            self.in_flight[key] = []
+            return CacheLookup.MISS, key, None
+
+    def complete(self, key: tuple, serialized: bytes, version: int = None) -> list:
+        '''
+        Stores the serialized result of a computed key and returns the ids
+        of the jobs that were attached to its computation
+        '''
+        with self.lock:
+            attached_jobs = self.in_flight.pop(key, [])
+
+            # do not store results computed on another dataset version than the key one
+            if (version in (None, key[0])) and (len(serialized) <= self.max_bytes):
+                if key in self.entries:
+                    self.size_bytes -= len(self.entries.pop(key))
+
+                self.entries[key] = serialized
+                self.size_bytes += len(serialized)
+
+                # evict the least recently used results
+                while (len(self.entries) > self.max_entries) or \
+                      (self.size_bytes > self.max_bytes):
+                    self.size_bytes -= len(self.entries.popitem(last=False)[1])
+
+            return attached_jobs
+
+    def abandon(self, key: tuple) -> list:
+        '''
+        Forgets a failed computation and returns the ids of the jobs attached to it
+        '''
+        with self.lock:
+            return self.in_flight.pop(key, [])
+
+    def get_stats(self) -> dict:
+        '''
+        Returns the cache counters
+        '''
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'size_bytes': self.size_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+class LatencyStats:
+    '''
+    Thread-safe count, mean and maximum of a latency, in seconds
+    '''
     def __init__(self):
-        self.jobs_queue = Queue()
+        self.lock = Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float):
+        '''
+        Records a latency sample
+        '''
+        with self.lock:
+            self.count += 1
+            self.total += latency
+            self.max = max(self.max, latency)
+
+    def get_stats(self) -> dict:
+        '''
+        Returns the number of samples and the mean/max latency in milliseconds
+        '''
+        with self.lock:
+            return {
+                'count': self.count,
+                'mean_ms': (self.total / self.count) * 1000 if self.count else 0.0,
+                'max_ms': self.max * 1000
+            }
+
+class ThreadPool:
+    def __init__(self, csv_path=DEFAULT_CSV_PATH):
+        # TP_SCHEDULER=lanes (default) queues the jobs in cost lanes served by weighted
+        # round-robin, TP_SCHEDULER=fifo in a single lane, in the order they are received
+        self.scheduler = os.environ.get('TP_SCHEDULER', LANES_SCHEDULER)
+        self.lane_cost_limits = parse_ints(os.environ.get('TP_SCHEDULER_LANE_COSTS'),
+                                           LANE_COST_LIMITS)
+        self.jobs_queue = create_job_scheduler(
+            self.scheduler, parse_ints(os.environ.get('TP_SCHEDULER_WEIGHTS'), LANE_WEIGHTS))
         self.num_threads = 0
         self.threads = []
+        self.pool_lock = Lock() # protects "threads" and the fields below, resizes the pool
+        self.next_thread_id = 0
+        self.last_grow_time = 0.0
+        self.resizes = {'grow': 0, 'shrink': 0}
+        self.started = False # the workers are only added once "start" has been called
         self.shutdown_event = Event()
-        self.job_counter = 0
-        self.data_ingestor = DataIngestor("./nutrition_activity_obesity_usa_subset.csv")
-        self.jobs = {}
-        self.jobs_lock = Lock() # protects "jobs" dictionary
-        self.done_jobs_counter = 0
-        self.done_jobs_counter_lock = Lock() # protects "done_jobs_counter"
+        self.batch_counter = 0
+        self.batch_counter_lock = Lock() # protects "batch_counter"
+        self.csv_path = csv_path
+        self.data_ingestor = None
+        self.dataset_version = 1 # version of "data_ingestor", the one looked up in the cache
+        self.dataset_lock = Lock() # swaps "data_ingestor" and "process_executor" together
+        self.reload_lock = Lock() # runs one reload at a time
+        self.ingest_progress = IngestProgress()
+        self.ready_event = Event() # set once the dataset load has ended
+        # with TP_BACKGROUND_INGEST=1 the dataset is loaded by a thread started by "start"
+        self.background_ingest = os.environ.get('TP_BACKGROUND_INGEST', '0') == '1'
+        self.loading_policy = os.environ.get('TP_LOADING_POLICY', LOADING_QUEUE)
+        # with TP_CSV_TAIL_INTERVAL > 0, the rows written at the end of the csv
+        # file are appended to the dataset, checked every that many seconds
+        self.csv_tail_interval = float(os.environ.get('TP_CSV_TAIL_INTERVAL', 0))
+        # assigns the job ids and keeps the job statuses, within the retention limits
+        self.job_registry = JobRegistry(
+            int(os.environ.get('TP_JOBS_MAX_RETAINED', JOBS_MAX_RETAINED)),
+            float(os.environ.get('TP_JOBS_MAX_AGE', JOBS_MAX_AGE)))
+        self.result_cache = ResultCache(
+            int(os.environ.get('TP_CACHE_MAX_ENTRIES', CACHE_MAX_ENTRIES)),
+            int(os.environ.get('TP_CACHE_MAX_BYTES', CACHE_MAX_BYTES)))
+        # time between a job being queued and an idle worker waking up for it
+        self.wakeup_latency = LatencyStats()
+        # per-endpoint job counters and latency histograms, exposed by "/api/metrics"
+        self.metrics = JobMetrics()
+        # bounds the queued jobs and the jobs of each endpoint in flight
+        self.admission = AdmissionControl(
+            int(os.environ.get('TP_QUEUE_MAX_DEPTH', QUEUE_MAX_DEPTH)),
+            *parse_in_flight_limits(os.environ.get('TP_MAX_IN_FLIGHT')))
+        # with TP_TRACE_FILE set, the trace of each finished job is appended to that file
+        self.trace_log = None
+        if os.environ.get('TP_TRACE_FILE'):
+            self.trace_log = create_file_log("webserver.traces", os.environ['TP_TRACE_FILE'])
+        self.shutdown_lock = Lock() # makes "shutdown" put the sentinels only once
+        self.backend = os.environ.get('TP_BACKEND', THREAD_BACKEND)
+        self.process_executor = None # runs the jobs of the "process" backend
+        # the worker processes hold a forked copy of the dataset, they would have to be forked
+        # again on every append: only whole reloads are supported with the "process" backend
+        self.appends_enabled = self.backend != PROCESS_BACKEND
+        self.result_store = create_result_store()
+        self.sync_cost_threshold = int(os.environ.get('TP_SYNC_COST_THRESHOLD',
+                                                      SYNC_COST_THRESHOLD))
+
+        if not self.background_ingest:
+            self.data_ingestor = self.create_data_ingestor(None)
+            self.ingest_progress.add_rows(len(self.data_ingestor.get_csv_file()))
+            self.ingest_progress.finish()
+            self.ready_event.set()
 
         # Note: the TP_NUM_OF_THREADS env var will be defined by the checker
         if os.environ.get('TP_NUM_OF_THREADS'):
             # the variable is defined
-            self.num_threads = os.environ.get('TP_NUM_OF_THREADS')
+            self.num_threads = int(os.environ['TP_NUM_OF_THREADS'])
         else:
             # set the "num_threads" field to hardware threads number
             self.num_threads = multiprocessing.cpu_count()
 
+        # the pool starts with "min_threads" workers and grows up to "max_threads" while the
+        # jobs wait in the queue for longer than "pool_target_wait" seconds, the workers added
+        # are retired after "pool_idle_timeout" seconds without a job. By default the pool
+        # has a fixed size of "num_threads" workers.
+        self.min_threads = int(os.environ.get('TP_MIN_THREADS', self.num_threads))
+        self.max_threads = max(self.min_threads,
+                               int(os.environ.get('TP_MAX_THREADS', self.num_threads)))
+        self.pool_target_wait = float(os.environ.get('TP_POOL_TARGET_WAIT', POOL_TARGET_WAIT))
+        self.pool_idle_timeout = float(os.environ.get('TP_POOL_IDLE_TIMEOUT', POOL_IDLE_TIMEOUT))
+
+    def create_data_ingestor(self, progress, version=1):
+        '''
+        Loads the dataset: TP_COMPACT_INGEST=0 loads every csv column with the default
+        types, TP_CSV_SNAPSHOT=0 always parses the csv file instead of using its snapshot
+        '''
+        return DataIngestor(self.csv_path,
+                            os.environ.get('TP_COMPACT_INGEST', '1') != '0',
+                            os.environ.get('TP_CSV_SNAPSHOT', '1') != '0',
+                            progress, version)
+
+    def get_dataset(self):
+        '''
+        Returns the current (data_ingestor, process_executor) pair, a job runs
+        entirely on the pair it started with, even if a reload swaps them meanwhile
+        '''
+        with self.dataset_lock:
+            return self.data_ingestor, self.process_executor
+
+    def load_dataset(self):
+        '''
+        Background ingest thread, loads the dataset and then lets the workers run the jobs
+        '''
+        try:
+            data_ingestor = self.create_data_ingestor(self.ingest_progress)
+
+            if self.backend == PROCESS_BACKEND:
+                self.process_executor = create_process_executor(data_ingestor,
+                                                                self.max_threads)
+
+            self.data_ingestor = data_ingestor
+            self.ingest_progress.finish()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"There was an error loading the dataset from {self.csv_path}: {e}")
+            self.ingest_progress.finish(e)
+
+        self.ready_event.set()
+
+    def is_ready(self) -> bool:
+        '''
+        Checks that the dataset has been loaded successfully
+        '''
+        return self.ready_event.is_set() and (self.ingest_progress.error is None)
+
     def start(self):
-        # create the TaskRunners threads
-        for i in range(self.num_threads):
-            current_thread = TaskRunner(i, self)
-            current_thread.start()
-            self.threads.append(current_thread)
+        if (self.csv_tail_interval > 0) and self.appends_enabled:
+            Thread(target=self.tail_csv_file, daemon=True).start()
+        elif self.csv_tail_interval > 0:
+            print("TP_CSV_TAIL_INTERVAL is ignored with the process backend")
+
+        if self.background_ingest:
+            # the workers wait for the dataset, the jobs received meanwhile stay queued
+            Thread(target=self.load_dataset, daemon=True).start()
+        elif self.backend == PROCESS_BACKEND:
+            # fork the worker processes before starting any thread
+            self.process_executor = create_process_executor(self.data_ingestor,
+                                                            self.max_threads)
+
+        # create the TaskRunners threads, with the "process" backend
+        # each of them hands its jobs to the worker processes
+        with self.pool_lock:
+            self.started = True
+            for _ in range(self.min_threads):
+                self.add_worker()
+            self.spawn_if_unattended()
+
+    def add_worker(self):
+        '''
+        Starts a new TaskRunner thread, the caller holds "pool_lock"
+        '''
+        current_thread = TaskRunner(self.next_thread_id, self)
+        self.next_thread_id += 1
+        current_thread.start()
+        self.threads.append(current_thread)
+
+    def grow_if_behind(self, queue_wait: float):
+        '''
+        Adds a worker if a job has waited in the queue for longer than the target wait,
+        at most one per target wait period, up to "max_threads" workers
+        '''
+        if (queue_wait <= self.pool_target_wait) or (len(self.threads) >= self.max_threads):
+            return
+
+        with self.pool_lock:
+            now = time.perf_counter()
+            if self.shutdown_event.is_set() or (not self.is_ready()) or \
+               (len(self.threads) >= self.max_threads) or \
+               (now - self.last_grow_time < self.pool_target_wait):
+                return
+
+            self.last_grow_time = now
+            self.add_worker()
+            self.resizes['grow'] += 1
+
+    def spawn_if_unattended(self):
+        '''
+        Adds a worker if jobs are queued and no worker is alive to take them, whatever
+        their queue wait, as the pool may have shrunk to nothing with TP_MIN_THREADS=0.
+        The caller holds "pool_lock".
+        '''
+        if (not self.started) or self.shutdown_event.is_set() or \
+           (self.jobs_queue.get_num_jobs() == 0) or \
+           any(current_thread.is_alive() for current_thread in self.threads):
+            return
+
+        self.add_worker()
+        self.resizes['grow'] += 1
+
+    def retire_worker(self, runner) -> bool:
+        '''
+        Removes an idle worker from the pool, unless it is at its minimum size, shutting
+        down (the shutdown sentinels are counted per worker) or the last worker while jobs
+        are queued. Returns whether it was removed.
+        '''
+        with self.pool_lock:
+            if self.shutdown_event.is_set() or (len(self.threads) <= self.min_threads) or \
+               ((len(self.threads) == 1) and (self.jobs_queue.get_num_jobs() > 0)):
+                return False
+
+            self.threads.remove(runner)
+            self.resizes['shrink'] += 1
+            return True
+
+    def get_pool_stats(self) -> dict:
+        '''
+        Returns the workers of the pool, its size limits and the number of resizes
+        '''
+        with self.pool_lock:
+            return {
+                'workers': list(self.threads),
+                'min_threads': self.min_threads,
+                'max_threads': self.max_threads,
+                'resizes': dict(self.resizes)
+            }
+
+    def is_drained(self) -> bool:
+        '''
+        Checks that every worker has exited, after taking its shutdown sentinel
+        '''
+        with self.pool_lock:
+            return not any(current_thread.is_alive() for current_thread in self.threads)
 
     def join(self):
-        # wait for the threads to receive the "graceful_shutdown" command
-        for current_thread in self.threads:
+        # wait for the threads to receive the "graceful_shutdown" command,
+        # no worker is added nor retired once the server is shutting down
+        for current_thread in list(self.threads):
             current_thread.join()
 
+        if self.process_executor is not None:
+            self.process_executor.shutdown()
+
+    def shutdown(self):
+        '''
+        Stops accepting jobs, the workers exit after draining the jobs queue
+        '''
+        with self.shutdown_lock:
+            if self.shutdown_event.is_set():
+                return
+
+            self.shutdown_event.set()
+
+            # the sentinels are queued after the pending jobs, one for each worker
+            with self.pool_lock:
+                for _ in self.threads:
+                    self.jobs_queue.put(SHUTDOWN_SENTINEL)
+
+    def admit_jobs(self, endpoints: list):
+        '''
+        Admits the jobs of a request, returning None, or a (reason, retry_after)
+        pair if they would go over the queue depth or in-flight limits
+        '''
+        rejection = self.admission.admit(endpoints, self.jobs_queue.get_num_jobs())
+        if rejection is not None:
+            for endpoint in endpoints:
+                self.metrics.add_rejected(endpoint)
+
+        return rejection
+
+    def add_job(self, job: dict):
+        '''
+        Schedules a job: it is answered from the results cache, attached to
+        an identical job in flight or appended to the jobs queue
+        '''
+        self.metrics.add_submitted(job['endpoint'])
+        lookup, key, serialized = self.result_cache.lookup(job, self.dataset_version)
+
+        if lookup == CacheLookup.HIT:
+            self.finish_job(job['job_id'], job['endpoint'], serialized, key[0])
+        elif lookup == CacheLookup.MISS:
+            # the worker hands the result to the jobs attached to this key
+            job['cache_key'] = key
+            self.queue_job(job)
+
+    def add_job_sync(self, job: dict):
+        '''
+        Completes a job on the calling thread if its result is cached or if it is cheap
+        to compute, returning the serialized result. Otherwise, the job is scheduled
+        as usual and None is returned.
+        '''
+        self.metrics.add_submitted(job['endpoint'])
+        lookup, key, serialized = self.result_cache.lookup(job, self.dataset_version)
+
+        if lookup == CacheLookup.HIT:
+            self.finish_job(job['job_id'], job['endpoint'], serialized, key[0])
+            return serialized
+
+        if lookup == CacheLookup.ATTACHED:
+            return None
+
+        job['cache_key'] = key
+        data_ingestor, _ = self.get_dataset()
+        if (not self.is_ready()) or \
+           (estimate_job_cost(job, data_ingestor) > self.sync_cost_threshold):
+            self.queue_job(job)
+            return None
+
+        start_time = time.perf_counter()
+        job['trace'] = {'compute_start_time': time.time()}
+        try:
+            result = compute_job_result(job, data_ingestor)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            print(f"There was an error executing the job with id = {job['job_id']}: {e}")
+            job['trace']['compute_end_time'] = time.time()
+            self.fail_job(job)
+            return None
+        finally:
+            self.metrics.add_execution(job['endpoint'], time.perf_counter() - start_time)
+
+        job['trace']['compute_end_time'] = time.time()
+
+        return self.store_job_result(job, result, data_ingestor.get_version())
+
+    def add_batch(self, jobs: list, priority=None):
+        '''
+        Schedules a batch of jobs: the jobs that are neither cached nor attached
+        to an identical job in flight are queued together, as a single "batch" job
+        '''
+        batch_jobs = []
+        for job in jobs:
+            self.metrics.add_submitted(job['endpoint'])
+            lookup, key, serialized = self.result_cache.lookup(job, self.dataset_version)
+
+            if lookup == CacheLookup.HIT:
+                self.finish_job(job['job_id'], job['endpoint'], serialized, key[0])
+            elif lookup == CacheLookup.MISS:
+                job['cache_key'] = key
+                batch_jobs.append(job)
+
+        if batch_jobs:
+            self.queue_job({
+                'endpoint': BATCH_ENDPOINT,
+                'jobs': batch_jobs,
+                'priority': priority
+            })
+
+    def get_job_lane(self, job: dict) -> str:
+        '''
+        Returns the lane of a job (or batch) from its estimated cost and priority hint
+        '''
+        if self.scheduler == FIFO_SCHEDULER:
+            return FIFO_LANE
+
+        # the costs are unknown while the dataset loads, the jobs queued meanwhile share a lane
+        data_ingestor, _ = self.get_dataset()
+        cost = 0
+        if data_ingestor is not None:
+            cost = sum(estimate_job_cost(queued_job, data_ingestor) for queued_job in
+                       (job['jobs'] if job['endpoint'] == BATCH_ENDPOINT else [job]))
+
+        return get_cost_lane(cost, self.lane_cost_limits, job.get('priority'))
+
+    def queue_job(self, job: dict):
+        '''
+        Appends a job (or batch) to the lane of the jobs queue matching its cost
+        '''
+        job['lane'] = self.get_job_lane(job)
+        job['enqueue_time'] = time.perf_counter()
+        self.jobs_queue.put(job, job['lane'])
+
+        # an empty pool grows back at once, a retiring worker checks the queue under the lock
+        if not any(current_thread.is_alive() for current_thread in list(self.threads)):
+            with self.pool_lock:
+                self.spawn_if_unattended()
+
+        # the workers may all be busy with long jobs, the queue wait is also checked here
+        if len(self.threads) < self.max_threads:
+            self.grow_if_behind(self.jobs_queue.get_head_wait())
+
+    def set_data_ingestor(self, data_ingestor: DataIngestor):
+        '''
+        Swaps in a new dataset version. The running jobs finish on the old one, the
+        cached results of the old version are no longer served and age out of the cache.
+        '''
+        process_executor = None
+        if self.process_executor is not None:
+            # the worker processes hold the old dataset, fork new ones before the swap
+            # (only on reloads, the appends are disabled with the "process" backend)
+            process_executor = create_process_executor(data_ingestor, self.max_threads)
+
+        with self.dataset_lock:
+            old_executor = self.process_executor
+            self.data_ingestor = data_ingestor
+            self.process_executor = process_executor
+            self.dataset_version = data_ingestor.get_version()
+
+        if old_executor is not None:
+            # the jobs already submitted to the old worker processes still complete
+            old_executor.shutdown(wait=False)
+
+    def replace_process_executor(self, process_executor):
+        '''
+        Forks new worker processes for the current dataset in place of broken ones (e.g. one
+        of them has been killed), unless a reload or another worker has replaced them already
+        '''
+        with self.dataset_lock:
+            if self.process_executor is process_executor:
+                print("The worker processes are broken, forking new ones")
+                self.process_executor = create_process_executor(self.data_ingestor,
+                                                                self.max_threads)
+
+        process_executor.shutdown(wait=False)
+
+    def reload_dataset(self) -> int:
+        '''
+        Loads the csv file again, next to the current dataset, then swaps it in and returns
+        the new dataset version. On a load error the current dataset is kept.
+        '''
+        with self.reload_lock:
+            data_ingestor = self.create_data_ingestor(None, self.dataset_version + 1)
+            self.set_data_ingestor(data_ingestor)
+
+            return data_ingestor.get_version()
+
+    def append_rows(self, rows) -> int:
+        '''
+        Appends rows to the dataset as a new dataset version, returns the new version
+        '''
+        with self.reload_lock:
+            data_ingestor = self.data_ingestor.append_rows(rows, self.dataset_version + 1)
+            self.set_data_ingestor(data_ingestor)
+
+            return data_ingestor.get_version()
+
+    def append_csv_tail(self):
+        '''
+        Appends the rows written at the end of the csv file since it was last read,
+        the whole file is reloaded if it has been truncated or replaced by a smaller one
+        '''
+        with self.reload_lock:
+            rows, csv_offset = self.data_ingestor.read_csv_tail()
+
+            if csv_offset is None:
+                data_ingestor = self.create_data_ingestor(None, self.dataset_version + 1)
+            elif rows is not None:
+                data_ingestor = self.data_ingestor.append_rows(rows, self.dataset_version + 1,
+                                                               csv_offset)
+            else:
+                return
+
+            self.set_data_ingestor(data_ingestor)
+
+    def tail_csv_file(self):
+        '''
+        Background thread, appends the new rows of the csv file every "csv_tail_interval"
+        seconds, until the server shuts down
+        '''
+        self.ready_event.wait()
+
+        while self.is_ready() and not self.shutdown_event.wait(self.csv_tail_interval):
+            try:
+                self.append_csv_tail()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"There was an error appending the new rows of {self.csv_path}: {e}")
+
+    def remove_results(self, job_ids: list):
+        '''
+        Drops the stored results of the jobs evicted from the jobs registry
+        '''
+        for job_id in job_ids:
+            self.result_store.remove(job_id)
+
+    def evict_expired_jobs(self):
+        '''
+        Evicts the finished jobs older than the retention age, along with their results
+        '''
+        self.remove_results(self.job_registry.evict_expired())
+
+    def finish_job(self, job_id, endpoint, serialized, version, trace=None):
+        '''
+        Stores the serialized result of a job, computed on the given
+        dataset version, and marks it as done
+        '''
+        self.result_store.put(job_id, serialized)
+        self.remove_results(self.job_registry.finish(job_id, JobStatus.DONE, version, trace))
+        self.metrics.add_completed(endpoint)
+        self.admission.release(endpoint)
+        self.write_trace(job_id, endpoint, "done")
+
+    def fail_job(self, job):
+        '''
+        Marks a job that could not be computed, and the identical jobs attached to it, as failed
+        '''
+        job_ids = [job['job_id']]
+        if 'cache_key' in job:
+            job_ids += self.result_cache.abandon(job['cache_key'])
+
+        for job_id in job_ids:
+            trace = job.get('trace') if job_id == job['job_id'] else get_attached_trace(job)
+            self.remove_results(self.job_registry.finish(job_id, JobStatus.FAILED,
+                                                         self.dataset_version, trace))
+            self.write_trace(job_id, job['endpoint'], "failed")
+
+        self.metrics.add_failed(job['endpoint'], len(job_ids))
+        self.admission.release(job['endpoint'], len(job_ids))
+
+    def fail_queued_job(self, job):
+        '''
+        Marks a queued job, or the jobs of a queued batch, as failed without computing it
+        '''
+        for failed_job in job['jobs'] if job['endpoint'] == BATCH_ENDPOINT else [job]:
+            self.fail_job(failed_job)
+
+    def write_trace(self, job_id, endpoint, status):
+        '''
+        Appends the trace of a finished job to the TP_TRACE_FILE file, as a JSON line
+        '''
+        if self.trace_log is None:
+            return
+
+        trace = self.job_registry.get_trace(job_id)
+        if trace is not None:
+            self.trace_log.logger.info("%s", json.dumps({'job_id': job_id, 'endpoint': endpoint,
+                                                         'status': status, **trace}))
+
+    def store_job_result(self, job, result, version) -> bytes:
+        '''
+        Stores the result of a job computed on the given dataset version and hands
+        it to the identical jobs attached to it, returns the serialized result
+        '''
+        # the result is serialized once, the cache and the result store keep it as is
+        serialized = dumps(result)
+        self.finish_job(job['job_id'], job['endpoint'], serialized, version, job.get('trace'))
+
+        trace = get_attached_trace(job)
+        for attached_job_id in self.result_cache.complete(job['cache_key'], serialized, version):
+            self.finish_job(attached_job_id, job['endpoint'], serialized, version, trace)
+
+        return serialized
+
 class TaskRunner(Thread):
     def __init__(self, thread_id, thread_pool):
         # init necessary data structures
         Thread.__init__(self)
         self.thread_id = thread_id
         self.thread_pool = thread_pool
+        # time spent computing jobs, "busy_since" is set while a job is being computed
+        self.start_time = time.perf_counter()
+        self.busy_time = 0.0
+        self.busy_since = None
 
-    def write_job_output_file(self, res, job_id):
-        # store the result in the "./results" directory
-        file_name = "./results/" + "out-" + str(job_id) + ".json"
-        with open(file_name, "w", encoding="utf-8") as output_file:
-            json.dump(res, output_file)
-
-    def mark_job_as_done(self, job_id):
-        with self.thread_pool.jobs_lock:
-            self.thread_pool.jobs[job_id] = JobStatus.DONE
-
-    def get_job_output(self, function, job) -> dict:
-        job_id = job['job_id']
+    def get_busy_time(self) -> float:
+        '''
+        Returns the time this worker has spent computing jobs, in seconds
+        '''
+        busy_since = self.busy_since
+        if busy_since is None:
+            return self.busy_time
 
-        result = {}
-        if (job['endpoint'] == "best5") or (job['endpoint'] == "worst5"):
-            result = function(job['question'],
-                              self.thread_pool.data_ingestor.get_questions_best_is_min(),
-                              self.thread_pool.data_ingestor.get_questions_best_is_max(),
-                              self.thread_pool.data_ingestor.get_csv_file())
+        return self.busy_time + (time.perf_counter() - busy_since)
 
-        elif ('question' in job) and ('state' in job):
-            result = function(job['question'], job['state'], self.thread_pool.data_ingestor.get_csv_file())
+    def submit_to_process(self, func, params):
+        '''
+        Runs a function in the worker processes, returns the dataset
+        version of the worker processes and the function result
+        '''
+        broken_retries = 1
+        while True:
+            data_ingestor, process_executor = self.thread_pool.get_dataset()
 
-        elif 'question' in job:
-            result = function(job['question'], self.thread_pool.data_ingestor.get_csv_file())
+            try:
+                future = process_executor.submit(func, params)
+                return data_ingestor.get_version(), future.result()
+            except BrokenProcessPool:
+                # a worker process died, the pool is unusable: submit once more to new ones
+                if broken_retries == 0:
+                    raise
+                broken_retries -= 1
+                self.thread_pool.replace_process_executor(process_executor)
+            except RuntimeError:
+                # a reload has retired these worker processes meanwhile, use the new ones
+                if process_executor is self.thread_pool.process_executor:
+                    raise
 
-        self.write_job_output_file(result, job_id)
-        self.mark_job_as_done(job_id)
+    def get_job_output(self, job):
+        '''
+        Computes a job in this thread or in the worker processes, returns the
+        dataset version it has been computed on and the job result
+        '''
+        data_ingestor, process_executor = self.thread_pool.get_dataset()
 
-        with self.thread_pool.done_jobs_counter_lock:
-            self.thread_pool.done_jobs_counter += 1
+        if process_executor is None:
+            return data_ingestor.get_version(), compute_job_result(job, data_ingestor)
 
-        return result
+        # only send the job parameters to the worker process, the status
+        # and the result of the job stay in this process
+        return self.submit_to_process(compute_job_result_in_process, get_job_params(job))
 
     def execute_job(self, job):
+        '''
+        Returns the dataset version the job has been computed on and the job result
+        '''
         endpoint = job['endpoint']
 
         if endpoint in ThreadUtils.endpoint_func_map:
-            return self.get_job_output(ThreadUtils.endpoint_func_map[endpoint], job)
+            return self.get_job_output(job)
 
-        return {
+        return self.thread_pool.dataset_version, {
             "status": "error",
             "reason": "No such endpoint"
         }
 
-    def run(self):
+    def execute_cached_job(self, job):
+        '''
+        Executes a job and hands its result to the identical jobs attached to it
+        '''
+        job['trace']['compute_start_time'] = time.time()
+        try:
+            version, result = self.execute_job(job)
+        except Exception:
+            # the job, and the identical ones attached to it, must not stay running
+            job['trace']['compute_end_time'] = time.time()
+            self.thread_pool.fail_job(job)
+            raise
+
+        job['trace']['compute_end_time'] = time.time()
+
+        self.thread_pool.store_job_result(job, result, version)
+
+    def execute_batch(self, batch):
+        '''
+        Executes the jobs of a batch as a single unit
+        '''
+        jobs = batch['jobs']
+        data_ingestor, process_executor = self.thread_pool.get_dataset()
+
+        # the jobs of the batch are computed together, they share the compute timestamps
+        compute_start_time = time.time()
+        try:
+            if process_executor is None:
+                version = data_ingestor.get_version()
+                results = compute_batch_results(jobs, data_ingestor)
+            else:
+                version, results = self.submit_to_process(compute_batch_results_in_process,
+                                                          [get_job_params(job) for job in jobs])
+        except Exception:
+            # e.g. the worker processes died, none of the jobs of the batch stays running
+            for job in jobs:
+                self.thread_pool.fail_job(job)
+            raise
+        compute_end_time = time.time()
+
+        for job in jobs:
+            job['trace']['compute_start_time'] = compute_start_time
+            job['trace']['compute_end_time'] = compute_end_time
+
+        for job, result in zip(jobs, results):
+            if result is None:
+                self.thread_pool.fail_job(job)
+            else:
+                self.thread_pool.store_job_result(job, result, version)
+
+    def get_next_job(self):
+        '''
+        Blocks until a job is available and returns it, or returns SHUTDOWN_SENTINEL once
+        this worker has taken its sentinel, queued after the pending jobs by a
+        "graceful_shutdown" request, or once it has been retired from the pool after its
+        idle timeout
+        '''
+        wait_start = time.perf_counter()
+
         while True:
-            if not self.thread_pool.shutdown_event.is_set():
-                if not self.thread_pool.jobs_queue.empty():
-                    # get a pending job from queue
-                    try:
-                        job = self.thread_pool.jobs_queue.get_nowait()
-                    except queue.Empty:
-                        print("Queue is empty.")
-
-                    # execute the job and save the result to disk
-                    try:
-                        self.execute_job(job)
-                    except KeyError as e:
-                        print(f"There was an error executing the job with id = {job['job_id']}: {e}")
-                    except TypeError as e:
-                        print(f"There was an error executing the job with id = {job['job_id']}: {e}")
+            try:
+                job = self.thread_pool.jobs_queue.get(
+                    timeout=min(QUEUE_GET_TIMEOUT, self.thread_pool.pool_idle_timeout))
+            except queue.Empty:
+                # an idle worker over the minimum pool size exits like on shutdown
+                if (time.perf_counter() - wait_start >= self.thread_pool.pool_idle_timeout) and \
+                   self.thread_pool.retire_worker(self):
+                    return SHUTDOWN_SENTINEL
+                continue
+
+            # measure the wake-up latency of the jobs queued while this worker was idle
+            if (job is not SHUTDOWN_SENTINEL) and (job['enqueue_time'] >= wait_start):
+                self.thread_pool.wakeup_latency.add(time.perf_counter() - job['enqueue_time'])
+
+            return job
+
+    def run_job(self, job):
+        '''
+        Executes a queued job or batch, recording its queue wait and execution time
+        '''
+        start_time = time.perf_counter()
+        self.busy_since = start_time
+        self.thread_pool.metrics.add_queue_wait(job['endpoint'], start_time - job['enqueue_time'])
+        self.thread_pool.metrics.add_lane_wait(job['lane'], start_time - job['enqueue_time'])
+        self.thread_pool.grow_if_behind(start_time - job['enqueue_time'])
+
+        # the traces are stored along with the job statuses once the jobs finish
+        dequeue_time = time.time()
+        for traced_job in job['jobs'] if job['endpoint'] == BATCH_ENDPOINT else [job]:
+            traced_job['trace'] = {'worker_id': self.thread_id, 'dequeue_time': dequeue_time}
+
+        try:
+            if job['endpoint'] == BATCH_ENDPOINT:
+                self.execute_batch(job)
             else:
-                if self.thread_pool.jobs_queue.empty():
-                    # "shutdown_event" has been set and the jobs queue is empty,
-                    # exit the while loop
-                    break
+                self.execute_cached_job(job)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            self.busy_since = None
+            self.busy_time += elapsed
+            self.thread_pool.metrics.add_execution(job['endpoint'], elapsed)
+
+    def run(self):
+        # the jobs need the dataset, which may still be loading in the background
+        self.thread_pool.ready_event.wait()
+
+        while True:
+            # block on the jobs queue instead of polling it
+            job = self.get_next_job()
+
+            if job is SHUTDOWN_SENTINEL:
+                # "shutdown_event" has been set and the jobs queue is empty,
+                # exit the while loop
+                break
+
+            if not self.thread_pool.is_ready():
+                # the dataset could not be loaded, the jobs queued while it was loading
+                # are failed instead of staying running
+                self.thread_pool.fail_queued_job(job)
+                continue
+
+            # execute the job and store its result
+            # the failed jobs have been marked as such, the worker keeps running
+            try:
+                self.run_job(job)
+            except ZeroDivisionError as e:
+                # there are no entries for the requested question or state
+                print(f"There was an error executing the job with id = {job.get('job_id')}: {e}")
+            except Exception as e: # pylint: disable=broad-exception-caught
+                print(f"There was an error executing the job with id = {job.get('job_id')}: {e}")
 
         # finish thread execution
         sys.exit()
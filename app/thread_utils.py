@@ -1,32 +1,86 @@
-def state_mean(question, state, entries):
-    question_entries = entries[entries["Question"] == question]
-    question_state_entries = question_entries[question_entries["LocationDesc"] == state]
+def get_entries_mean(entries):
+    '''
+    Returns the mean of aggregates cube groups, each one holding the sum and
+    the count of its "Data_Value" values
+    '''
+    return float(entries["Data_Value_Sum"].sum()) / float(entries["Data_Value_Count"].sum())
+
+def get_question_entries(question, entries):
+    '''
+    Returns the aggregates cube groups of a question
+    '''
+    return entries[entries["Question"] == question]
+
+def get_groups_means(entries, keys):
+    '''
+    Returns the mean of the cube groups merged by "keys": the groups are merged in one
+    pass, then the merged sums are divided by the counts
+    '''
+    groups = entries.groupby(keys, sort=True,
+                             observed=True)[["Data_Value_Sum", "Data_Value_Count"]].sum()
+    means = groups["Data_Value_Sum"] / groups["Data_Value_Count"]
+
+    return {key: float(mean) for key, mean in means.items()}
+
+class QuestionAggregates():
+    '''
+    The aggregates cube entries of a single question, along with the states means
+    and the global mean of the question, computed once, on first use. A batch of
+    jobs passes one instance as "entries" to all the queries of the same question.
+    '''
+    def __init__(self, question, entries):
+        self.question = question
+        self.entries = get_question_entries(question, entries)
+        self.states_means = None
+        self.global_mean = None
+
+    def get_state_entries(self, state):
+        '''
+        Returns the question entries of a state
+        '''
+        return self.entries[self.entries["LocationDesc"] == state]
+
+    def get_states_means(self):
+        '''
+        Returns the mean of each state, sorted ascendingly by value
+        '''
+        if self.states_means is None:
+            means = get_groups_means(self.entries, "LocationDesc")
+            self.states_means = dict(sorted(means.items(), key = lambda item : item[1]))
+
+        return self.states_means
+
+    def get_global_mean(self):
+        '''
+        Returns the mean of all the question entries
+        '''
+        if self.global_mean is None:
+            self.global_mean = get_entries_mean(self.entries)
+
+        return self.global_mean
+
+def get_question_aggregates(question, entries):
+    '''
+    Returns the QuestionAggregates of a question, the entries are either the whole
+    aggregates cube or the shared aggregates of the question
+    '''
+    if isinstance(entries, QuestionAggregates) and (entries.question == question):
+        return entries
+
+    return QuestionAggregates(question, entries)
 
-    # extract all "Data_Value" column values
-    state_values = question_state_entries["Data_Value"]
+def state_mean(question, state, entries):
+    question_state_entries = get_question_aggregates(question, entries).get_state_entries(state)
 
     result_dict = {
-        state: sum(state_values) / float(len(state_values))
+        state: get_entries_mean(question_state_entries)
     }
 
     return result_dict
 
-def get_question_states(question, entries):
-    question_entries = entries[entries["Question"] == question]
-
-    # return all unique states names from "LocationDesc" column
-    return list(set(question_entries["LocationDesc"]))
-
 def states_mean(question, entries):
-    states = get_question_states(question, entries)
-    results_dict = {}
-
-    for state in states:
-        state_result = state_mean(question, state, entries)
-        results_dict.update(state_result)
-
     # return sorted results in ascending oreder by values
-    return dict(sorted(results_dict.items(), key = lambda item : item[1]))
+    return dict(get_question_aggregates(question, entries).get_states_means())
 
 def best5(question, questions_best_is_min, questions_best_is_max, entries):
     mean_dict = states_mean(question, entries)
@@ -61,86 +115,39 @@ def worst5(question, questions_best_is_min, questions_best_is_max, entries):
     return {}
 
 def global_mean(question, entries):
-    question_entries = entries[entries["Question"] == question]
-
-    # extract all "Data_Value" column values
-    question_values = list(question_entries["Data_Value"])
-
     result_dict = {
-        "global_mean": sum(question_values) / float(len(question_values))
+        "global_mean": get_question_aggregates(question, entries).get_global_mean()
     }
 
     return result_dict
 
 def state_diff_from_mean(question, state, entries):
-    result_mean = global_mean(question, entries)["global_mean"]
-    st_mean = state_mean(question, state, entries)[state]
+    aggregates = get_question_aggregates(question, entries)
+
+    result_mean = aggregates.get_global_mean()
+    st_mean = get_entries_mean(aggregates.get_state_entries(state))
 
     return {state: result_mean - st_mean}
 
 def diff_from_mean(question, entries):
-    mean_dict = states_mean(question, entries)
-
-    result_dict = {}
-
-    for state in mean_dict.keys():
-        state_diff_result = state_diff_from_mean(question, state, entries)
-        result_dict.update(state_diff_result)
-
-    return result_dict
+    aggregates = get_question_aggregates(question, entries)
 
-def get_categories_names(entries):
-    if (not entries.empty) and ("StratificationCategory1" in entries.columns):
-        return entries["StratificationCategory1"].dropna().unique().tolist()
+    # the global mean and all the states means come from the same question entries,
+    # the states are kept in ascending order by their mean
+    result_mean = aggregates.get_global_mean()
+    mean_dict = aggregates.get_states_means()
 
-    # there are no entries or is no "StratificationCategory1" column
-    return []
-
-def get_stratification_category_entries(category, entries):
-    return entries[entries["StratificationCategory1"] == category]
-
-def get_stratifications_names(entries):
-    if (not entries.empty) and ("Stratification1" in entries.columns):
-        return entries["Stratification1"].dropna().unique().tolist()
-
-    # there are no entries or is no "Stratification1" column
-    return []
-
-def get_stratification_entries(stratification, entries):
-    return entries[entries["Stratification1"] == stratification]
-
-def get_stratification_mean(stratification, entries):
-    str_entries = get_stratification_entries(stratification, entries)
-
-    # extract all "Data_Value" column values
-    data_values = list(str_entries["Data_Value"])
-
-    # compute the mean of data values
-    str_mean = sum(data_values) / float(len(data_values))
-
-    return {stratification: str_mean}
+    return {state: result_mean - st_mean for state, st_mean in mean_dict.items()}
 
 def state_mean_by_category(question, state, entries):
-    question_entries = entries[entries["Question"] == question]
-    question_state_entries = question_entries[question_entries["LocationDesc"] == state]
+    question_state_entries = get_question_aggregates(question, entries).get_state_entries(state)
 
-    # extract all unique "StratificationCategory1" column values corresponding to the state
-    categories = get_categories_names(question_state_entries)
+    strat_means = get_groups_means(question_state_entries,
+                                   ["StratificationCategory1", "Stratification1"])
 
     strat_cat_results = {}
-    for strat_cat in categories:
-        category_entries = get_stratification_category_entries(strat_cat,
-                                                               question_state_entries)
-
-        # extract all unique "Stratification1" column values of the current category
-        stratifications = get_stratifications_names(category_entries)
-
-        for strat in stratifications:
-            strat_mean_result = get_stratification_mean(strat, category_entries)
-            strat_cat_results.update(
-                { "('" + strat_cat + "', '" + strat + "')": strat_mean_result[strat]
-                }
-            )
+    for (strat_cat, strat), strat_mean in strat_means.items():
+        strat_cat_results["('" + strat_cat + "', '" + strat + "')"] = strat_mean
 
     # sort the results ascendingly by (category, stratification) key
     strat_cat_results = dict(sorted(strat_cat_results.items()))
@@ -148,22 +155,14 @@ def state_mean_by_category(question, state, entries):
     return {state: strat_cat_results}
 
 def mean_by_category(question, entries):
-    states = get_question_states(question, entries)
-    results_dict = {}
+    question_entries = get_question_aggregates(question, entries).entries
 
-    for state in states:
-        results = state_mean_by_category(question, state, entries)
+    strat_means = get_groups_means(question_entries,
+                                   ["LocationDesc", "StratificationCategory1", "Stratification1"])
 
-        # extract all the state results dictionary entries
-        state_results = results[state]
-
-        # extract the keys (category + stratification) of all the dictionary entries
-        keys = state_results.keys()
-
-        for key in keys:
-            value = state_results[key]
-            new_key = "('" + state + "', " + key[1:]
-            results_dict.update({new_key: value})
+    results_dict = {}
+    for (state, strat_cat, strat), strat_mean in strat_means.items():
+        results_dict["('" + state + "', '" + strat_cat + "', '" + strat + "')"] = strat_mean
 
     # return sorted results in ascending order by state name
     return dict(sorted(results_dict.items()))
@@ -3,3 +3,10 @@ from enum import Enum
 class JobStatus(Enum):
     DONE = 0
     RUNNING = 1
+    FAILED = 2      # the job could not be computed
+    EXPIRED = 3     # the job has been evicted from the jobs registry
+
+class CacheLookup(Enum):
+    HIT = 0         # the result is already cached
+    ATTACHED = 1    # an identical job is queued or running, wait for its result
+    MISS = 2        # the job has to be computed
@@ -0,0 +1,7 @@
+import os
+from app import webserver
+from app.asgi import AsgiApp, ASGI_THREADS
+
+# ASGI entry point, e.g. "uvicorn asgi_server:app": the same routes as api_server.py,
+# with the long-polled results awaited on the event loop instead of holding a thread each
+app = AsgiApp(webserver, int(os.environ.get('TP_ASGI_THREADS', ASGI_THREADS)))
@@ -0,0 +1,86 @@
+"""
+Incremental row append vs full reload.
+
+For synthetic datasets of growing size, appends a few hundred new rows and
+answers a few queries on the new dataset version, first through
+DataIngestor.append_rows (only the new rows are aggregated and merged into
+the aggregates cube), then by writing the rows to the CSV and loading it
+again, as a restart or /api/admin/reload would.
+
+Usage: python benchmarks/append_report.py [--sizes 100000 1000000] [--new-rows 500]
+"""
+import argparse
+import time
+
+from bench_utils import QUESTION, make_entries, prepare_workdir, use_app_modules
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.data_ingestor import DataIngestor
+from app.task_runner import compute_job_result
+
+CSV_PATH = "nutrition_activity_obesity_usa_subset.csv"
+
+QUERIES = [
+    {"endpoint": "state_mean", "question": QUESTION, "state": "State 0"},
+    {"endpoint": "states_mean", "question": QUESTION},
+    {"endpoint": "best5", "question": QUESTION},
+    {"endpoint": "mean_by_category", "question": QUESTION},
+]
+
+
+def run_queries(data_ingestor):
+    '''
+    Answers the queries on a dataset version
+    '''
+    return [compute_job_result(query, data_ingestor) for query in QUERIES]
+
+
+def time_append(data_ingestor, new_rows, repeat=5):
+    '''
+    Returns the best time of an append followed by the queries, in seconds
+    '''
+    best = float("inf")
+    for version in range(repeat):
+        start = time.perf_counter()
+        run_queries(data_ingestor.append_rows(new_rows, version + 2))
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def time_reload(new_rows):
+    '''
+    Returns the time of writing the rows to the csv file, loading it again
+    and answering the queries, in seconds
+    '''
+    start = time.perf_counter()
+    new_rows.to_csv(CSV_PATH, mode="a", header=False, index=False)
+    run_queries(DataIngestor(CSV_PATH, snapshot=False))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--new-rows", type=int, default=500)
+    parser.add_argument("--states", type=int, default=55)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'new rows':>10}{'append+query':>16}{'reload+query':>16}{'speedup':>10}")
+    for size in args.sizes:
+        entries = make_entries(size + args.new_rows, args.states)
+        base_rows, new_rows = entries.iloc[:size], entries.iloc[size:]
+
+        prepare_workdir(base_rows)
+        data_ingestor = DataIngestor(CSV_PATH, snapshot=False)
+
+        append_time = time_append(data_ingestor, new_rows)
+        reload_time = time_reload(new_rows)
+        print(f"{size:>10}{len(new_rows):>10}{append_time * 1000:>14.2f}ms"
+              f"{reload_time * 1000:>14.2f}ms{reload_time / append_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
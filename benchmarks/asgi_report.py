@@ -0,0 +1,248 @@
+"""
+Flask (a thread per connection) vs ASGI (asgi_server.py) serving modes.
+
+- pending long polls: GET /api/get_results/<id>?wait=30000 requests held for running jobs,
+  in-process: through the Flask test client, one thread each, and through the ASGI app,
+  one coroutine each. It prints the memory per pending request and the time taken to
+  answer all of them once their jobs finish
+- servers (needs uvicorn): "flask run" and "uvicorn asgi_server:app" on a synthetic
+  dataset, the new connections per second answered (one GET /api/num_jobs each, with
+  --concurrency clients) and the server memory per idle connection (a connection that
+  sent an incomplete request)
+
+Usage: python benchmarks/asgi_report.py [--pending 2000] [--idle 1000] [--concurrency 32]
+       [--duration 5]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import http.client
+
+from bench_utils import make_entries, prepare_workdir, import_webserver, ROOT_DIR
+
+SERVER_PORTS = {"flask": 5071, "asgi": 5072}
+
+# seconds a started server has to become ready
+SERVER_START_TIMEOUT = 60
+
+
+def get_rss(pid="self"):
+    '''
+    Returns the resident memory of a process, in bytes (Linux only)
+    '''
+    with open(f"/proc/{pid}/status", encoding="utf-8") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def wait_until(condition, timeout=60):
+    '''
+    Polls "condition" until it holds, returns whether it did before the timeout
+    '''
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def finish_jobs(job_registry, job_ids):
+    '''
+    Finishes the jobs as the workers would, returns the time it was done at
+    '''
+    # pylint: disable=import-outside-toplevel
+    from app.utils import JobStatus
+
+    for job_id in job_ids:
+        job_registry.finish(job_id, JobStatus.DONE)
+    return time.perf_counter()
+
+
+def pending_flask(webserver, count):
+    '''
+    Holds "count" long polls in threads, returns (bytes per request, seconds to answer all)
+    '''
+    job_registry = webserver.tasks_runner.job_registry
+    job_ids = [job_registry.register() for _ in range(count)]
+    client = webserver.test_client()
+
+    rss_before = get_rss()
+    threads = [threading.Thread(target=client.get, args=(f"/api/get_results/{job_id}?wait=30000",))
+               for job_id in job_ids]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: len(job_registry.events) >= count)
+    rss_pending = get_rss()
+
+    finish_time = finish_jobs(job_registry, job_ids)
+    for thread in threads:
+        thread.join()
+
+    return (rss_pending - rss_before) / count, time.perf_counter() - finish_time
+
+
+async def call_asgi(asgi_app, job_id):
+    '''
+    Sends a long-polled results request to the ASGI app, returns the response status
+    '''
+    scope = {'type': 'http', 'method': 'GET', 'path': f"/api/get_results/{job_id}",
+             'query_string': b"wait=30000", 'headers': [], 'http_version': '1.1'}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app(scope, receive, send)
+    return messages[0]['status']
+
+
+async def run_pending_asgi(asgi_app, job_registry, count):
+    '''
+    Holds "count" long polls in coroutines, returns (bytes per request, seconds to answer all)
+    '''
+    job_ids = [job_registry.register() for _ in range(count)]
+
+    rss_before = get_rss()
+    tasks = [asyncio.create_task(call_asgi(asgi_app, job_id)) for job_id in job_ids]
+    while len(job_registry.callbacks) < count:
+        await asyncio.sleep(0.01)
+    rss_pending = get_rss()
+
+    # the jobs are finished from another thread, like the workers do
+    finisher = threading.Thread(target=finish_jobs, args=(job_registry, job_ids))
+    start = time.perf_counter()
+    finisher.start()
+    statuses = await asyncio.gather(*tasks)
+    finisher.join()
+    assert set(statuses) == {200}, statuses
+
+    return (rss_pending - rss_before) / count, time.perf_counter() - start
+
+
+def start_server(mode, workdir):
+    '''
+    Starts a server process in a serving mode and waits until it is ready
+    '''
+    port = str(SERVER_PORTS[mode])
+    if mode == "flask":
+        command = [sys.executable, "-m", "flask", "--app", "api_server", "run", "--port", port]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "asgi_server:app", "--port", port,
+                   "--log-level", "warning"]
+
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, TP_LOGGING="off")
+    server = subprocess.Popen(command, cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def is_ready():
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", int(port), timeout=5)
+            connection.request("GET", "/api/ready")
+            return connection.getresponse().status == 200
+        except OSError:
+            return False
+
+    if not wait_until(is_ready, SERVER_START_TIMEOUT):
+        server.terminate()
+        raise RuntimeError(f"the {mode} server did not become ready")
+    return server
+
+
+def count_connections(port, duration, counts, index):
+    '''
+    Client thread, sends one request per new connection until "duration" elapses
+    '''
+    request = b"GET /api/num_jobs HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n"
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        with socket.create_connection(("127.0.0.1", port)) as connection:
+            connection.sendall(request)
+            while connection.recv(65536):
+                pass
+        counts[index] += 1
+
+
+def measure_server(mode, workdir, args):
+    '''
+    Returns the connections per second and the bytes per idle connection of a server
+    '''
+    server = start_server(mode, workdir)
+    port = SERVER_PORTS[mode]
+    try:
+        counts = [0] * args.concurrency
+        threads = [threading.Thread(target=count_connections,
+                                    args=(port, args.duration, counts, index))
+                   for index in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        time.sleep(1)
+        rss_before = get_rss(server.pid)
+        idle = []
+        for _ in range(args.idle):
+            connection = socket.create_connection(("127.0.0.1", port))
+            connection.sendall(b"GET /api/num_jobs HTTP/1.1\r\n")
+            idle.append(connection)
+        time.sleep(2)
+        rss_idle = get_rss(server.pid)
+        for connection in idle:
+            connection.close()
+
+        return sum(counts) / args.duration, (rss_idle - rss_before) / args.idle
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--pending", type=int, default=2000)
+    parser.add_argument("--idle", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    workdir = prepare_workdir(make_entries(20000, 55))
+    webserver = import_webserver()
+    # pylint: disable=import-outside-toplevel
+    from app.asgi import AsgiApp
+
+    print(f"{'mode':<8}{'pending':>10}{'memory/request':>18}{'answer all':>14}")
+    per_request, elapsed = pending_flask(webserver, args.pending)
+    print(f"{'flask':<8}{args.pending:>10}{per_request / 1024:>15.1f}KiB{elapsed * 1000:>12.1f}ms")
+    per_request, elapsed = asyncio.run(run_pending_asgi(AsgiApp(webserver),
+                                                        webserver.tasks_runner.job_registry,
+                                                        args.pending))
+    print(f"{'asgi':<8}{args.pending:>10}{per_request / 1024:>15.1f}KiB{elapsed * 1000:>12.1f}ms")
+
+    webserver.tasks_runner.shutdown()
+    webserver.tasks_runner.join()
+
+    try:
+        # pylint: disable=import-outside-toplevel,unused-import
+        import uvicorn
+    except ImportError:
+        print("\nuvicorn is not installed, the servers are not compared")
+        return
+
+    print(f"\n{'mode':<8}{'connections/s':>16}{'memory/idle connection':>26}")
+    for mode in SERVER_PORTS:
+        connections_per_s, per_connection = measure_server(mode, workdir, args)
+        print(f"{mode:<8}{connections_per_s:>16.1f}{per_connection / 1024:>23.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Batch execution vs one job at a time.
+
+Times two dashboard-like workloads on a synthetic dataset, first computing
+every query as a separate job, then as a single batch (question entries
+filtered once, states means and global mean shared between the queries):
+- all nine endpoints for each question
+- state_mean for every state of a question
+
+Usage: python benchmarks/batch_report.py [--rows 200000] [--states 55]
+"""
+import argparse
+import time
+
+from bench_utils import QUESTION, make_entries, use_app_modules
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.data_ingestor import build_aggregates
+from app.task_runner import compute_batch_results, compute_job_result
+from app.thread_utils import ThreadUtils
+
+
+class SyntheticIngestor:
+    '''
+    Stands in for DataIngestor, serving the aggregates of synthetic entries
+    '''
+    def __init__(self, entries):
+        self.aggregates = build_aggregates(entries)
+
+    def get_aggregates(self):
+        '''
+        Returns the aggregates cube
+        '''
+        return self.aggregates
+
+    def get_questions_best_is_min(self):
+        '''
+        Returns the questions for which the lowest mean is the best
+        '''
+        return [QUESTION]
+
+    def get_questions_best_is_max(self):
+        '''
+        Returns the questions for which the highest mean is the best
+        '''
+        return []
+
+
+def time_workload(jobs, data_ingestor, repeat=5):
+    '''
+    Returns the best time of the jobs computed one by one and as a batch, in seconds
+    '''
+    single, batch = float("inf"), float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for job in jobs:
+            compute_job_result(job, data_ingestor)
+        single = min(single, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        compute_batch_results(jobs, data_ingestor)
+        batch = min(batch, time.perf_counter() - start)
+
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.states, args.questions)
+    data_ingestor = SyntheticIngestor(entries)
+    questions = entries["Question"].unique().tolist()
+
+    workloads = {
+        "all endpoints, all questions": [
+            {"endpoint": endpoint, "question": question, "state": "State 0"}
+            if endpoint.startswith("state_") else {"endpoint": endpoint, "question": question}
+            for question in questions for endpoint in ThreadUtils.endpoint_func_map
+        ],
+        "state_mean, every state": [
+            {"endpoint": "state_mean", "question": QUESTION, "state": f"State {state}"}
+            for state in range(args.states)
+        ],
+    }
+
+    print(f"{'workload':<32}{'jobs':>6}{'one by one':>14}{'batch':>12}{'speedup':>10}")
+    for name, jobs in workloads.items():
+        single, batch = time_workload(jobs, data_ingestor)
+        print(f"{name:<32}{len(jobs):>6}{single * 1000:>12.2f}ms{batch * 1000:>10.2f}ms"
+              f"{single / batch:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
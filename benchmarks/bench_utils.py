@@ -0,0 +1,212 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+import math
+import os
+import random
+import sys
+import time
+import tempfile
+import types
+
+import numpy
+import pandas
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CATEGORIES = {
+    "Total": ["Total"],
+    "Age (years)": ["18 - 24", "25 - 34", "35 - 44", "45 - 54", "55 - 64", "65 or older"],
+    "Education": ["Less than high school", "High school graduate", "College graduate"],
+    "Sex": ["Male", "Female"],
+}
+
+QUESTION = "Percent of adults aged 18 years and older who have obesity"
+
+# header of the CSV loaded by the DataIngestor (the trailing space is in the original file)
+CSV_COLUMNS = [
+    "YearStart", "YearEnd", "LocationAbbr", "LocationDesc", "Datasource", "Class", "Topic",
+    "Question", "Data_Value_Unit", "Data_Value_Type", "Data_Value", "Data_Value_Alt",
+    "Low_Confidence_Limit", "High_Confidence_Limit ", "Sample_Size", "Total", "Age(years)",
+    "Education", "Gender", "Income", "Race/Ethnicity", "GeoLocation", "ClassID", "TopicID",
+    "QuestionID", "DataValueTypeID", "LocationID", "StratificationCategory1",
+    "Stratification1", "StratificationCategoryId1", "StratificationID1",
+]
+
+# CSV column holding the stratification of each category, in the rows of that category
+STRAT_COLUMNS = {
+    "Total": "Total",
+    "Age (years)": "Age(years)",
+    "Education": "Education",
+    "Sex": "Gender",
+    "Income": "Income",
+}
+
+# rows of the 1x scale of the generated datasets, about the size of the bundled CSV subset
+BASE_ROWS = 20000
+
+
+def make_entries(num_rows, num_states, num_questions=5, seed=0):
+    '''
+    Returns a DataFrame with the columns the app reads from the CSV
+    '''
+    rng = random.Random(seed)
+    strats = make_strats()
+    questions = [QUESTION] + [f"Synthetic question {i}" for i in range(1, num_questions)]
+    picked = [rng.choice(strats) for _ in range(num_rows)]
+
+    return pandas.DataFrame({
+        "Question": [rng.choice(questions) for _ in range(num_rows)],
+        "LocationDesc": [f"State {rng.randrange(num_states)}" for _ in range(num_rows)],
+        "Data_Value": numpy.round(numpy.random.default_rng(seed).uniform(10, 60, num_rows), 1),
+        "StratificationCategory1": [cat for cat, _ in picked],
+        "Stratification1": [strat for _, strat in picked],
+    })
+
+
+def make_strats(num_strats=None):
+    '''
+    Returns "num_strats" (category, stratification) pairs: those of CATEGORIES
+    first, then synthetic income brackets (all of CATEGORIES for None)
+    '''
+    strats = [(cat, strat) for cat, strats in CATEGORIES.items() for strat in strats]
+    if num_strats is None:
+        return strats
+
+    extra = [("Income", f"Income bracket {i}") for i in range(max(0, num_strats - len(strats)))]
+    return (strats + extra)[:num_strats]
+
+
+def make_dataset(num_rows, num_questions=5, num_states=55, num_strats=None, seed=0,
+                 columns=None):
+    '''
+    Returns a DataFrame with the CSV_COLUMNS (or just "columns") of the CSV loaded
+    by the app, the repeated strings as categoricals. The rows are drawn uniformly
+    over the questions, states and stratifications, so the same arguments always
+    give the same rows.
+    '''
+    rng = numpy.random.default_rng(seed)
+    strats = make_strats(num_strats)
+    cats = list(dict.fromkeys(cat for cat, _ in strats))
+    questions = [QUESTION] + [f"Synthetic question {i}" for i in range(1, num_questions)]
+
+    question_codes = rng.integers(num_questions, size=num_rows, dtype=numpy.int32)
+    state_codes = rng.integers(num_states, size=num_rows, dtype=numpy.int32)
+    strat_codes = rng.integers(len(strats), size=num_rows, dtype=numpy.int32)
+    cat_codes = numpy.array([cats.index(cat) for cat, _ in strats], dtype=numpy.int32)[strat_codes]
+    years = 2011 + rng.integers(12, size=num_rows, dtype=numpy.int32)
+    data_values = numpy.round(rng.uniform(10, 60, num_rows), 1)
+    sample_sizes = rng.integers(50, 5000, size=num_rows, dtype=numpy.int32)
+
+    def categorical(codes, values):
+        return pandas.Categorical.from_codes(codes, values)
+
+    def constant(value):
+        return categorical(numpy.zeros(num_rows, dtype=numpy.int8), [value])
+
+    def strat_column(column):
+        # the stratification, in the rows of the category the column holds
+        in_column = numpy.array([STRAT_COLUMNS.get(cat) == column for cat, _ in strats])
+        return categorical(numpy.where(in_column[strat_codes], strat_codes, -1),
+                           [strat for _, strat in strats])
+
+    # the columns are only built if requested
+    builders = {
+        "YearStart": lambda: years,
+        "YearEnd": lambda: years,
+        "LocationAbbr": lambda: categorical(state_codes, [f"S{i}" for i in range(num_states)]),
+        "LocationDesc": lambda: categorical(state_codes, [f"State {i}" for i in range(num_states)]),
+        "Datasource": lambda: constant("BRFSS"),
+        "Class": lambda: constant("Obesity / Weight Status"),
+        "Topic": lambda: constant("Obesity / Weight Status"),
+        "Question": lambda: categorical(question_codes, questions),
+        "Data_Value_Unit": lambda: numpy.full(num_rows, numpy.nan),
+        "Data_Value_Type": lambda: constant("Value"),
+        "Data_Value": lambda: data_values,
+        "Data_Value_Alt": lambda: data_values,
+        "Low_Confidence_Limit": lambda: numpy.round(data_values - 3, 1),
+        "High_Confidence_Limit ": lambda: numpy.round(data_values + 3, 1),
+        "Sample_Size": lambda: sample_sizes,
+        "Total": lambda: strat_column("Total"),
+        "Age(years)": lambda: strat_column("Age(years)"),
+        "Education": lambda: strat_column("Education"),
+        "Gender": lambda: strat_column("Gender"),
+        "Income": lambda: strat_column("Income"),
+        "Race/Ethnicity": lambda: strat_column("Race/Ethnicity"),
+        "GeoLocation": lambda: categorical(state_codes, [f"({20 + i % 30}.0, {-70 - i / 10:.1f})"
+                                                         for i in range(num_states)]),
+        "ClassID": lambda: constant("OWS"),
+        "TopicID": lambda: constant("OWS1"),
+        "QuestionID": lambda: categorical(question_codes,
+                                          [f"Q{i:03d}" for i in range(num_questions)]),
+        "DataValueTypeID": lambda: constant("VALUE"),
+        "LocationID": lambda: state_codes + 1,
+        "StratificationCategory1": lambda: categorical(cat_codes, cats),
+        "Stratification1": lambda: categorical(strat_codes, [strat for _, strat in strats]),
+        "StratificationCategoryId1": lambda: categorical(cat_codes,
+                                                         [f"CAT{i}" for i in range(len(cats))]),
+        "StratificationID1": lambda: categorical(strat_codes,
+                                                 [f"STRAT{i}" for i in range(len(strats))]),
+    }
+
+    return pandas.DataFrame({column: builders[column]() for column in columns or CSV_COLUMNS})
+
+
+def time_call(function, *args, repeat=3):
+    '''
+    Returns the best wall time of "repeat" calls, in seconds
+    '''
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(sizes, timings):
+    '''
+    Returns the slope of log(time) over log(size)
+    '''
+    xs = numpy.log(numpy.array(sizes, dtype=float))
+    ys = numpy.log(numpy.maximum(numpy.array(timings), 1e-9))
+    return float(numpy.polyfit(xs, ys, 1)[0])
+
+
+def import_webserver():
+    '''
+    Imports the web server, loading the CSV of the current directory
+    and starting its worker threads
+    '''
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+    # pylint: disable=import-outside-toplevel
+    from app import webserver
+    return webserver
+
+
+def use_app_modules():
+    '''
+    Makes the "app" submodules importable without running app/__init__.py,
+    which loads the CSV and starts the worker threads of the web server
+    '''
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+
+    if "app" not in sys.modules:
+        package = types.ModuleType("app")
+        package.__path__ = [os.path.join(ROOT_DIR, "app")]
+        sys.modules["app"] = package
+
+
+def prepare_workdir(entries):
+    '''
+    Makes a temporary directory, holding the entries as the CSV loaded by the
+    app and an empty "results" directory, the current directory
+    '''
+    workdir = tempfile.mkdtemp(prefix="webserver-bench-")
+    os.chdir(workdir)
+    os.mkdir("results")
+    entries.to_csv("nutrition_activity_obesity_usa_subset.csv", index=False)
+    return workdir
@@ -0,0 +1,80 @@
+"""
+Compact ingest vs full ingest of the CSV.
+
+Writes a synthetic CSV with the 31 columns of the source dataset, then loads it
+with DataIngestor in both modes and reports the load time, the memory used by
+the loaded entries and by the aggregates cube, and the time of an equality
+filter on the "Question" column of the entries.
+
+Usage: python benchmarks/ingest_memory.py [--rows 200000] [--states 55]
+"""
+import argparse
+import time
+
+from bench_utils import make_entries, prepare_workdir, use_app_modules
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.data_ingestor import DataIngestor
+
+CSV_PATH = "nutrition_activity_obesity_usa_subset.csv"
+
+# columns of the source dataset not read by the app, with a typical value
+UNUSED_COLUMNS = {
+    "YearStart": 2011, "YearEnd": 2011, "LocationAbbr": "XX", "Datasource": "BRFSS",
+    "Class": "Obesity / Weight Status", "Topic": "Obesity / Weight Status",
+    "Data_Value_Unit": "", "Data_Value_Type": "Value", "Data_Value_Alt": 32.0,
+    "Low_Confidence_Limit": 28.5, "High_Confidence_Limit ": 35.7, "Sample_Size": 1000,
+    "Total": "", "Age(years)": "", "Education": "", "Gender": "", "Income": "",
+    "Race/Ethnicity": "", "GeoLocation": "(32.84057112200048, -86.63186076199969)",
+    "ClassID": "OWS", "TopicID": "OWS1", "QuestionID": "Q036", "DataValueTypeID": "VALUE",
+    "LocationID": 1, "StratificationCategoryId1": "AGEYR", "StratificationID1": "AGEYR2534",
+}
+
+
+def measure(compact, question):
+    '''
+    Returns the load time, the memory usage and the filter time of one ingest mode
+    '''
+    start = time.perf_counter()
+    data_ingestor = DataIngestor(CSV_PATH, compact)
+    load_time = time.perf_counter() - start
+
+    entries = data_ingestor.get_csv_file()
+    filter_time = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        _ = entries[entries["Question"] == question]
+        filter_time = min(filter_time, time.perf_counter() - start)
+
+    return load_time, data_ingestor.get_memory_usage(), filter_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--states", type=int, default=55)
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.states)
+    for column, value in UNUSED_COLUMNS.items():
+        entries[column] = value
+    prepare_workdir(entries)
+    question = entries["Question"].iloc[0]
+
+    print(f"{'ingest':<10}{'load':>12}{'entries':>14}{'aggregates':>14}{'filter':>12}")
+    results = {}
+    for name, compact in (("full", False), ("compact", True)):
+        load_time, memory, filter_time = measure(compact, question)
+        results[name] = memory["csv_file"]
+        print(f"{name:<10}{load_time * 1000:>10.1f}ms"
+              f"{memory['csv_file'] / 2 ** 20:>11.2f}MiB"
+              f"{memory['aggregates'] / 2 ** 20:>11.2f}MiB"
+              f"{filter_time * 1000:>10.2f}ms")
+
+    print(f"entries memory cut: {results['full'] / results['compact']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Micro-benchmarks of the thread_utils kernels on synthetic scaled datasets.
+
+For each scale, generates a dataset of "scale" times --base-rows rows with the
+schema of the app CSV (or reads the scale_<N>x.csv file make_dataset.py wrote to
+--data-dir), then times the aggregates cube build and every function of
+ThreadUtils.endpoint_func_map and measures the peak memory each one allocates
+(tracemalloc, in separate calls from the timed ones). It prints both curves with
+the growth exponent fitted over the number of rows: ~0 means the cost does not
+grow with the rows, ~1 linear growth, ~2 quadratic growth. The analysis functions
+run on the aggregates cube, so --grow-states (states multiplied by the scale) is
+what makes their input grow too. The 1000x scale is opt-in, as it needs a few GB.
+
+Usage: python benchmarks/kernel_report.py [--scales 1 10 100] [--base-rows 20000]
+       [--questions 5] [--states 55] [--stratifications 12] [--grow-states]
+       [--data-dir datasets] [--report kernels.json]
+"""
+import argparse
+import json
+import os
+import tracemalloc
+
+import pandas
+
+from bench_utils import BASE_ROWS, QUESTION, make_dataset, use_app_modules, \
+                        time_call, growth_exponent
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.data_ingestor import build_aggregates, USED_COLUMNS, COMPACT_DTYPES
+from app.thread_utils import ThreadUtils
+
+
+def peak_memory(function, *args):
+    '''
+    Returns the peak memory allocated by a call, in bytes
+    '''
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def get_call_args(endpoint, aggregates):
+    '''
+    Returns the arguments of an endpoint function, querying QUESTION and "State 0"
+    '''
+    if endpoint in ("best5", "worst5"):
+        return (QUESTION, [QUESTION], [], aggregates)
+    if endpoint.startswith("state_"):
+        return (QUESTION, "State 0", aggregates)
+    return (QUESTION, aggregates)
+
+
+def load_entries(args, scale):
+    '''
+    Returns the entries of a scale, read from --data-dir or generated
+    '''
+    if args.data_dir:
+        path = os.path.join(args.data_dir, f"scale_{scale}x.csv")
+        return pandas.read_csv(path, usecols=USED_COLUMNS, dtype=COMPACT_DTYPES)[USED_COLUMNS]
+
+    num_states = args.states * scale if args.grow_states else args.states
+    return make_dataset(scale * args.base_rows, args.questions, num_states,
+                        args.stratifications, columns=USED_COLUMNS)
+
+
+def print_curves(title, rows, curves, unit, divisor):
+    '''
+    Prints a value per scale of every function, followed by its growth exponent
+    '''
+    header = f"{title:<24}" + "".join(f"{num_rows:>12}" for num_rows in rows) + "    exponent"
+    print(header)
+    print("-" * len(header))
+    for name, values in curves.items():
+        row = "".join(f"{value / divisor:>10.2f}{unit}" for value in values)
+        exponent = f"{growth_exponent(rows, values):>8.2f}" if len(rows) > 1 else f"{'-':>8}"
+        print(f"{name:<24}{row}    {exponent}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--base-rows", type=int, default=BASE_ROWS)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--stratifications", type=int, default=12)
+    parser.add_argument("--grow-states", action="store_true")
+    parser.add_argument("--data-dir")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--report")
+    args = parser.parse_args()
+
+    rows = []
+    aggregate_rows = []
+    timings = {"build_aggregates": []}
+    peaks = {"build_aggregates": []}
+    for scale in args.scales:
+        entries = load_entries(args, scale)
+        rows.append(len(entries))
+
+        timings["build_aggregates"].append(time_call(build_aggregates, entries,
+                                                     repeat=args.repeat))
+        peaks["build_aggregates"].append(peak_memory(build_aggregates, entries))
+        aggregates = build_aggregates(entries)
+        aggregate_rows.append(len(aggregates))
+        del entries
+
+        for endpoint, function in ThreadUtils.endpoint_func_map.items():
+            call_args = get_call_args(endpoint, aggregates)
+            timings.setdefault(endpoint, []).append(time_call(function, *call_args,
+                                                              repeat=args.repeat))
+            peaks.setdefault(endpoint, []).append(peak_memory(function, *call_args))
+
+    print("aggregates cube rows: " + ", ".join(
+        f"{num_rows} rows -> {num_aggregates}"
+        for num_rows, num_aggregates in zip(rows, aggregate_rows)) + "\n")
+    print_curves("time", rows, timings, "ms", 1e-3)
+    print_curves("peak memory", rows, peaks, "MB", 2**20)
+
+    if args.report:
+        functions = {}
+        for name, values in timings.items():
+            functions[name] = {
+                "seconds": values,
+                "peak_bytes": peaks[name],
+                "time_exponent": growth_exponent(rows, values) if len(rows) > 1 else None,
+                "memory_exponent": growth_exponent(rows, peaks[name]) if len(rows) > 1 else None,
+            }
+
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            json.dump({"scales": args.scales, "rows": rows, "aggregate_rows": aggregate_rows,
+                       "functions": functions}, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
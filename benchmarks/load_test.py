@@ -0,0 +1,368 @@
+"""
+Load test of the HTTP API: throughput and latency percentiles of concurrent clients.
+
+Replays the payloads of tests/*/input (the endpoint being the directory name) and,
+optionally, the payloads of a JSONL file holding one {"endpoint": ..., "question": ...,
+"state": ...} object per line, against a running server or against a server started
+for the run (--start-server, on the CSV of the repository). Each of the --concurrency
+clients submits a job, then long-polls GET /api/get_results until it is done, and starts
+over, until --duration seconds elapse. --mix weights the endpoints, e.g.
+"state_mean=4,mean_by_category=1" (by default every payload is equally likely).
+
+Reports the submitted and completed jobs per second and the p50/p95/p99 of the submit
+latency (the POST) and of the end-to-end latency (from the POST to the result), overall
+and per endpoint. --report writes the report as JSON, with sorted keys, so that reports
+of two commits can be diffed; --baseline compares the run with a previous report.
+
+Usage: python benchmarks/load_test.py [--url http://127.0.0.1:5000] [--start-server]
+           [--concurrency 8] [--duration 30] [--mix state_mean=4,best5=1]
+           [--requests-file payloads.jsonl] [--sync] [--report report.json]
+           [--baseline previous.json]
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+from bench_utils import ROOT_DIR
+
+# endpoints whose payload also holds the "state" field
+STATE_ENDPOINTS = ["state_mean", "state_diff_from_mean", "state_mean_by_category"]
+
+# longest "wait" accepted by GET /api/get_results, in milliseconds
+RESULT_WAIT_MS = 30000
+
+# seconds to wait for a started server to be ready
+SERVER_START_TIMEOUT = 120
+
+
+def load_test_payloads(tests_dir):
+    '''
+    Returns the payloads of tests/<endpoint>/input/*.json, grouped by endpoint
+    '''
+    payloads = {}
+    for input_file in sorted(glob.glob(os.path.join(tests_dir, "*", "input", "*.json"))):
+        endpoint = os.path.basename(os.path.dirname(os.path.dirname(input_file)))
+        with open(input_file, "r", encoding="utf-8") as fin:
+            payloads.setdefault(endpoint, []).append(json.load(fin))
+
+    return payloads
+
+
+def load_jsonl_payloads(requests_file, payloads):
+    '''
+    Adds the payloads of a JSONL file to "payloads", the lines without
+    a valid endpoint and question are skipped. Returns the number of skipped lines.
+    '''
+    skipped = 0
+    with open(requests_file, "r", encoding="utf-8") as fin:
+        for line in fin:
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+            endpoint = item.get("endpoint") if isinstance(item, dict) else None
+            if (endpoint is None) or ("question" not in item) or \
+               (endpoint in STATE_ENDPOINTS and "state" not in item):
+                skipped += 1
+                continue
+
+            payloads.setdefault(endpoint, []).append(
+                {key: item[key] for key in ("question", "state") if key in item})
+
+    return skipped
+
+
+def parse_mix(mix, payloads):
+    '''
+    Returns the (endpoint, weight) pairs of the request mix, by default
+    each endpoint is weighted by its number of payloads
+    '''
+    if not mix:
+        return [(endpoint, len(items)) for endpoint, items in sorted(payloads.items())]
+
+    weights = []
+    for part in mix.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in payloads:
+            raise ValueError(f"there are no payloads for the endpoint {endpoint}")
+        weights.append((endpoint, float(weight or 1)))
+
+    return weights
+
+
+def percentiles(latencies):
+    '''
+    Returns the count, mean, p50, p95, p99 and max of latencies in seconds, in milliseconds
+    '''
+    if not latencies:
+        return {"count": 0}
+
+    ordered = sorted(latencies)
+
+    def at(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50": at(0.5),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(ordered[-1] * 1000, 3)
+    }
+
+
+class LoadClient(threading.Thread):
+    '''
+    Closed-loop client: submits a job, waits for its result, then submits the next one
+    '''
+    def __init__(self, url, payloads, mix, deadline, sync, seed):
+        threading.Thread.__init__(self, daemon=True)
+        parsed = urllib.parse.urlparse(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80,
+                                                     timeout=RESULT_WAIT_MS / 1000 + 30)
+        self.payloads = payloads
+        self.endpoints = [endpoint for endpoint, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.deadline = deadline
+        self.sync = sync
+        self.rng = random.Random(seed)
+        # (endpoint, submit latency, end-to-end latency or None, outcome) of each job
+        self.samples = []
+
+    def request(self, method, path, payload=None):
+        '''
+        Sends a request and returns its decoded JSON response
+        '''
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+
+        if response.status != 200:
+            return {"status": f"http {response.status}"}
+
+        return json.loads(data)
+
+    def run_job(self):
+        '''
+        Submits a job and waits for its result, records its latencies
+        '''
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        payload = self.rng.choice(self.payloads[endpoint])
+        path = f"/api/{endpoint}?sync=1" if self.sync else f"/api/{endpoint}"
+
+        start = time.perf_counter()
+        response = self.request("POST", path, payload)
+        submit_latency = time.perf_counter() - start
+
+        # the job is queued (or "running" while the long poll elapses) until it is done
+        job_id = response.get("job_id")
+        while response.get("status") in ("success", "running"):
+            response = self.request("GET", f"/api/get_results/{job_id}?wait={RESULT_WAIT_MS}")
+
+        outcome = response.get("status")
+        end_to_end = time.perf_counter() - start if outcome == "done" else None
+        self.samples.append((endpoint, submit_latency, end_to_end, outcome))
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            try:
+                self.run_job()
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                self.samples.append((None, None, None, f"connection error: {e}"))
+                self.connection.close()
+
+
+def get_commit():
+    '''
+    Returns the commit of the repository, or None outside of a git checkout
+    '''
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_server(url):
+    '''
+    Starts the web server of the repository on the port of the url and waits until it is ready
+    '''
+    port = str(urllib.parse.urlparse(url).port or 5000)
+    server = subprocess.Popen([sys.executable, "-m", "flask", "--app", "api_server", "run",
+                               "--port", port], cwd=ROOT_DIR,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    parsed = urllib.parse.urlparse(url)
+    deadline = time.perf_counter() + SERVER_START_TIMEOUT
+    while time.perf_counter() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parsed.hostname, int(port), timeout=5)
+            connection.request("GET", "/api/ready")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError(f"the server did not become ready on {url}")
+
+
+def stop_server(server, url):
+    '''
+    Shuts the started server down gracefully, then stops its process
+    '''
+    parsed = urllib.parse.urlparse(url)
+    try:
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 5000, timeout=5)
+        connection.request("GET", "/api/graceful_shutdown")
+        connection.getresponse().read()
+    except OSError:
+        pass
+
+    server.terminate()
+    server.wait()
+
+
+def build_report(samples, elapsed, config):
+    '''
+    Returns the report of the samples of all the clients
+    '''
+    def summarize(selected):
+        completed = [sample for sample in selected if sample[3] == "done"]
+        errors = {}
+        for sample in selected:
+            if sample[3] != "done":
+                errors[str(sample[3])] = errors.get(str(sample[3]), 0) + 1
+
+        return {
+            "submitted": len(selected),
+            "completed": len(completed),
+            "errors": errors,
+            "submitted_per_s": round(len(selected) / elapsed, 2),
+            "completed_per_s": round(len(completed) / elapsed, 2),
+            "submit_latency_ms": percentiles([sample[1] for sample in selected
+                                              if sample[1] is not None]),
+            "end_to_end_latency_ms": percentiles([sample[2] for sample in completed])
+        }
+
+    report = summarize(samples)
+    report["endpoints"] = {endpoint: summarize([sample for sample in samples
+                                                if sample[0] == endpoint])
+                           for endpoint in sorted({sample[0] for sample in samples
+                                                   if sample[0] is not None})}
+    report["elapsed_s"] = round(elapsed, 3)
+    report["config"] = config
+    report["commit"] = get_commit()
+
+    return report
+
+
+def print_report(report, baseline=None):
+    '''
+    Prints the throughput and latency percentiles of the report, along with their
+    relative change from the baseline report, if any
+    '''
+    def change(value, *path):
+        base = baseline
+        for key in path:
+            base = base.get(key, {}) if isinstance(base, dict) else {}
+        if not isinstance(base, (int, float)) or base == 0:
+            return ""
+        return f" ({(value - base) / base * 100:+.1f}%)"
+
+    print(f"submitted: {report['submitted_per_s']} jobs/s"
+          f"{change(report['submitted_per_s'], 'submitted_per_s')}, "
+          f"completed: {report['completed_per_s']} jobs/s"
+          f"{change(report['completed_per_s'], 'completed_per_s')}, errors: {report['errors']}")
+
+    print(f"{'endpoint':<24}{'jobs/s':>10}{'submit p50':>12}{'p95':>10}{'p99':>10}"
+          f"{'e2e p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    rows = [("all", report, ())] + [(endpoint, stats, ("endpoints", endpoint))
+                                    for endpoint, stats in report["endpoints"].items()]
+    for name, stats, path in rows:
+        submit = stats["submit_latency_ms"]
+        e2e = stats["end_to_end_latency_ms"]
+        print(f"{name:<24}{stats['completed_per_s']:>10}"
+              f"{submit.get('p50', '-'):>12}{submit.get('p95', '-'):>10}"
+              f"{submit.get('p99', '-'):>10}{e2e.get('p50', '-'):>10}"
+              f"{e2e.get('p95', '-'):>10}{e2e.get('p99', '-'):>10}"
+              f"{change(e2e.get('p99', 0), *path, 'end_to_end_latency_ms', 'p99')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--start-server", action="store_true",
+                        help="start the server of the repository for the run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", default="", help='endpoint weights, e.g. "state_mean=4,best5=1"')
+    parser.add_argument("--tests-dir", default=os.path.join(ROOT_DIR, "tests"))
+    parser.add_argument("--requests-file", help="JSONL file of extra payloads")
+    parser.add_argument("--sync", action="store_true", help='submit the jobs in "sync" mode')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="path of the JSON report")
+    parser.add_argument("--baseline", help="previous JSON report to compare with")
+    args = parser.parse_args()
+
+    payloads = load_test_payloads(args.tests_dir)
+    if args.requests_file:
+        skipped = load_jsonl_payloads(args.requests_file, payloads)
+        if skipped:
+            print(f"skipped {skipped} lines of {args.requests_file} without a valid payload")
+
+    mix = parse_mix(args.mix, payloads)
+    config = {
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "mix": dict(mix),
+        "sync": args.sync,
+        "payloads": sum(len(items) for items in payloads.values())
+    }
+
+    server = start_server(args.url) if args.start_server else None
+
+    try:
+        start = time.perf_counter()
+        clients = [LoadClient(args.url, payloads, mix, start + args.duration, args.sync,
+                              args.seed + index) for index in range(args.concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            stop_server(server, args.url)
+
+    samples = [sample for client in clients for sample in client.samples]
+    report = build_report(samples, elapsed, config)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fin:
+            baseline = json.load(fin)
+
+    print_report(report, baseline)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fout:
+            json.dump(report, fout, indent=2, sort_keys=True)
+            fout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
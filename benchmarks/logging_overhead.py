@@ -0,0 +1,109 @@
+"""
+Request latency with the request logging on vs off.
+
+Sends the same requests through the Flask test client under each logging setup:
+mean_by_category queries in "sync" mode, answered from the results cache with
+their whole result in the response, and state_mean queries submitted as async
+jobs, then fetched with a long-polled GET /api/get_results. The setups are:
+- sync, full payloads: the previous logging, written from the request threads
+- sync, summaries: the payloads cut to TP_LOG_PAYLOAD_MAX_CHARS characters
+- async, summaries: the records written by the background writer thread
+- async, 10% sampled: only a tenth of the success-path logs are kept
+- off: logging disabled
+
+Usage: python benchmarks/logging_overhead.py [--rows 200000] [--states 55] [--rounds 20]
+"""
+import argparse
+import statistics
+import time
+
+from bench_utils import make_entries, prepare_workdir, import_webserver
+
+
+def percentile(latencies, fraction):
+    '''
+    Returns the value at the given fraction of the sorted latencies
+    '''
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_requests(client, questions, states, rounds):
+    '''
+    Returns the latencies of the requests, in seconds
+    '''
+    latencies = []
+    for _ in range(rounds):
+        for question in questions:
+            start = time.perf_counter()
+            response = client.post("/api/mean_by_category?sync=1",
+                                   json={"question": question}).get_json()
+            latencies.append(time.perf_counter() - start)
+            assert response["status"] == "done", response
+
+        for state in states:
+            start = time.perf_counter()
+            response = client.post("/api/state_mean",
+                                   json={"question": questions[0], "state": state}).get_json()
+            response = client.get(f"/api/get_results/{response['job_id']}?wait=30000").get_json()
+            latencies.append(time.perf_counter() - start)
+            assert response["status"] == "done", response
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.states)
+    prepare_workdir(entries)
+    webserver = import_webserver()
+    # pylint: disable=import-outside-toplevel
+    from app.request_logging import RequestLog, ASYNC_LOGGING, SYNC_LOGGING, NO_LOGGING
+    client = webserver.test_client()
+
+    questions = entries["Question"].unique().tolist()
+    states = entries["LocationDesc"].unique().tolist()
+
+    # warm up the results cache, so that every setup sends the same cached requests
+    time_requests(client, questions, states, 1)
+
+    setups = {
+        "sync, full payloads": (SYNC_LOGGING, 0, 1.0),
+        "sync, summaries": (SYNC_LOGGING, webserver.request_log.payload_max_chars, 1.0),
+        "async, summaries": (ASYNC_LOGGING, webserver.request_log.payload_max_chars, 1.0),
+        "async, 10% sampled": (ASYNC_LOGGING, webserver.request_log.payload_max_chars, 0.1),
+        "off": (NO_LOGGING, 0, 1.0),
+    }
+
+    print(f"{'logging':<22}{'requests':>10}{'mean':>12}{'p50':>12}{'p95':>12}{'flush':>12}")
+    for name, (mode, payload_max_chars, sample_rate) in setups.items():
+        webserver.request_log.stop()
+        webserver.request_log = RequestLog(webserver.logger, webserver.request_log.handler,
+                                           mode, payload_max_chars, sample_rate)
+        webserver.request_log.start()
+
+        latencies = time_requests(client, questions, states, args.rounds)
+
+        # time left to write the queued records
+        start = time.perf_counter()
+        webserver.request_log.stop()
+        flush_time = time.perf_counter() - start
+        webserver.request_log.start()
+
+        print(f"{name:<22}{len(latencies):>10}"
+              f"{statistics.mean(latencies) * 1000:>10.3f}ms"
+              f"{percentile(latencies, 0.5) * 1000:>10.3f}ms"
+              f"{percentile(latencies, 0.95) * 1000:>10.3f}ms"
+              f"{flush_time * 1000:>10.3f}ms")
+
+    webserver.tasks_runner.shutdown()
+    webserver.tasks_runner.join()
+
+
+if __name__ == "__main__":
+    main()
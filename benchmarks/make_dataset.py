@@ -0,0 +1,55 @@
+"""
+Generates synthetic datasets with the schema of the CSV loaded by the DataIngestor.
+
+Writes one CSV per scale, holding "scale" times --base-rows rows drawn uniformly
+over --questions questions, --states states and --stratifications (category,
+stratification) pairs, so that the app, load_test.py or kernel_report.py can run
+on datasets much larger than the bundled subset. The rows are generated and
+written in chunks, so a 1000x dataset does not have to fit in memory.
+
+Usage: python benchmarks/make_dataset.py [--scales 1 10 100 1000] [--base-rows 20000]
+       [--questions 5] [--states 55] [--stratifications 12] [--out-dir datasets]
+"""
+import argparse
+import os
+import time
+
+from bench_utils import BASE_ROWS, make_dataset
+
+# rows generated and written at once
+CHUNK_ROWS = 1000000
+
+
+def write_dataset(path, num_rows, num_questions, num_states, num_strats, seed=0):
+    '''
+    Writes a dataset of "num_rows" rows to "path", chunk by chunk
+    '''
+    for index, start in enumerate(range(0, num_rows, CHUNK_ROWS)):
+        chunk = make_dataset(min(CHUNK_ROWS, num_rows - start), num_questions, num_states,
+                             num_strats, seed + index)
+        chunk.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--base-rows", type=int, default=BASE_ROWS)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--stratifications", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="datasets")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for scale in args.scales:
+        path = os.path.join(args.out_dir, f"scale_{scale}x.csv")
+        start = time.perf_counter()
+        write_dataset(path, scale * args.base_rows, args.questions, args.states,
+                      args.stratifications, args.seed)
+        print(f"{path}: {scale * args.base_rows} rows, "
+              f"{os.path.getsize(path) / 2**20:.1f}MiB in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Overhead of the job metrics on the hot path.
+
+- recording: the time taken by the metrics calls a queued job makes (submitted,
+  queue wait, execution, completed), measured in a tight loop
+- requests: the latency of the same requests through the Flask test client, with
+  the metrics recorded and with a no-op metrics object, alternating rounds so that
+  both setups see the same machine load: cached mean_by_category queries in "sync"
+  mode and state_mean async jobs fetched with a long-polled GET /api/get_results
+- scrape: the time taken by a GET /api/metrics request
+
+Usage: python benchmarks/metrics_overhead.py [--rows 200000] [--states 55] [--rounds 20]
+"""
+import argparse
+import statistics
+import time
+
+from bench_utils import make_entries, prepare_workdir, import_webserver
+
+
+class NoMetrics:
+    '''
+    Stand-in for JobMetrics that records nothing
+    '''
+    def add_submitted(self, endpoint, count=1):
+        '''
+        Ignores the submitted jobs
+        '''
+
+    def add_completed(self, endpoint, count=1):
+        '''
+        Ignores the completed jobs
+        '''
+
+    def add_failed(self, endpoint, count=1):
+        '''
+        Ignores the failed jobs
+        '''
+
+    def add_queue_wait(self, endpoint, seconds):
+        '''
+        Ignores the queue wait
+        '''
+
+    def add_execution(self, endpoint, seconds):
+        '''
+        Ignores the execution time
+        '''
+
+
+def time_recording(metrics, num_jobs):
+    '''
+    Returns the time taken by the metrics calls of a queued job, in seconds
+    '''
+    start = time.perf_counter()
+    for _ in range(num_jobs):
+        metrics.add_submitted("state_mean")
+        metrics.add_queue_wait("state_mean", 0.0004)
+        metrics.add_execution("state_mean", 0.002)
+        metrics.add_completed("state_mean")
+
+    return (time.perf_counter() - start) / num_jobs
+
+
+def time_requests(client, questions, states):
+    '''
+    Returns the latencies of one round of requests, in seconds
+    '''
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        response = client.post("/api/mean_by_category?sync=1",
+                               json={"question": question}).get_json()
+        latencies.append(time.perf_counter() - start)
+        assert response["status"] == "done", response
+
+    for state in states:
+        start = time.perf_counter()
+        response = client.post("/api/state_mean",
+                               json={"question": questions[0], "state": state}).get_json()
+        response = client.get(f"/api/get_results/{response['job_id']}?wait=30000").get_json()
+        latencies.append(time.perf_counter() - start)
+        assert response["status"] == "done", response
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.states)
+    prepare_workdir(entries)
+    webserver = import_webserver()
+    client = webserver.test_client()
+    thread_pool = webserver.tasks_runner
+    metrics = thread_pool.metrics
+
+    print(f"recording: {time_recording(metrics, 100000) * 1e6:.2f}us per queued job "
+          f"(no-op: {time_recording(NoMetrics(), 100000) * 1e6:.2f}us)")
+
+    questions = entries["Question"].unique().tolist()
+    states = entries["LocationDesc"].unique().tolist()
+
+    # warm up the results cache, so that every round sends the same cached requests
+    time_requests(client, questions, states)
+
+    runs = {"metrics on": [], "metrics off": []}
+    for _ in range(args.rounds):
+        thread_pool.metrics = metrics
+        runs["metrics on"] += time_requests(client, questions, states)
+        thread_pool.metrics = NoMetrics()
+        runs["metrics off"] += time_requests(client, questions, states)
+    thread_pool.metrics = metrics
+
+    print(f"{'requests':<14}{'count':>8}{'mean':>12}{'p50':>12}")
+    for name, latencies in runs.items():
+        print(f"{name:<14}{len(latencies):>8}"
+              f"{statistics.mean(latencies) * 1000:>10.3f}ms"
+              f"{statistics.median(latencies) * 1000:>10.3f}ms")
+
+    scrapes = []
+    for _ in range(100):
+        start = time.perf_counter()
+        response = client.get("/api/metrics")
+        scrapes.append(time.perf_counter() - start)
+        assert response.status_code == 200
+
+    print(f"scrape: {statistics.mean(scrapes) * 1000:.3f}ms, {len(response.data)} bytes")
+
+    thread_pool.shutdown()
+    thread_pool.join()
+
+
+if __name__ == "__main__":
+    main()
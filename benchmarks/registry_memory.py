@@ -0,0 +1,85 @@
+"""
+Memory of the job statuses: dict of JobStatus vs JobRegistry.
+
+Registers and finishes a number of jobs, first in a dict mapping the job ids
+to JobStatus values and a dict holding their dataset versions (the previous
+layout), then in a JobRegistry, without eviction and with a retention limit,
+and reports the memory allocated for them (tracemalloc).
+
+Usage: python benchmarks/registry_memory.py [--jobs 1000000] [--retained 10000]
+"""
+import argparse
+import tracemalloc
+
+from bench_utils import use_app_modules
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.job_registry import JobRegistry
+from app.utils import JobStatus
+
+
+def measure(fill):
+    '''
+    Returns the memory allocated by "fill" and still in use afterwards, in bytes
+    '''
+    tracemalloc.start()
+    kept = fill()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def fill_dicts(num_jobs):
+    '''
+    The previous layout: a status dict and a dataset versions dict, never evicted
+    '''
+    def fill():
+        jobs, versions = {}, {}
+        for job_id in range(1, num_jobs + 1):
+            jobs[job_id] = JobStatus.RUNNING
+        for job_id in range(1, num_jobs + 1):
+            jobs[job_id] = JobStatus.DONE
+            versions[job_id] = 1
+        return jobs, versions
+
+    return fill
+
+
+def fill_registry(num_jobs, max_retained):
+    '''
+    A JobRegistry, all the jobs being registered before finishing
+    '''
+    def fill():
+        registry = JobRegistry(max_retained=max_retained)
+        for _ in range(num_jobs):
+            registry.register()
+        for job_id in range(1, num_jobs + 1):
+            registry.finish(job_id, JobStatus.DONE, 1)
+        return registry
+
+    return fill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--jobs", type=int, default=1000000)
+    parser.add_argument("--retained", type=int, default=10000)
+    args = parser.parse_args()
+
+    runs = {
+        "dicts": fill_dicts(args.jobs),
+        "registry, no eviction": fill_registry(args.jobs, args.jobs),
+        f"registry, {args.retained} retained": fill_registry(args.jobs, args.retained),
+    }
+
+    print(f"{'layout':<28}{'jobs':>10}{'memory':>14}{'per job':>12}")
+    for name, fill in runs.items():
+        size = measure(fill)
+        print(f"{name:<28}{args.jobs:>10}{size / 2 ** 20:>11.2f}MiB{size / args.jobs:>10.1f}B")
+
+
+if __name__ == "__main__":
+    main()
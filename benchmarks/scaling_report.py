@@ -0,0 +1,53 @@
+"""
+Scaling report for the thread_utils query engine.
+
+Builds synthetic datasets of growing size (the number of states grows with the
+number of rows, as it does when more locations are added to the survey), times
+the aggregates cube build and every endpoint of ThreadUtils.endpoint_func_map,
+then prints the fitted growth exponent of each one: ~1 means linear growth,
+~2 means quadratic growth.
+
+Usage: python benchmarks/scaling_report.py [--sizes 25000 50000 100000 200000]
+"""
+import argparse
+
+from bench_utils import QUESTION, make_entries, use_app_modules, time_call, growth_exponent
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.data_ingestor import build_aggregates
+from app.thread_utils import ThreadUtils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000, 200000])
+    parser.add_argument("--rows-per-state", type=int, default=200)
+    args = parser.parse_args()
+
+    timings = {"build_aggregates": []}
+    for size in args.sizes:
+        entries = make_entries(size, max(1, size // args.rows_per_state))
+        timings["build_aggregates"].append(time_call(build_aggregates, entries))
+        aggregates = build_aggregates(entries)
+
+        for endpoint, function in ThreadUtils.endpoint_func_map.items():
+            if endpoint in ("best5", "worst5"):
+                call_args = (QUESTION, [QUESTION], [], aggregates)
+            elif endpoint.startswith("state_"):
+                call_args = (QUESTION, "State 0", aggregates)
+            else:
+                call_args = (QUESTION, aggregates)
+            timings.setdefault(endpoint, []).append(time_call(function, *call_args))
+
+    header = f"{'function':<24}" + "".join(f"{size:>12}" for size in args.sizes) + "    exponent"
+    print(header)
+    print("-" * len(header))
+    for name, values in timings.items():
+        row = "".join(f"{value * 1000:>10.2f}ms" for value in values)
+        print(f"{name:<24}{row}    {growth_exponent(args.sizes, values):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
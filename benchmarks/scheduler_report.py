@@ -0,0 +1,112 @@
+"""
+Per-class latency of a mixed load with the FIFO and the cost-lanes schedulers.
+
+Each round submits, through the Flask test client, a burst of expensive
+mean_by_category jobs (one per question), immediately followed by cheap
+state_mean lookups and medium states_mean jobs, then waits for all of them. The
+results cache is disabled, so that every job is computed. The latency of a job is
+the time from its registration to its result being stored (from the job traces);
+the jobs are grouped by the cost class the lanes scheduler gives them, and the
+p50/p99 of each class are printed for both schedulers, alternating rounds so that
+both see the same machine load. The FIFO scheduler is the lanes one with every job
+in the same lane, so that the workers never have to be moved to another queue.
+
+Usage: python benchmarks/scheduler_report.py [--rows 400000] [--questions 40] [--rounds 10]
+"""
+import argparse
+import math
+import os
+import random
+
+from bench_utils import make_dataset, prepare_workdir, import_webserver
+
+
+def percentile(latencies, fraction):
+    '''
+    Returns the value at the given fraction of the sorted latencies
+    '''
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_round(client, thread_pool, requests):
+    '''
+    Submits the requests at once, then returns the (class, latency) pair of each job
+    '''
+    # pylint: disable=import-outside-toplevel
+    from app.job_scheduler import get_cost_lane, LANE_COST_LIMITS
+    from app.task_runner import estimate_job_cost
+
+    data_ingestor, _ = thread_pool.get_dataset()
+    job_ids = []
+    for endpoint, data in requests:
+        response = client.post(f"/api/{endpoint}", json=data).get_json()
+        cost = estimate_job_cost(dict(data, endpoint=endpoint), data_ingestor)
+        job_ids.append((get_cost_lane(cost, LANE_COST_LIMITS), response['job_id']))
+
+    latencies = []
+    for job_class, job_id in job_ids:
+        response = client.get(f"/api/get_results/{job_id}?wait=60000").get_json()
+        assert response["status"] == "done", response
+        trace = thread_pool.job_registry.get_trace(job_id)
+        latencies.append((job_class, trace['persist_time'] - trace['enqueue_time']))
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=400000)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--stratifications", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    entries = make_dataset(args.rows, args.questions, args.states, args.stratifications,
+                           columns=["Question", "LocationDesc", "Data_Value",
+                                    "StratificationCategory1", "Stratification1"])
+    prepare_workdir(entries)
+    os.environ["TP_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["TP_LOGGING"] = "off"
+    webserver = import_webserver()
+    # pylint: disable=import-outside-toplevel
+    from app.job_scheduler import LANE_COST_LIMITS
+    client = webserver.test_client()
+    thread_pool = webserver.tasks_runner
+
+    questions = entries["Question"].cat.categories.tolist()
+    states = entries["LocationDesc"].cat.categories.tolist()
+    pairs = [(question, state) for question in questions for state in states]
+    rng = random.Random(0)
+
+    # lane cost limits of each scheduler
+    setups = {"fifo": (math.inf, math.inf), "lanes": LANE_COST_LIMITS}
+    runs = {name: [] for name in setups}
+    for _ in range(args.rounds):
+        requests = [("mean_by_category", {"question": question}) for question in questions]
+        cheap = [("state_mean", {"question": question, "state": state})
+                 for question, state in rng.sample(pairs, args.lookups)]
+        medium = [("states_mean", {"question": question}) for question in questions]
+        requests += rng.sample(cheap + medium, len(cheap) + len(medium))
+
+        for name, cost_limits in setups.items():
+            thread_pool.lane_cost_limits = cost_limits
+            runs[name] += run_round(client, thread_pool, requests)
+
+    print(f"{'scheduler':<12}{'class':<14}{'jobs':>8}{'p50':>12}{'p99':>12}")
+    for scheduler, latencies in runs.items():
+        for job_class in ("interactive", "standard", "bulk"):
+            values = [latency for name, latency in latencies if name == job_class]
+            if values:
+                print(f"{scheduler:<12}{job_class:<14}{len(values):>8}"
+                      f"{percentile(values, 0.5) * 1000:>10.2f}ms"
+                      f"{percentile(values, 0.99) * 1000:>10.2f}ms")
+
+    thread_pool.shutdown()
+    thread_pool.join()
+
+
+if __name__ == "__main__":
+    main()
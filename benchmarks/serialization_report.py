@@ -0,0 +1,75 @@
+"""
+Cost of storing and answering a result with the previous and the current serialization.
+
+For mean_by_category-like results of growing size (one mean per state and
+stratification), it times storing a result (json.dumps before, serialization.dumps
+now, with orjson when it is installed) and answering a GET /api/get_results for it
+(parsing the stored result and serializing the response with jsonify before, splicing
+the stored bytes into the response now), and checks that both responses hold the same
+JSON.
+
+Usage: python benchmarks/serialization_report.py [--states 55] [--sizes 10 100 1000] [--repeat 20]
+"""
+import argparse
+import json
+
+import flask
+
+from bench_utils import use_app_modules, time_call
+
+
+def make_result(num_states, num_strats):
+    '''
+    Returns a mean_by_category-like result: a mean per (state, category, stratification)
+    '''
+    return {str((f"State {state}", "Age (years)", f"Stratification {strat}")):
+            30.0 + (state * num_strats + strat) / 7.0
+            for state in range(num_states) for strat in range(num_strats)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="stratifications per state")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    use_app_modules()
+    # pylint: disable=import-outside-toplevel
+    from app import serialization
+
+    print(f"orjson: {'on' if serialization.orjson is not None else 'off'}")
+    print(f"{'keys':>8}{'bytes':>12}{'store before':>14}{'store now':>12}"
+          f"{'answer before':>15}{'answer now':>12}")
+
+    webserver = flask.Flask(__name__)
+    for num_strats in args.sizes:
+        result = make_result(args.states, num_strats)
+        stored_before = json.dumps(result)
+        stored_now = serialization.dumps(result)
+
+        def answer_before():
+            # pylint: disable=cell-var-from-loop
+            with webserver.app_context():
+                return flask.jsonify({'status': 'done', 'dataset_version': 1,
+                                      'data': json.loads(stored_before)}).get_data()
+
+        def answer_now():
+            # pylint: disable=cell-var-from-loop
+            return serialization.dumps_response({'status': 'done', 'dataset_version': 1,
+                                                 'data': serialization.RawJson(stored_now)})
+
+        assert json.loads(answer_before()) == json.loads(answer_now())
+
+        timings = [time_call(function, *function_args, repeat=args.repeat)
+                   for function, function_args in ((json.dumps, (result,)),
+                                                   (serialization.dumps, (result,)),
+                                                   (answer_before, ()), (answer_now, ()))]
+        print(f"{len(result):>8}{len(stored_now):>12}" +
+              "".join(f"{timing * 1000:>{width}.3f}ms"
+                      for timing, width in zip(timings, (12, 10, 13, 10))))
+
+
+if __name__ == "__main__":
+    main()
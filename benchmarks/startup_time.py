@@ -0,0 +1,82 @@
+"""
+Time to first request, parsing the CSV vs loading its binary snapshot.
+
+Starts the web server in a fresh process on a synthetic dataset and times it
+from the process start until the response of a first "sync" state_mean query:
+- csv: TP_CSV_SNAPSHOT=0, the CSV is parsed on every start
+- first start: no snapshot yet, the CSV is parsed and the snapshot written
+- snapshot: the snapshot written by the previous start is loaded
+
+Usage: python benchmarks/startup_time.py [--rows 1000000] [--states 55] [--repeat 3]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from bench_utils import QUESTION, make_entries, prepare_workdir, import_webserver
+
+CSV_PATH = "nutrition_activity_obesity_usa_subset.csv"
+
+
+def first_request():
+    '''
+    Child process: starts the web server and answers a first query
+    '''
+    webserver = import_webserver()
+    response = webserver.test_client().post("/api/state_mean?sync=1",
+                                            json={"question": QUESTION, "state": "State 0"})
+    assert response.get_json()["status"] == "done", response.get_json()
+    print("ready", flush=True)
+
+    webserver.tasks_runner.shutdown()
+    webserver.tasks_runner.join()
+
+
+def time_start(snapshot):
+    '''
+    Returns the time from the start of a server process to its first response, in seconds
+    '''
+    env = dict(os.environ, TP_CSV_SNAPSHOT="1" if snapshot else "0")
+
+    start = time.perf_counter()
+    with subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child"],
+                          env=env, stdout=subprocess.PIPE, text=True) as child:
+        assert child.stdout.readline().strip() == "ready"
+        elapsed = time.perf_counter() - start
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--states", type=int, default=55)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_request()
+        return
+
+    prepare_workdir(make_entries(args.rows, args.states))
+
+    runs = {"csv": [], "first start": [], "snapshot": []}
+    for _ in range(args.repeat):
+        shutil.rmtree(CSV_PATH + ".snapshot", ignore_errors=True)
+        runs["csv"].append(time_start(snapshot=False))
+        runs["first start"].append(time_start(snapshot=True))
+        runs["snapshot"].append(time_start(snapshot=True))
+
+    print(f"{'start':<14}{'best':>12}{'mean':>12}")
+    for name, times in runs.items():
+        print(f"{name:<14}{min(times) * 1000:>10.1f}ms{sum(times) / len(times) * 1000:>10.1f}ms")
+
+    print(f"csv / snapshot: {min(runs['csv']) / min(runs['snapshot']):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Latency of single-state queries, async jobs vs the "sync" fast path.
+
+Sends state_mean requests for every state of a synthetic dataset through the
+Flask test client, each one for a state not computed before:
+- async: POST, then GET /api/get_results with the "wait" long-poll parameter
+- sync: POST with "?sync=1", the result comes inline in the POST response
+- sync, cached: the same "?sync=1" requests again, answered from the results cache
+
+Usage: python benchmarks/sync_latency.py [--rows 200000] [--states 55]
+"""
+import argparse
+import statistics
+import time
+
+from bench_utils import make_entries, prepare_workdir, import_webserver
+
+
+def percentile(latencies, fraction):
+    '''
+    Returns the value at the given fraction of the sorted latencies
+    '''
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_async(client, question, states):
+    '''
+    Returns the latencies of the state_mean jobs submitted as async jobs, in seconds
+    '''
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        job_id = client.post("/api/state_mean",
+                             json={"question": question, "state": state}).get_json()["job_id"]
+        response = client.get(f"/api/get_results/{job_id}?wait=30000").get_json()
+        latencies.append(time.perf_counter() - start)
+        assert response["status"] == "done", response
+
+    return latencies
+
+
+def time_sync(client, question, states):
+    '''
+    Returns the latencies of the state_mean jobs submitted in "sync" mode, in seconds
+    '''
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        response = client.post("/api/state_mean?sync=1",
+                               json={"question": question, "state": state}).get_json()
+        latencies.append(time.perf_counter() - start)
+        assert response["status"] == "done", response
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--states", type=int, default=55)
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.states)
+    prepare_workdir(entries)
+    webserver = import_webserver()
+    client = webserver.test_client()
+
+    questions = entries["Question"].unique().tolist()
+    states = entries["LocationDesc"].unique().tolist()
+
+    # each mode uses its own question, so none of the first requests hits the cache
+    runs = {
+        "async + long-poll": time_async(client, questions[0], states),
+        "sync": time_sync(client, questions[1], states),
+        "sync, cached": time_sync(client, questions[1], states),
+    }
+
+    print(f"{'mode':<20}{'requests':>10}{'mean':>12}{'p50':>12}{'p95':>12}")
+    for name, latencies in runs.items():
+        print(f"{name:<20}{len(latencies):>10}"
+              f"{statistics.mean(latencies) * 1000:>10.3f}ms"
+              f"{percentile(latencies, 0.5) * 1000:>10.3f}ms"
+              f"{percentile(latencies, 0.95) * 1000:>10.3f}ms")
+
+    webserver.tasks_runner.shutdown()
+    webserver.tasks_runner.join()
+
+
+if __name__ == "__main__":
+    main()
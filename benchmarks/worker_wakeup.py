@@ -0,0 +1,61 @@
+"""
+Idle CPU usage and wake-up latency of the ThreadPool workers.
+
+Starts a ThreadPool on a small synthetic dataset, measures the CPU time the
+process burns while the workers wait for jobs, then submits jobs one by one,
+with a pause between them so that every job finds the workers idle, and
+reports how long an idle worker takes to pick up a queued job.
+
+Usage: python benchmarks/worker_wakeup.py [--threads 8] [--idle 2] [--jobs 200]
+"""
+import argparse
+import time
+
+from bench_utils import QUESTION, make_entries, prepare_workdir, use_app_modules
+
+use_app_modules()
+
+# pylint: disable=wrong-import-position
+from app.task_runner import ThreadPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", maxsplit=1)[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--idle", type=float, default=2.0, help="idle period, in seconds")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.005,
+                        help="pause between two jobs, in seconds")
+    args = parser.parse_args()
+
+    prepare_workdir(make_entries(10000, 50))
+    thread_pool = ThreadPool("nutrition_activity_obesity_usa_subset.csv")
+    thread_pool.min_threads = thread_pool.max_threads = args.threads
+    # disable the results cache, so that every job reaches the workers
+    thread_pool.result_cache.max_entries = 0
+    thread_pool.start()
+
+    # the workers are idle, all the CPU time comes from them
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(args.idle)
+    idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+    for _ in range(args.jobs):
+        job_id = thread_pool.job_registry.register()
+        thread_pool.add_job({"endpoint": "state_mean", "question": QUESTION,
+                             "state": f"State {job_id % 50}", "job_id": job_id})
+        time.sleep(args.pause)
+
+    thread_pool.shutdown()
+    thread_pool.join()
+
+    stats = thread_pool.wakeup_latency.get_stats()
+    print(f"workers:                 {args.threads}")
+    print(f"idle CPU usage:          {idle_cpu * 100:.2f}% of one core")
+    print(f"wake-up samples:         {stats['count']}")
+    print(f"wake-up latency (mean):  {stats['mean_ms']:.3f} ms")
+    print(f"wake-up latency (max):   {stats['max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
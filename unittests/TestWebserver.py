@@ -1,19 +1,44 @@
+import os
+import json
+import queue
+import asyncio
+import logging
+import shutil
+import signal
+import tempfile
+import time
 import unittest
-from app import thread_utils
-from app.data_ingestor import DataIngestor
+from unittest import mock
+from types import SimpleNamespace
+import numpy
+from app import thread_utils, serialization, csv_snapshot
+from app.data_ingestor import DataIngestor, IngestProgress, USED_COLUMNS, COMPACT_DTYPES, \
+                             AGGREGATE_KEYS, build_aggregates
+from app.task_runner import ResultCache, ThreadPool, TaskRunner, estimate_job_cost
+from app.csv_snapshot import get_snapshot_dir
+from app.result_store import MemoryResultStore, DiskResultStore
+from app.job_registry import JobRegistry
+from app.metrics import JobMetrics, format_labels
+from app.admission import AdmissionControl, parse_in_flight_limits, MIN_RETRY_AFTER
+from app.job_scheduler import JobScheduler, get_cost_lane, INTERACTIVE_LANE, STANDARD_LANE, \
+                              BULK_LANE
+from app.request_logging import RequestLog, summarize_payload, ASYNC_LOGGING
+from app import webserver
+from app.asgi import AsgiApp
+from app.utils import CacheLookup, JobStatus
 
 class TestWebserver(unittest.TestCase):
 
     def test_state_mean(self):
         self.assertEqual(
-            thread_utils.state_mean("Percent of adults who report consuming fruit less than one time daily", "Colorado", self.data_ingestor.get_csv_file()),
+            thread_utils.state_mean("Percent of adults who report consuming fruit less than one time daily", "Colorado", self.data_ingestor.get_aggregates()),
             self.test_state_mean_expected_dict
         )
 
     def test_states_mean(self):
         expected_dict = self.test_states_mean_expected_dict
         result_dict = thread_utils.states_mean("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
-                                               self.data_ingestor.get_csv_file())
+                                               self.data_ingestor.get_aggregates())
         
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -29,7 +54,7 @@ class TestWebserver(unittest.TestCase):
         result_dict = thread_utils.best5("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
                                          self.data_ingestor.get_questions_best_is_min(),
                                          self.data_ingestor.get_questions_best_is_max(),
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -45,7 +70,7 @@ class TestWebserver(unittest.TestCase):
         result_dict = thread_utils.worst5("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
                                          self.data_ingestor.get_questions_best_is_min(),
                                          self.data_ingestor.get_questions_best_is_max(),
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -58,7 +83,7 @@ class TestWebserver(unittest.TestCase):
     def test_global_mean(self):
         expected_dict = self.test_global_mean_expected_dict
         result_dict = thread_utils.global_mean("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -70,7 +95,7 @@ class TestWebserver(unittest.TestCase):
     def test_diff_from_mean(self):
         expected_dict = self.test_diff_from_mean_expected_dict
         result_dict = thread_utils.diff_from_mean("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -83,7 +108,7 @@ class TestWebserver(unittest.TestCase):
         expected_dict = self.test_state_diff_from_mean_expected_dict
         result_dict = thread_utils.state_diff_from_mean("Percent of adults who achieve at least 300 minutes a week of moderate-intensity aerobic physical activity or 150 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
                                          "Minnesota",
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -96,7 +121,7 @@ class TestWebserver(unittest.TestCase):
         expected_dict = self.test_state_mean_by_category_expected_dict
         result_dict = thread_utils.state_mean_by_category("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
                                          "Michigan",
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -110,7 +135,7 @@ class TestWebserver(unittest.TestCase):
     def test_mean_by_category(self):
         expected_dict = self.test_mean_by_category_expected_dict
         result_dict = thread_utils.mean_by_category("Percent of adults who achieve at least 150 minutes a week of moderate-intensity aerobic physical activity or 75 minutes a week of vigorous-intensity aerobic activity (or an equivalent combination)",
-                                         self.data_ingestor.get_csv_file())
+                                         self.data_ingestor.get_aggregates())
 
         # compare the keys of the dictionaries
         self.assertEqual(set(expected_dict.keys()), set(result_dict.keys()))
@@ -121,6 +146,103 @@ class TestWebserver(unittest.TestCase):
                                 result_dict[key],
                                 self.decimal_places_accuracy)
 
+    def test_aggregates(self):
+        entries = self.data_ingestor.get_csv_file()
+        aggregates = self.data_ingestor.get_aggregates()
+
+        # every "Data_Value" must be accounted for exactly once in the cube
+        self.assertEqual(aggregates["Data_Value_Count"].sum(), entries["Data_Value"].count())
+        self.assertAlmostEqual(aggregates["Data_Value_Sum"].sum(),
+                               entries["Data_Value"].sum(),
+                               6)
+
+        # the cube has a single row per (question, state, stratification) group
+        self.assertFalse(aggregates.duplicated(["Question", "LocationDesc",
+                                                "StratificationCategory1",
+                                                "Stratification1"]).any())
+
+    def test_compact_ingest(self):
+        entries = self.data_ingestor.get_csv_file()
+        full_ingestor = DataIngestor("./nutrition_activity_obesity_usa_subset.csv", compact=False)
+
+        # only the used columns are loaded, the strings as categoricals
+        self.assertEqual(list(entries.columns), USED_COLUMNS)
+        self.assertEqual(entries["Question"].dtype, "category")
+        self.assertEqual(entries["Data_Value"].dtype, "float64")
+        self.assertLess(self.data_ingestor.get_memory_usage()["csv_file"],
+                        full_ingestor.get_memory_usage()["csv_file"])
+
+        # both ingest modes build the same aggregates cube
+        compact_aggregates = self.data_ingestor.get_aggregates()
+        full_aggregates = full_ingestor.get_aggregates()
+        self.assertEqual(len(compact_aggregates), len(full_aggregates))
+        self.assertEqual(compact_aggregates["Question"].astype(str).tolist(),
+                         full_aggregates["Question"].tolist())
+        self.assertEqual(compact_aggregates["Data_Value_Count"].tolist(),
+                         full_aggregates["Data_Value_Count"].tolist())
+
+    def test_append_rows(self):
+        entries = self.data_ingestor.get_csv_file()
+        new_rows = entries.iloc[:100]
+        appended = self.data_ingestor.append_rows(new_rows, version=2)
+
+        # the current version is left untouched
+        self.assertEqual(self.data_ingestor.get_version(), 1)
+        self.assertEqual(len(self.data_ingestor.get_csv_file()), len(entries))
+        self.assertEqual(self.data_ingestor.get_aggregates()["Data_Value_Count"].sum(),
+                         entries["Data_Value"].count())
+
+        # the new version aggregates the new rows as well
+        self.assertEqual(appended.get_version(), 2)
+        self.assertEqual(len(appended.get_csv_file()), len(entries) + 100)
+        # the concatenated rows are built once
+        self.assertIs(appended.get_csv_file(), appended.get_csv_file())
+        self.assertEqual(appended.get_aggregates()["Data_Value_Count"].sum(),
+                         entries["Data_Value"].count() + new_rows["Data_Value"].count())
+        self.assertAlmostEqual(appended.get_aggregates()["Data_Value_Sum"].sum(),
+                               entries["Data_Value"].sum() + new_rows["Data_Value"].sum(),
+                               6)
+        self.assertEqual(len(appended.get_aggregates()), len(self.data_ingestor.get_aggregates()))
+
+    def test_append_new_groups(self):
+        entries = self.data_ingestor.get_csv_file()
+        new_rows = entries.iloc[:200][USED_COLUMNS].astype(object)
+        new_rows.loc[new_rows.index[:50], "LocationDesc"] = "Atlantis"
+        appended = self.data_ingestor.append_rows(new_rows, version=2)
+        appended = appended.append_rows(new_rows.iloc[:10], version=3)
+
+        # the merged cube holds the groups of a cube built from all the rows
+        def sorted_groups(aggregates):
+            return aggregates.astype({key: str for key in AGGREGATE_KEYS}) \
+                             .sort_values(AGGREGATE_KEYS).reset_index(drop=True)
+
+        merged = sorted_groups(appended.get_aggregates())
+        rebuilt = sorted_groups(build_aggregates(appended.get_csv_file()))
+        self.assertEqual(merged[AGGREGATE_KEYS].values.tolist(),
+                         rebuilt[AGGREGATE_KEYS].values.tolist())
+        self.assertEqual(merged["Data_Value_Count"].tolist(), rebuilt["Data_Value_Count"].tolist())
+        numpy.testing.assert_allclose(merged["Data_Value_Sum"], rebuilt["Data_Value_Sum"])
+
+        question = new_rows["Question"].iloc[0]
+        self.assertEqual(appended.get_question_groups_count(question),
+                         (appended.get_aggregates()["Question"] == question).sum())
+
+    def test_estimate_job_cost(self):
+        aggregates = self.data_ingestor.get_aggregates()
+        question = aggregates["Question"].iloc[0]
+        groups = self.data_ingestor.get_question_groups_count(question)
+
+        # every cube group belongs to exactly one question
+        self.assertEqual(sum(self.data_ingestor.get_question_groups_count(q)
+                             for q in aggregates["Question"].unique()), len(aggregates))
+
+        self.assertEqual(estimate_job_cost({"endpoint": "state_mean", "question": question},
+                                           self.data_ingestor), groups)
+        self.assertEqual(estimate_job_cost({"endpoint": "mean_by_category", "question": question},
+                                           self.data_ingestor), 4 * groups)
+        self.assertEqual(estimate_job_cost({"endpoint": "state_mean", "question": "unknown"},
+                                           self.data_ingestor), 0)
+
     def setUp(self):
         self.data_ingestor = DataIngestor("./nutrition_activity_obesity_usa_subset.csv")
         self.decimal_places_accuracy = 12
@@ -134,3 +256,746 @@ class TestWebserver(unittest.TestCase):
         self.test_state_diff_from_mean_expected_dict = {"Minnesota": -1.222887245012327}
         self.test_mean_by_category_expected_dict = {"('Alabama', 'Age (years)', '25 - 34')": 50.6, "('Alabama', 'Age (years)', '45 - 54')": 40.0, "('Alabama', 'Age (years)', '65 or older')": 44.05, "('Alabama', 'Education', 'College graduate')": 56.7, "('Alabama', 'Education', 'High school graduate')": 39.2, "('Alabama', 'Education', 'Less than high school')": 34.05, "('Alabama', 'Gender', 'Female')": 43.6, "('Alabama', 'Gender', 'Male')": 48.6, "('Alabama', 'Income', '$15,000 - $24,999')": 39.3, "('Alabama', 'Income', '$25,000 - $34,999')": 39.7, "('Alabama', 'Income', '$35,000 - $49,999')": 45.7, "('Alabama', 'Income', '$50,000 - $74,999')": 46.55, "('Alabama', 'Income', '$75,000 or greater')": 51.3, "('Alabama', 'Income', 'Data not reported')": 37.9, "('Alabama', 'Income', 'Less than $15,000')": 38.3, "('Alabama', 'Race/Ethnicity', '2 or more races')": 49.8, "('Alabama', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Alabama', 'Race/Ethnicity', 'Hispanic')": 37.9, "('Alabama', 'Race/Ethnicity', 'Non-Hispanic Black')": 40.06666666666667, "('Alabama', 'Race/Ethnicity', 'Non-Hispanic White')": 48.0, "('Alabama', 'Total', 'Total')": 45.4, "('Alaska', 'Age (years)', '18 - 24')": 59.6, "('Alaska', 'Age (years)', '35 - 44')": 60.2, "('Alaska', 'Age (years)', '45 - 54')": 56.7, "('Alaska', 'Age (years)', '55 - 64')": 56.1, "('Alaska', 'Age (years)', '65 or older')": 57.05, "('Alaska', 'Education', 'College graduate')": 67.05, "('Alaska', 'Education', 'Less than high school')": 43.7, "('Alaska', 'Education', 'Some college or technical school')": 56.25, "('Alaska', 'Gender', 'Female')": 57.4, "('Alaska', 'Gender', 'Male')": 58.4, "('Alaska', 'Income', '$25,000 - $34,999')": 47.1, "('Alaska', 'Income', '$50,000 - $74,999')": 55.0, "('Alaska', 'Income', '$75,000 or greater')": 61.900000000000006, "('Alaska', 'Income', 'Data not reported')": 52.7, "('Alaska', 'Income', 'Less than $15,000')": 51.05, "('Alaska', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.6, "('Alaska', 'Race/Ethnicity', 'Hispanic')": 54.0, "('Alaska', 'Race/Ethnicity', 'Non-Hispanic Black')": 48.03333333333333, "('Alaska', 'Race/Ethnicity', 'Non-Hispanic White')": 61.6, "('Alaska', 'Race/Ethnicity', 'Other')": 49.8, "('Alaska', 'Total', 'Total')": 56.96666666666666, "('Arizona', 'Age (years)', '18 - 24')": 55.5, "('Arizona', 'Age (years)', '25 - 34')": 50.2, "('Arizona', 'Age (years)', '35 - 44')": 52.5, "('Arizona', 'Age (years)', '55 - 64')": 47.9, "('Arizona', 'Age (years)', '65 or older')": 57.95, "('Arizona', 'Education', 'High school graduate')": 49.1, "('Arizona', 'Income', '$25,000 - $34,999')": 52.4, "('Arizona', 'Income', 'Data not reported')": 49.7, "('Arizona', 'Race/Ethnicity', 'American Indian/Alaska Native')": 53.9, "('Arizona', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Arizona', 'Race/Ethnicity', 'Hispanic')": 45.55, "('Arizona', 'Race/Ethnicity', 'Non-Hispanic White')": 57.35, "('Arizona', 'Race/Ethnicity', 'Other')": 46.75, "('Arizona', 'Total', 'Total')": 52.7, "('Arkansas', 'Age (years)', '18 - 24')": 56.4, "('Arkansas', 'Age (years)', '25 - 34')": 47.8, "('Arkansas', 'Age (years)', '35 - 44')": 41.35, "('Arkansas', 'Age (years)', '55 - 64')": 41.55, "('Arkansas', 'Age (years)', '65 or older')": 45.6, "('Arkansas', 'Education', 'College graduate')": 57.1, "('Arkansas', 'Education', 'Less than high school')": 32.6, "('Arkansas', 'Education', 'Some college or technical school')": 47.55, "('Arkansas', 'Gender', 'Female')": 41.86666666666667, "('Arkansas', 'Gender', 'Male')": 48.5, "('Arkansas', 'Income', '$15,000 - $24,999')": 48.0, "('Arkansas', 'Income', '$35,000 - $49,999')": 49.0, "('Arkansas', 'Income', '$75,000 or greater')": 54.73333333333333, "('Arkansas', 'Income', 'Less than $15,000')": 28.3, "('Arkansas', 'Race/Ethnicity', '2 or more races')": 51.7, "('Arkansas', 'Race/Ethnicity', 'American Indian/Alaska Native')": 56.6, "('Arkansas', 'Race/Ethnicity', 'Hispanic')": 38.43333333333333, "('Arkansas', 'Race/Ethnicity', 'Non-Hispanic Black')": 38.5, "('Arkansas', 'Race/Ethnicity', 'Non-Hispanic White')": 46.53333333333333, "('Arkansas', 'Race/Ethnicity', 'Other')": 45.2, "('Arkansas', 'Total', 'Total')": 46.8, "('California', 'Age (years)', '18 - 24')": 62.4, "('California', 'Age (years)', '25 - 34')": 52.2, "('California', 'Age (years)', '35 - 44')": 52.65, "('California', 'Age (years)', '45 - 54')": 57.3, "('California', 'Age (years)', '55 - 64')": 57.2, "('California', 'Age (years)', '65 or older')": 64.69999999999999, "('California', 'Education', 'High school graduate')": 55.9, "('California', 'Education', 'Less than high school')": 42.05, "('California', 'Education', 'Some college or technical school')": 59.85, "('California', 'Gender', 'Male')": 55.8, "('California', 'Income', '$15,000 - $24,999')": 49.7, "('California', 'Income', '$25,000 - $34,999')": 51.56666666666666, "('California', 'Income', '$35,000 - $49,999')": 54.6, "('California', 'Income', 'Data not reported')": 55.35, "('California', 'Income', 'Less than $15,000')": 49.9, "('California', 'Race/Ethnicity', '2 or more races')": 61.166666666666664, "('California', 'Race/Ethnicity', 'American Indian/Alaska Native')": 72.3, "('California', 'Race/Ethnicity', 'Asian')": 50.400000000000006, "('California', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('California', 'Race/Ethnicity', 'Non-Hispanic White')": 64.8, "('California', 'Race/Ethnicity', 'Other')": 57.5, "('California', 'Total', 'Total')": 58.2, "('Colorado', 'Age (years)', '18 - 24')": 62.0, "('Colorado', 'Age (years)', '35 - 44')": 59.4, "('Colorado', 'Age (years)', '55 - 64')": 62.4, "('Colorado', 'Age (years)', '65 or older')": 64.15, "('Colorado', 'Education', 'College graduate')": 69.2, "('Colorado', 'Education', 'High school graduate')": 50.7, "('Colorado', 'Education', 'Less than high school')": 45.0, "('Colorado', 'Gender', 'Female')": 61.9, "('Colorado', 'Income', '$15,000 - $24,999')": 51.9, "('Colorado', 'Income', '$25,000 - $34,999')": 57.9, "('Colorado', 'Income', '$35,000 - $49,999')": 55.8, "('Colorado', 'Income', '$50,000 - $74,999')": 61.2, "('Colorado', 'Income', '$75,000 or greater')": 69.0, "('Colorado', 'Income', 'Data not reported')": 53.5, "('Colorado', 'Income', 'Less than $15,000')": 48.06666666666666, "('Colorado', 'Race/Ethnicity', '2 or more races')": 60.0, "('Colorado', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Colorado', 'Race/Ethnicity', 'Hispanic')": 46.2, "('Colorado', 'Race/Ethnicity', 'Non-Hispanic Black')": 54.3, "('Colorado', 'Race/Ethnicity', 'Non-Hispanic White')": 64.8, "('Colorado', 'Race/Ethnicity', 'Other')": 49.8, "('Colorado', 'Total', 'Total')": 61.099999999999994, "('Connecticut', 'Age (years)', '18 - 24')": 51.6, "('Connecticut', 'Age (years)', '35 - 44')": 49.6, "('Connecticut', 'Age (years)', '45 - 54')": 48.9, "('Connecticut', 'Age (years)', '65 or older')": 51.15, "('Connecticut', 'Education', 'College graduate')": 61.1, "('Connecticut', 'Education', 'Some college or technical school')": 51.15, "('Connecticut', 'Gender', 'Female')": 51.0, "('Connecticut', 'Income', '$25,000 - $34,999')": 47.3, "('Connecticut', 'Income', '$35,000 - $49,999')": 49.4, "('Connecticut', 'Income', '$50,000 - $74,999')": 55.5, "('Connecticut', 'Income', '$75,000 or greater')": 58.2, "('Connecticut', 'Income', 'Less than $15,000')": 39.8, "('Connecticut', 'Race/Ethnicity', 'Asian')": 45.13333333333333, "('Connecticut', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.79999999999999, "('Connecticut', 'Race/Ethnicity', 'Hispanic')": 38.5, "('Connecticut', 'Race/Ethnicity', 'Non-Hispanic Black')": 46.9, "('Connecticut', 'Race/Ethnicity', 'Non-Hispanic White')": 55.2, "('Connecticut', 'Race/Ethnicity', 'Other')": 49.45, "('Delaware', 'Age (years)', '18 - 24')": 56.26666666666667, "('Delaware', 'Age (years)', '35 - 44')": 51.8, "('Delaware', 'Age (years)', '45 - 54')": 49.0, "('Delaware', 'Age (years)', '55 - 64')": 48.5, "('Delaware', 'Education', 'College graduate')": 53.4, "('Delaware', 'Education', 'High school graduate')": 47.3, "('Delaware', 'Education', 'Less than high school')": 28.4, "('Delaware', 'Gender', 'Female')": 50.7, "('Delaware', 'Gender', 'Male')": 51.3, "('Delaware', 'Income', '$25,000 - $34,999')": 45.1, "('Delaware', 'Income', '$50,000 - $74,999')": 50.3, "('Delaware', 'Income', '$75,000 or greater')": 57.05, "('Delaware', 'Race/Ethnicity', '2 or more races')": 50.6, "('Delaware', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Delaware', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Delaware', 'Race/Ethnicity', 'Hispanic')": 37.2, "('Delaware', 'Race/Ethnicity', 'Non-Hispanic Black')": 43.7, "('Delaware', 'Race/Ethnicity', 'Non-Hispanic White')": 53.55, "('Delaware', 'Race/Ethnicity', 'Other')": 49.8, "('District of Columbia', 'Age (years)', '18 - 24')": 60.199999999999996, "('District of Columbia', 'Age (years)', '25 - 34')": 54.65, "('District of Columbia', 'Age (years)', '35 - 44')": 50.1, "('District of Columbia', 'Age (years)', '55 - 64')": 54.900000000000006, "('District of Columbia', 'Age (years)', '65 or older')": 47.7, "('District of Columbia', 'Education', 'High school graduate')": 49.9, "('District of Columbia', 'Education', 'Less than high school')": 37.7, "('District of Columbia', 'Education', 'Some college or technical school')": 43.3, "('District of Columbia', 'Gender', 'Male')": 50.6, "('District of Columbia', 'Income', '$15,000 - $24,999')": 41.9, "('District of Columbia', 'Income', '$35,000 - $49,999')": 47.05, "('District of Columbia', 'Income', '$50,000 - $74,999')": 56.85, "('District of Columbia', 'Income', '$75,000 or greater')": 65.6, "('District of Columbia', 'Race/Ethnicity', 'Hispanic')": 51.45, "('District of Columbia', 'Race/Ethnicity', 'Non-Hispanic Black')": 45.4, "('District of Columbia', 'Race/Ethnicity', 'Other')": 46.849999999999994, "('District of Columbia', 'Total', 'Total')": 48.8, "('Florida', 'Age (years)', '25 - 34')": 49.95, "('Florida', 'Age (years)', '35 - 44')": 46.8, "('Florida', 'Age (years)', '45 - 54')": 52.1, "('Florida', 'Age (years)', '55 - 64')": 54.599999999999994, "('Florida', 'Education', 'College graduate')": 58.6, "('Florida', 'Education', 'High school graduate')": 49.25, "('Florida', 'Education', 'Some college or technical school')": 52.93333333333334, "('Florida', 'Income', '$15,000 - $24,999')": 45.5, "('Florida', 'Income', '$25,000 - $34,999')": 45.85, "('Florida', 'Income', '$35,000 - $49,999')": 50.15, "('Florida', 'Income', 'Data not reported')": 49.3, "('Florida', 'Income', 'Less than $15,000')": 37.6, "('Florida', 'Race/Ethnicity', 'American Indian/Alaska Native')": 52.7, "('Florida', 'Race/Ethnicity', 'Non-Hispanic Black')": 48.7, "('Florida', 'Race/Ethnicity', 'Non-Hispanic White')": 55.35, "('Florida', 'Race/Ethnicity', 'Other')": 56.833333333333336, "('Florida', 'Total', 'Total')": 49.5, "('Georgia', 'Age (years)', '18 - 24')": 52.1, "('Georgia', 'Age (years)', '35 - 44')": 47.36666666666667, "('Georgia', 'Age (years)', '55 - 64')": 43.1, "('Georgia', 'Education', 'High school graduate')": 44.7, "('Georgia', 'Education', 'Less than high school')": 38.05, "('Georgia', 'Education', 'Some college or technical school')": 53.1, "('Georgia', 'Gender', 'Female')": 46.300000000000004, "('Georgia', 'Gender', 'Male')": 52.8, "('Georgia', 'Income', '$15,000 - $24,999')": 38.8, "('Georgia', 'Income', '$25,000 - $34,999')": 51.2, "('Georgia', 'Income', 'Less than $15,000')": 38.95, "('Georgia', 'Race/Ethnicity', '2 or more races')": 43.2, "('Georgia', 'Race/Ethnicity', 'Hispanic')": 39.5, "('Georgia', 'Race/Ethnicity', 'Non-Hispanic Black')": 47.2, "('Georgia', 'Race/Ethnicity', 'Non-Hispanic White')": 51.03333333333333, "('Georgia', 'Race/Ethnicity', 'Other')": 47.9, "('Georgia', 'Total', 'Total')": 50.8, "('Guam', 'Age (years)', '18 - 24')": 46.6, "('Guam', 'Age (years)', '35 - 44')": 47.9, "('Guam', 'Age (years)', '45 - 54')": 47.6, "('Guam', 'Education', 'Less than high school')": 30.2, "('Guam', 'Education', 'Some college or technical school')": 50.2, "('Guam', 'Gender', 'Male')": 46.0, "('Guam', 'Income', '$35,000 - $49,999')": 46.4, "('Guam', 'Income', 'Less than $15,000')": 40.900000000000006, "('Guam', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Guam', 'Race/Ethnicity', 'Asian')": 38.3, "('Guam', 'Race/Ethnicity', 'Hispanic')": 40.2, "('Guam', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('Hawaii', 'Age (years)', '18 - 24')": 52.650000000000006, "('Hawaii', 'Age (years)', '25 - 34')": 57.4, "('Hawaii', 'Age (years)', '35 - 44')": 54.0, "('Hawaii', 'Age (years)', '45 - 54')": 57.2, "('Hawaii', 'Age (years)', '55 - 64')": 58.75, "('Hawaii', 'Age (years)', '65 or older')": 62.6, "('Hawaii', 'Education', 'College graduate')": 60.7, "('Hawaii', 'Education', 'High school graduate')": 56.9, "('Hawaii', 'Education', 'Less than high school')": 50.0, "('Hawaii', 'Education', 'Some college or technical school')": 58.7, "('Hawaii', 'Gender', 'Female')": 53.6, "('Hawaii', 'Gender', 'Male')": 61.15, "('Hawaii', 'Income', '$15,000 - $24,999')": 52.6, "('Hawaii', 'Income', '$25,000 - $34,999')": 53.9, "('Hawaii', 'Income', '$50,000 - $74,999')": 56.7, "('Hawaii', 'Income', '$75,000 or greater')": 62.3, "('Hawaii', 'Race/Ethnicity', 'Asian')": 50.2, "('Hawaii', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 54.2, "('Hawaii', 'Race/Ethnicity', 'Hispanic')": 59.9, "('Hawaii', 'Race/Ethnicity', 'Non-Hispanic Black')": 43.0, "('Hawaii', 'Race/Ethnicity', 'Non-Hispanic White')": 70.0, "('Hawaii', 'Race/Ethnicity', 'Other')": 69.3, "('Hawaii', 'Total', 'Total')": 56.5, "('Idaho', 'Age (years)', '18 - 24')": 55.3, "('Idaho', 'Age (years)', '45 - 54')": 56.1, "('Idaho', 'Age (years)', '55 - 64')": 58.333333333333336, "('Idaho', 'Education', 'College graduate')": 63.599999999999994, "('Idaho', 'Education', 'High school graduate')": 49.1, "('Idaho', 'Education', 'Less than high school')": 46.4, "('Idaho', 'Education', 'Some college or technical school')": 59.5, "('Idaho', 'Gender', 'Female')": 57.8, "('Idaho', 'Income', '$15,000 - $24,999')": 50.5, "('Idaho', 'Income', '$25,000 - $34,999')": 54.0, "('Idaho', 'Income', '$35,000 - $49,999')": 57.9, "('Idaho', 'Income', '$75,000 or greater')": 65.9, "('Idaho', 'Income', 'Data not reported')": 56.3, "('Idaho', 'Income', 'Less than $15,000')": 51.9, "('Idaho', 'Race/Ethnicity', '2 or more races')": 74.6, "('Idaho', 'Race/Ethnicity', 'American Indian/Alaska Native')": 70.9, "('Idaho', 'Race/Ethnicity', 'Asian')": 49.8, "('Idaho', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Idaho', 'Race/Ethnicity', 'Hispanic')": 42.4, "('Idaho', 'Race/Ethnicity', 'Non-Hispanic White')": 57.1, "('Illinois', 'Age (years)', '18 - 24')": 57.45, "('Illinois', 'Age (years)', '45 - 54')": 50.9, "('Illinois', 'Age (years)', '55 - 64')": 51.0, "('Illinois', 'Education', 'High school graduate')": 46.9, "('Illinois', 'Education', 'Less than high school')": 33.4, "('Illinois', 'Gender', 'Male')": 52.1, "('Illinois', 'Income', '$15,000 - $24,999')": 41.1, "('Illinois', 'Income', '$35,000 - $49,999')": 49.9, "('Illinois', 'Income', '$75,000 or greater')": 57.0, "('Illinois', 'Income', 'Data not reported')": 50.2, "('Illinois', 'Race/Ethnicity', '2 or more races')": 55.4, "('Illinois', 'Race/Ethnicity', 'Asian')": 43.6, "('Illinois', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Illinois', 'Race/Ethnicity', 'Hispanic')": 40.0, "('Illinois', 'Race/Ethnicity', 'Non-Hispanic Black')": 46.45, "('Illinois', 'Race/Ethnicity', 'Non-Hispanic White')": 53.849999999999994, "('Illinois', 'Total', 'Total')": 50.75, "('Indiana', 'Age (years)', '18 - 24')": 50.8, "('Indiana', 'Age (years)', '35 - 44')": 42.7, "('Indiana', 'Age (years)', '45 - 54')": 41.7, "('Indiana', 'Age (years)', '65 or older')": 47.43333333333334, "('Indiana', 'Education', 'Less than high school')": 33.2, "('Indiana', 'Education', 'Some college or technical school')": 47.1, "('Indiana', 'Gender', 'Female')": 41.1, "('Indiana', 'Gender', 'Male')": 49.0, "('Indiana', 'Income', '$15,000 - $24,999')": 37.55, "('Indiana', 'Income', '$25,000 - $34,999')": 38.4, "('Indiana', 'Income', '$50,000 - $74,999')": 49.9, "('Indiana', 'Income', 'Less than $15,000')": 37.65, "('Indiana', 'Race/Ethnicity', '2 or more races')": 57.4, "('Indiana', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Indiana', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Indiana', 'Race/Ethnicity', 'Hispanic')": 35.9, "('Indiana', 'Race/Ethnicity', 'Non-Hispanic Black')": 41.35, "('Indiana', 'Race/Ethnicity', 'Non-Hispanic White')": 47.6, "('Indiana', 'Race/Ethnicity', 'Other')": 49.8, "('Iowa', 'Age (years)', '55 - 64')": 47.3, "('Iowa', 'Age (years)', '65 or older')": 51.53333333333333, "('Iowa', 'Education', 'College graduate')": 57.6, "('Iowa', 'Education', 'Less than high school')": 37.1, "('Iowa', 'Education', 'Some college or technical school')": 49.2, "('Iowa', 'Income', '$25,000 - $34,999')": 46.65, "('Iowa', 'Income', '$50,000 - $74,999')": 49.199999999999996, "('Iowa', 'Income', 'Less than $15,000')": 40.75, "('Iowa', 'Race/Ethnicity', '2 or more races')": 49.8, "('Iowa', 'Race/Ethnicity', 'Asian')": 38.3, "('Iowa', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Iowa', 'Race/Ethnicity', 'Hispanic')": 35.3, "('Iowa', 'Race/Ethnicity', 'Other')": 49.79999999999999, "('Kansas', 'Age (years)', '25 - 34')": 45.6, "('Kansas', 'Age (years)', '35 - 44')": 48.2, "('Kansas', 'Age (years)', '55 - 64')": 48.15, "('Kansas', 'Age (years)', '65 or older')": 47.2, "('Kansas', 'Education', 'College graduate')": 57.5, "('Kansas', 'Education', 'High school graduate')": 43.849999999999994, "('Kansas', 'Gender', 'Female')": 47.9, "('Kansas', 'Gender', 'Male')": 50.0, "('Kansas', 'Income', '$25,000 - $34,999')": 45.35, "('Kansas', 'Income', '$35,000 - $49,999')": 46.0, "('Kansas', 'Income', '$50,000 - $74,999')": 53.7, "('Kansas', 'Income', '$75,000 or greater')": 56.9, "('Kansas', 'Income', 'Data not reported')": 46.9, "('Kansas', 'Income', 'Less than $15,000')": 39.63333333333333, "('Kansas', 'Race/Ethnicity', '2 or more races')": 47.5, "('Kansas', 'Race/Ethnicity', 'American Indian/Alaska Native')": 50.1, "('Kansas', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Kansas', 'Race/Ethnicity', 'Hispanic')": 45.45, "('Kansas', 'Race/Ethnicity', 'Non-Hispanic Black')": 41.35, "('Kansas', 'Race/Ethnicity', 'Non-Hispanic White')": 49.7, "('Kansas', 'Race/Ethnicity', 'Other')": 49.8, "('Kansas', 'Total', 'Total')": 46.8, "('Kentucky', 'Age (years)', '18 - 24')": 49.1, "('Kentucky', 'Age (years)', '25 - 34')": 51.3, "('Kentucky', 'Age (years)', '45 - 54')": 41.300000000000004, "('Kentucky', 'Age (years)', '55 - 64')": 41.6, "('Kentucky', 'Age (years)', '65 or older')": 44.599999999999994, "('Kentucky', 'Education', 'Less than high school')": 35.7, "('Kentucky', 'Education', 'Some college or technical school')": 48.0, "('Kentucky', 'Income', '$25,000 - $34,999')": 47.8, "('Kentucky', 'Income', '$35,000 - $49,999')": 48.5, "('Kentucky', 'Income', '$75,000 or greater')": 55.9, "('Kentucky', 'Income', 'Data not reported')": 45.9, "('Kentucky', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Kentucky', 'Race/Ethnicity', 'Asian')": 49.8, "('Kentucky', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Kentucky', 'Race/Ethnicity', 'Other')": 49.8, "('Kentucky', 'Total', 'Total')": 45.35, "('Louisiana', 'Age (years)', '18 - 24')": 57.3, "('Louisiana', 'Age (years)', '45 - 54')": 42.55, "('Louisiana', 'Age (years)', '55 - 64')": 43.0, "('Louisiana', 'Age (years)', '65 or older')": 44.3, "('Louisiana', 'Education', 'College graduate')": 55.2, "('Louisiana', 'Education', 'Less than high school')": 34.3, "('Louisiana', 'Education', 'Some college or technical school')": 43.6, "('Louisiana', 'Gender', 'Female')": 42.6, "('Louisiana', 'Income', '$15,000 - $24,999')": 41.900000000000006, "('Louisiana', 'Income', '$25,000 - $34,999')": 45.65, "('Louisiana', 'Income', '$75,000 or greater')": 54.1, "('Louisiana', 'Income', 'Data not reported')": 43.6, "('Louisiana', 'Income', 'Less than $15,000')": 36.2, "('Louisiana', 'Race/Ethnicity', '2 or more races')": 43.45, "('Louisiana', 'Race/Ethnicity', 'Asian')": 49.79999999999999, "('Louisiana', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Louisiana', 'Race/Ethnicity', 'Hispanic')": 44.150000000000006, "('Louisiana', 'Race/Ethnicity', 'Non-Hispanic Black')": 39.55, "('Louisiana', 'Race/Ethnicity', 'Non-Hispanic White')": 43.6, "('Louisiana', 'Race/Ethnicity', 'Other')": 39.5, "('Louisiana', 'Total', 'Total')": 44.1, "('Maine', 'Age (years)', '18 - 24')": 56.3, "('Maine', 'Age (years)', '45 - 54')": 49.8, "('Maine', 'Age (years)', '55 - 64')": 53.2, "('Maine', 'Age (years)', '65 or older')": 52.4, "('Maine', 'Education', 'College graduate')": 65.3, "('Maine', 'Education', 'High school graduate')": 48.099999999999994, "('Maine', 'Education', 'Some college or technical school')": 51.3, "('Maine', 'Gender', 'Female')": 52.65, "('Maine', 'Gender', 'Male')": 53.5, "('Maine', 'Income', '$15,000 - $24,999')": 46.9, "('Maine', 'Income', '$25,000 - $34,999')": 47.2, "('Maine', 'Income', '$35,000 - $49,999')": 54.7, "('Maine', 'Income', '$75,000 or greater')": 63.93333333333334, "('Maine', 'Income', 'Data not reported')": 48.25, "('Maine', 'Income', 'Less than $15,000')": 41.8, "('Maine', 'Race/Ethnicity', 'American Indian/Alaska Native')": 55.9, "('Maine', 'Race/Ethnicity', 'Asian')": 49.8, "('Maine', 'Race/Ethnicity', 'Non-Hispanic Black')": 47.1, "('Maine', 'Race/Ethnicity', 'Non-Hispanic White')": 53.349999999999994, "('Maine', 'Race/Ethnicity', 'Other')": 49.8, "('Maine', 'Total', 'Total')": 52.45, "('Maryland', 'Age (years)', '18 - 24')": 53.849999999999994, "('Maryland', 'Age (years)', '25 - 34')": 46.85, "('Maryland', 'Age (years)', '65 or older')": 46.8, "('Maryland', 'Education', 'College graduate')": 59.35, "('Maryland', 'Education', 'High school graduate')": 44.5, "('Maryland', 'Education', 'Less than high school')": 35.7, "('Maryland', 'Education', 'Some college or technical school')": 55.7, "('Maryland', 'Income', '$15,000 - $24,999')": 38.95, "('Maryland', 'Income', '$25,000 - $34,999')": 47.5, "('Maryland', 'Income', '$75,000 or greater')": 58.5, "('Maryland', 'Income', 'Less than $15,000')": 38.1, "('Maryland', 'Race/Ethnicity', '2 or more races')": 51.5, "('Maryland', 'Race/Ethnicity', 'Asian')": 49.8, "('Maryland', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Maryland', 'Race/Ethnicity', 'Hispanic')": 47.1, "('Maryland', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.05, "('Maryland', 'Race/Ethnicity', 'Other')": 35.1, "('Maryland', 'Total', 'Total')": 49.650000000000006, "('Massachusetts', 'Age (years)', '18 - 24')": 56.95, "('Massachusetts', 'Age (years)', '35 - 44')": 52.7, "('Massachusetts', 'Age (years)', '65 or older')": 52.2, "('Massachusetts', 'Education', 'College graduate')": 61.75, "('Massachusetts', 'Education', 'High school graduate')": 48.0, "('Massachusetts', 'Education', 'Less than high school')": 42.4, "('Massachusetts', 'Education', 'Some college or technical school')": 57.9, "('Massachusetts', 'Gender', 'Female')": 54.3, "('Massachusetts', 'Gender', 'Male')": 56.300000000000004, "('Massachusetts', 'Income', '$15,000 - $24,999')": 44.9, "('Massachusetts', 'Income', '$35,000 - $49,999')": 53.2, "('Massachusetts', 'Income', '$75,000 or greater')": 59.2, "('Massachusetts', 'Income', 'Less than $15,000')": 37.35, "('Massachusetts', 'Race/Ethnicity', '2 or more races')": 48.45, "('Massachusetts', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Massachusetts', 'Race/Ethnicity', 'Asian')": 42.4, "('Massachusetts', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Massachusetts', 'Race/Ethnicity', 'Hispanic')": 41.75, "('Massachusetts', 'Race/Ethnicity', 'Non-Hispanic Black')": 45.7, "('Massachusetts', 'Race/Ethnicity', 'Non-Hispanic White')": 56.15, "('Massachusetts', 'Race/Ethnicity', 'Other')": 49.8, "('Massachusetts', 'Total', 'Total')": 54.0, "('Michigan', 'Age (years)', '18 - 24')": 54.4, "('Michigan', 'Age (years)', '25 - 34')": 51.3, "('Michigan', 'Age (years)', '35 - 44')": 50.6, "('Michigan', 'Age (years)', '45 - 54')": 50.3, "('Michigan', 'Age (years)', '65 or older')": 54.5, "('Michigan', 'Education', 'College graduate')": 59.35, "('Michigan', 'Education', 'Less than high school')": 40.8, "('Michigan', 'Education', 'Some college or technical school')": 51.0, "('Michigan', 'Gender', 'Female')": 51.3, "('Michigan', 'Gender', 'Male')": 53.8, "('Michigan', 'Income', '$25,000 - $34,999')": 48.3, "('Michigan', 'Income', '$35,000 - $49,999')": 49.6, "('Michigan', 'Income', '$50,000 - $74,999')": 49.1, "('Michigan', 'Income', '$75,000 or greater')": 57.5, "('Michigan', 'Race/Ethnicity', '2 or more races')": 54.8, "('Michigan', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.2, "('Michigan', 'Race/Ethnicity', 'Asian')": 47.6, "('Michigan', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Michigan', 'Race/Ethnicity', 'Hispanic')": 41.9, "('Michigan', 'Race/Ethnicity', 'Non-Hispanic Black')": 41.800000000000004, "('Michigan', 'Race/Ethnicity', 'Non-Hispanic White')": 54.55, "('Michigan', 'Total', 'Total')": 49.5, "('Minnesota', 'Age (years)', '25 - 34')": 51.06666666666666, "('Minnesota', 'Age (years)', '35 - 44')": 47.7, "('Minnesota', 'Age (years)', '45 - 54')": 56.2, "('Minnesota', 'Age (years)', '65 or older')": 54.6, "('Minnesota', 'Education', 'College graduate')": 63.5, "('Minnesota', 'Education', 'High school graduate')": 49.1, "('Minnesota', 'Education', 'Less than high school')": 43.849999999999994, "('Minnesota', 'Education', 'Some college or technical school')": 53.1, "('Minnesota', 'Gender', 'Female')": 52.45, "('Minnesota', 'Gender', 'Male')": 55.5, "('Minnesota', 'Income', '$15,000 - $24,999')": 48.9, "('Minnesota', 'Income', '$25,000 - $34,999')": 47.55, "('Minnesota', 'Income', '$35,000 - $49,999')": 48.2, "('Minnesota', 'Race/Ethnicity', '2 or more races')": 52.1, "('Minnesota', 'Race/Ethnicity', 'American Indian/Alaska Native')": 55.166666666666664, "('Minnesota', 'Race/Ethnicity', 'Asian')": 50.15, "('Minnesota', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Minnesota', 'Race/Ethnicity', 'Hispanic')": 38.15, "('Minnesota', 'Race/Ethnicity', 'Other')": 49.79999999999999, "('Minnesota', 'Total', 'Total')": 56.25, "('Mississippi', 'Age (years)', '18 - 24')": 50.5, "('Mississippi', 'Age (years)', '35 - 44')": 43.2, "('Mississippi', 'Age (years)', '45 - 54')": 32.1, "('Mississippi', 'Age (years)', '55 - 64')": 35.95, "('Mississippi', 'Age (years)', '65 or older')": 38.25, "('Mississippi', 'Education', 'College graduate')": 50.95, "('Mississippi', 'Education', 'Less than high school')": 28.7, "('Mississippi', 'Income', '$25,000 - $34,999')": 41.0, "('Mississippi', 'Income', '$35,000 - $49,999')": 45.15, "('Mississippi', 'Income', '$50,000 - $74,999')": 46.43333333333334, "('Mississippi', 'Income', 'Data not reported')": 32.3, "('Mississippi', 'Income', 'Less than $15,000')": 26.25, "('Mississippi', 'Race/Ethnicity', '2 or more races')": 49.8, "('Mississippi', 'Race/Ethnicity', 'Asian')": 49.79999999999999, "('Mississippi', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Mississippi', 'Race/Ethnicity', 'Non-Hispanic Black')": 36.6, "('Mississippi', 'Race/Ethnicity', 'Non-Hispanic White')": 42.4, "('Mississippi', 'Race/Ethnicity', 'Other')": 49.8, "('Mississippi', 'Total', 'Total')": 44.7, "('Missouri', 'Age (years)', '18 - 24')": 51.95, "('Missouri', 'Age (years)', '25 - 34')": 46.75, "('Missouri', 'Age (years)', '55 - 64')": 46.8, "('Missouri', 'Gender', 'Female')": 42.5, "('Missouri', 'Gender', 'Male')": 49.95, "('Missouri', 'Income', '$50,000 - $74,999')": 53.9, "('Missouri', 'Income', '$75,000 or greater')": 54.3, "('Missouri', 'Race/Ethnicity', 'American Indian/Alaska Native')": 52.2, "('Missouri', 'Race/Ethnicity', 'Asian')": 45.5, "('Missouri', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Missouri', 'Race/Ethnicity', 'Hispanic')": 44.75, "('Missouri', 'Race/Ethnicity', 'Non-Hispanic White')": 50.3, "('Missouri', 'Race/Ethnicity', 'Other')": 49.8, "('Missouri', 'Total', 'Total')": 48.6, "('Montana', 'Age (years)', '18 - 24')": 61.7, "('Montana', 'Age (years)', '25 - 34')": 56.9, "('Montana', 'Age (years)', '35 - 44')": 54.7, "('Montana', 'Age (years)', '55 - 64')": 62.3, "('Montana', 'Age (years)', '65 or older')": 54.2, "('Montana', 'Education', 'College graduate')": 67.9, "('Montana', 'Education', 'Less than high school')": 40.5, "('Montana', 'Gender', 'Female')": 57.7, "('Montana', 'Gender', 'Male')": 54.2, "('Montana', 'Income', '$15,000 - $24,999')": 51.85, "('Montana', 'Income', '$25,000 - $34,999')": 47.2, "('Montana', 'Income', '$35,000 - $49,999')": 55.349999999999994, "('Montana', 'Income', '$75,000 or greater')": 64.9, "('Montana', 'Income', 'Data not reported')": 56.1, "('Montana', 'Income', 'Less than $15,000')": 53.6, "('Montana', 'Race/Ethnicity', 'Asian')": 49.8, "('Montana', 'Race/Ethnicity', 'Hispanic')": 49.0, "('Montana', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('National', 'Age (years)', '25 - 34')": 48.9, "('National', 'Age (years)', '35 - 44')": 50.15, "('National', 'Age (years)', '45 - 54')": 50.400000000000006, "('National', 'Age (years)', '65 or older')": 54.6, "('National', 'Education', 'High school graduate')": 46.93333333333334, "('National', 'Education', 'Less than high school')": 38.26666666666667, "('National', 'Income', '$15,000 - $24,999')": 43.4, "('National', 'Income', '$35,000 - $49,999')": 50.8, "('National', 'Income', '$75,000 or greater')": 60.8, "('National', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.0, "('National', 'Race/Ethnicity', 'Asian')": 51.55, "('National', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 46.8, "('National', 'Race/Ethnicity', 'Hispanic')": 44.800000000000004, "('National', 'Race/Ethnicity', 'Non-Hispanic Black')": 43.9, "('National', 'Race/Ethnicity', 'Other')": 53.46666666666667, "('National', 'Total', 'Total')": 51.5, "('Nebraska', 'Age (years)', '18 - 24')": 54.8, "('Nebraska', 'Age (years)', '25 - 34')": 45.3, "('Nebraska', 'Age (years)', '35 - 44')": 47.8, "('Nebraska', 'Age (years)', '55 - 64')": 48.7, "('Nebraska', 'Age (years)', '65 or older')": 54.9, "('Nebraska', 'Education', 'College graduate')": 57.5, "('Nebraska', 'Education', 'Less than high school')": 38.0, "('Nebraska', 'Education', 'Some college or technical school')": 51.2, "('Nebraska', 'Gender', 'Male')": 51.1, "('Nebraska', 'Income', '$35,000 - $49,999')": 48.6, "('Nebraska', 'Income', '$50,000 - $74,999')": 49.3, "('Nebraska', 'Income', '$75,000 or greater')": 57.2, "('Nebraska', 'Income', 'Data not reported')": 45.8, "('Nebraska', 'Race/Ethnicity', '2 or more races')": 56.8, "('Nebraska', 'Race/Ethnicity', 'Asian')": 45.4, "('Nebraska', 'Race/Ethnicity', 'Hispanic')": 34.65, "('Nebraska', 'Race/Ethnicity', 'Non-Hispanic White')": 51.333333333333336, "('Nebraska', 'Race/Ethnicity', 'Other')": 49.79999999999999, "('Nebraska', 'Total', 'Total')": 49.800000000000004, "('Nevada', 'Age (years)', '18 - 24')": 49.3, "('Nevada', 'Age (years)', '45 - 54')": 53.55, "('Nevada', 'Age (years)', '65 or older')": 58.0, "('Nevada', 'Education', 'College graduate')": 61.4, "('Nevada', 'Education', 'High school graduate')": 53.65, "('Nevada', 'Education', 'Less than high school')": 36.1, "('Nevada', 'Education', 'Some college or technical school')": 48.0, "('Nevada', 'Gender', 'Male')": 51.4, "('Nevada', 'Income', '$15,000 - $24,999')": 43.76666666666667, "('Nevada', 'Income', '$50,000 - $74,999')": 45.9, "('Nevada', 'Income', '$75,000 or greater')": 61.0, "('Nevada', 'Income', 'Data not reported')": 47.96666666666667, "('Nevada', 'Race/Ethnicity', '2 or more races')": 41.7, "('Nevada', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Nevada', 'Race/Ethnicity', 'Hispanic')": 40.5, "('Nevada', 'Race/Ethnicity', 'Non-Hispanic Black')": 60.3, "('Nevada', 'Race/Ethnicity', 'Non-Hispanic White')": 54.55, "('New Hampshire', 'Age (years)', '18 - 24')": 64.4, "('New Hampshire', 'Age (years)', '25 - 34')": 49.6, "('New Hampshire', 'Age (years)', '45 - 54')": 55.4, "('New Hampshire', 'Age (years)', '65 or older')": 59.0, "('New Hampshire', 'Education', 'College graduate')": 65.2, "('New Hampshire', 'Education', 'Less than high school')": 44.1, "('New Hampshire', 'Gender', 'Female')": 54.6, "('New Hampshire', 'Gender', 'Male')": 55.5, "('New Hampshire', 'Income', '$15,000 - $24,999')": 44.7, "('New Hampshire', 'Income', '$25,000 - $34,999')": 47.5, "('New Hampshire', 'Income', '$35,000 - $49,999')": 59.25, "('New Hampshire', 'Income', '$50,000 - $74,999')": 57.7, "('New Hampshire', 'Income', '$75,000 or greater')": 64.2, "('New Hampshire', 'Income', 'Data not reported')": 51.9, "('New Hampshire', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('New Hampshire', 'Race/Ethnicity', 'Asian')": 53.4, "('New Hampshire', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('New Hampshire', 'Race/Ethnicity', 'Hispanic')": 42.849999999999994, "('New Hampshire', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('New Hampshire', 'Race/Ethnicity', 'Non-Hispanic White')": 56.7, "('New Hampshire', 'Race/Ethnicity', 'Other')": 49.8, "('New Hampshire', 'Total', 'Total')": 54.4, "('New Jersey', 'Age (years)', '25 - 34')": 46.3, "('New Jersey', 'Age (years)', '35 - 44')": 50.6, "('New Jersey', 'Age (years)', '45 - 54')": 49.599999999999994, "('New Jersey', 'Age (years)', '65 or older')": 49.7, "('New Jersey', 'Education', 'High school graduate')": 46.0, "('New Jersey', 'Education', 'Some college or technical school')": 49.8, "('New Jersey', 'Gender', 'Female')": 47.9, "('New Jersey', 'Gender', 'Male')": 51.6, "('New Jersey', 'Income', '$50,000 - $74,999')": 49.4, "('New Jersey', 'Income', '$75,000 or greater')": 57.45, "('New Jersey', 'Income', 'Less than $15,000')": 43.9, "('New Jersey', 'Race/Ethnicity', '2 or more races')": 39.599999999999994, "('New Jersey', 'Race/Ethnicity', 'American Indian/Alaska Native')": 47.8, "('New Jersey', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('New Jersey', 'Total', 'Total')": 50.5, "('New Mexico', 'Age (years)', '18 - 24')": 52.8, "('New Mexico', 'Age (years)', '25 - 34')": 53.7, "('New Mexico', 'Age (years)', '35 - 44')": 55.3, "('New Mexico', 'Age (years)', '65 or older')": 60.45, "('New Mexico', 'Education', 'High school graduate')": 50.6, "('New Mexico', 'Education', 'Some college or technical school')": 56.7, "('New Mexico', 'Gender', 'Male')": 53.0, "('New Mexico', 'Income', '$15,000 - $24,999')": 52.2, "('New Mexico', 'Income', '$35,000 - $49,999')": 54.45, "('New Mexico', 'Income', '$50,000 - $74,999')": 55.63333333333333, "('New Mexico', 'Income', '$75,000 or greater')": 65.0, "('New Mexico', 'Income', 'Data not reported')": 53.8, "('New Mexico', 'Income', 'Less than $15,000')": 50.4, "('New Mexico', 'Race/Ethnicity', 'American Indian/Alaska Native')": 55.3, "('New Mexico', 'Race/Ethnicity', 'Asian')": 63.349999999999994, "('New Mexico', 'Race/Ethnicity', 'Hispanic')": 47.3, "('New Mexico', 'Race/Ethnicity', 'Non-Hispanic Black')": 62.9, "('New Mexico', 'Race/Ethnicity', 'Non-Hispanic White')": 60.0, "('New Mexico', 'Total', 'Total')": 53.1, "('New York', 'Age (years)', '18 - 24')": 61.0, "('New York', 'Age (years)', '25 - 34')": 47.900000000000006, "('New York', 'Age (years)', '45 - 54')": 48.3, "('New York', 'Age (years)', '55 - 64')": 49.599999999999994, "('New York', 'Education', 'High school graduate')": 46.8, "('New York', 'Education', 'Less than high school')": 34.55, "('New York', 'Gender', 'Female')": 46.73333333333333, "('New York', 'Gender', 'Male')": 51.0, "('New York', 'Income', '$15,000 - $24,999')": 40.5, "('New York', 'Income', '$35,000 - $49,999')": 50.2, "('New York', 'Income', '$75,000 or greater')": 53.4, "('New York', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.0, "('New York', 'Race/Ethnicity', 'Asian')": 45.85, "('New York', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('New York', 'Race/Ethnicity', 'Hispanic')": 40.3, "('New York', 'Race/Ethnicity', 'Non-Hispanic Black')": 42.8, "('North Carolina', 'Age (years)', '18 - 24')": 49.5, "('North Carolina', 'Age (years)', '25 - 34')": 45.0, "('North Carolina', 'Age (years)', '45 - 54')": 45.9, "('North Carolina', 'Age (years)', '55 - 64')": 43.9, "('North Carolina', 'Age (years)', '65 or older')": 53.25, "('North Carolina', 'Education', 'College graduate')": 58.9, "('North Carolina', 'Education', 'High school graduate')": 45.4, "('North Carolina', 'Education', 'Less than high school')": 34.3, "('North Carolina', 'Education', 'Some college or technical school')": 51.0, "('North Carolina', 'Gender', 'Female')": 46.8, "('North Carolina', 'Gender', 'Male')": 49.4, "('North Carolina', 'Income', '$15,000 - $24,999')": 42.0, "('North Carolina', 'Income', '$25,000 - $34,999')": 46.6, "('North Carolina', 'Income', '$50,000 - $74,999')": 52.5, "('North Carolina', 'Income', '$75,000 or greater')": 61.150000000000006, "('North Carolina', 'Income', 'Data not reported')": 46.8, "('North Carolina', 'Income', 'Less than $15,000')": 34.2, "('North Carolina', 'Race/Ethnicity', '2 or more races')": 48.4, "('North Carolina', 'Race/Ethnicity', 'Asian')": 45.5, "('North Carolina', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('North Carolina', 'Race/Ethnicity', 'Hispanic')": 36.85, "('North Carolina', 'Race/Ethnicity', 'Non-Hispanic White')": 52.099999999999994, "('North Carolina', 'Total', 'Total')": 49.2, "('North Dakota', 'Age (years)', '18 - 24')": 47.6, "('North Dakota', 'Age (years)', '25 - 34')": 48.3, "('North Dakota', 'Age (years)', '35 - 44')": 43.0, "('North Dakota', 'Age (years)', '45 - 54')": 48.1, "('North Dakota', 'Age (years)', '65 or older')": 45.3, "('North Dakota', 'Education', 'College graduate')": 52.2, "('North Dakota', 'Education', 'High school graduate')": 41.2, "('North Dakota', 'Education', 'Less than high school')": 34.9, "('North Dakota', 'Gender', 'Female')": 47.55, "('North Dakota', 'Gender', 'Male')": 43.2, "('North Dakota', 'Income', '$25,000 - $34,999')": 40.53333333333333, "('North Dakota', 'Income', '$35,000 - $49,999')": 45.1, "('North Dakota', 'Income', '$50,000 - $74,999')": 48.23333333333333, "('North Dakota', 'Income', '$75,000 or greater')": 53.7, "('North Dakota', 'Income', 'Data not reported')": 36.3, "('North Dakota', 'Race/Ethnicity', 'Asian')": 49.8, "('North Dakota', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('North Dakota', 'Race/Ethnicity', 'Hispanic')": 51.5, "('North Dakota', 'Race/Ethnicity', 'Non-Hispanic Black')": 37.6, "('North Dakota', 'Race/Ethnicity', 'Non-Hispanic White')": 47.4, "('North Dakota', 'Total', 'Total')": 47.0, "('Ohio', 'Age (years)', '18 - 24')": 60.4, "('Ohio', 'Age (years)', '25 - 34')": 46.6, "('Ohio', 'Age (years)', '55 - 64')": 48.9, "('Ohio', 'Education', 'High school graduate')": 46.8, "('Ohio', 'Education', 'Less than high school')": 34.2, "('Ohio', 'Education', 'Some college or technical school')": 51.3, "('Ohio', 'Gender', 'Female')": 49.5, "('Ohio', 'Gender', 'Male')": 51.099999999999994, "('Ohio', 'Income', '$25,000 - $34,999')": 44.3, "('Ohio', 'Income', '$35,000 - $49,999')": 50.5, "('Ohio', 'Income', '$50,000 - $74,999')": 51.650000000000006, "('Ohio', 'Income', 'Data not reported')": 44.7, "('Ohio', 'Race/Ethnicity', '2 or more races')": 49.5, "('Ohio', 'Race/Ethnicity', 'Hispanic')": 52.3, "('Ohio', 'Race/Ethnicity', 'Non-Hispanic Black')": 41.800000000000004, "('Ohio', 'Race/Ethnicity', 'Non-Hispanic White')": 50.2, "('Oklahoma', 'Age (years)', '35 - 44')": 45.25, "('Oklahoma', 'Age (years)', '45 - 54')": 37.6, "('Oklahoma', 'Age (years)', '65 or older')": 44.6, "('Oklahoma', 'Education', 'College graduate')": 53.85, "('Oklahoma', 'Education', 'High school graduate')": 36.5, "('Oklahoma', 'Education', 'Less than high school')": 31.65, "('Oklahoma', 'Education', 'Some college or technical school')": 39.7, "('Oklahoma', 'Gender', 'Female')": 44.2, "('Oklahoma', 'Gender', 'Male')": 46.0, "('Oklahoma', 'Income', '$15,000 - $24,999')": 44.7, "('Oklahoma', 'Income', '$25,000 - $34,999')": 46.3, "('Oklahoma', 'Income', '$35,000 - $49,999')": 44.1, "('Oklahoma', 'Income', '$50,000 - $74,999')": 49.1, "('Oklahoma', 'Income', '$75,000 or greater')": 49.5, "('Oklahoma', 'Income', 'Data not reported')": 38.599999999999994, "('Oklahoma', 'Race/Ethnicity', '2 or more races')": 42.6, "('Oklahoma', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Oklahoma', 'Race/Ethnicity', 'Hispanic')": 42.4, "('Oklahoma', 'Race/Ethnicity', 'Non-Hispanic Black')": 37.9, "('Oklahoma', 'Race/Ethnicity', 'Other')": 49.8, "('Oklahoma', 'Total', 'Total')": 38.3, "('Oregon', 'Age (years)', '18 - 24')": 62.125, "('Oregon', 'Age (years)', '25 - 34')": 53.1, "('Oregon', 'Age (years)', '35 - 44')": 57.29999999999999, "('Oregon', 'Age (years)', '65 or older')": 61.900000000000006, "('Oregon', 'Education', 'High school graduate')": 58.1, "('Oregon', 'Education', 'Less than high school')": 39.8, "('Oregon', 'Education', 'Some college or technical school')": 65.7, "('Oregon', 'Gender', 'Female')": 59.400000000000006, "('Oregon', 'Gender', 'Male')": 60.0, "('Oregon', 'Income', '$15,000 - $24,999')": 50.4, "('Oregon', 'Income', '$25,000 - $34,999')": 55.8, "('Oregon', 'Income', '$35,000 - $49,999')": 59.4, "('Oregon', 'Income', '$50,000 - $74,999')": 63.6, "('Oregon', 'Income', '$75,000 or greater')": 67.7, "('Oregon', 'Income', 'Data not reported')": 54.1, "('Oregon', 'Race/Ethnicity', '2 or more races')": 59.05, "('Oregon', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.03333333333333, "('Oregon', 'Race/Ethnicity', 'Asian')": 49.8, "('Oregon', 'Race/Ethnicity', 'Hispanic')": 45.3, "('Oregon', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('Oregon', 'Race/Ethnicity', 'Non-Hispanic White')": 62.6, "('Oregon', 'Race/Ethnicity', 'Other')": 49.8, "('Oregon', 'Total', 'Total')": 59.0, "('Pennsylvania', 'Age (years)', '25 - 34')": 44.5, "('Pennsylvania', 'Age (years)', '35 - 44')": 47.53333333333333, "('Pennsylvania', 'Age (years)', '55 - 64')": 49.2, "('Pennsylvania', 'Age (years)', '65 or older')": 49.45, "('Pennsylvania', 'Education', 'College graduate')": 57.849999999999994, "('Pennsylvania', 'Education', 'High school graduate')": 44.95, "('Pennsylvania', 'Education', 'Less than high school')": 44.9, "('Pennsylvania', 'Education', 'Some college or technical school')": 49.2, "('Pennsylvania', 'Gender', 'Female')": 52.4, "('Pennsylvania', 'Gender', 'Male')": 51.2, "('Pennsylvania', 'Income', '$15,000 - $24,999')": 44.03333333333333, "('Pennsylvania', 'Income', '$25,000 - $34,999')": 42.65, "('Pennsylvania', 'Income', '$35,000 - $49,999')": 51.2, "('Pennsylvania', 'Income', '$50,000 - $74,999')": 44.4, "('Pennsylvania', 'Income', '$75,000 or greater')": 57.95, "('Pennsylvania', 'Income', 'Data not reported')": 46.8, "('Pennsylvania', 'Income', 'Less than $15,000')": 41.1, "('Pennsylvania', 'Race/Ethnicity', '2 or more races')": 47.0, "('Pennsylvania', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Pennsylvania', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Pennsylvania', 'Race/Ethnicity', 'Non-Hispanic White')": 48.9, "('Pennsylvania', 'Race/Ethnicity', 'Other')": 49.8, "('Pennsylvania', 'Total', 'Total')": 49.8, "('Puerto Rico', 'Age (years)', '55 - 64')": 29.3, "('Puerto Rico', 'Age (years)', '65 or older')": 30.2, "('Puerto Rico', 'Education', 'College graduate')": 31.099999999999998, "('Puerto Rico', 'Gender', 'Male')": 34.6, "('Puerto Rico', 'Income', '$25,000 - $34,999')": 26.6, "('Puerto Rico', 'Income', 'Data not reported')": 22.0, "('Puerto Rico', 'Race/Ethnicity', '2 or more races')": 49.8, "('Puerto Rico', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Puerto Rico', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Puerto Rico', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('Puerto Rico', 'Race/Ethnicity', 'Other')": 49.8, "('Puerto Rico', 'Total', 'Total')": 34.1, "('Rhode Island', 'Age (years)', '18 - 24')": 54.0, "('Rhode Island', 'Age (years)', '25 - 34')": 45.3, "('Rhode Island', 'Age (years)', '45 - 54')": 49.3, "('Rhode Island', 'Age (years)', '55 - 64')": 45.6, "('Rhode Island', 'Age (years)', '65 or older')": 50.800000000000004, "('Rhode Island', 'Education', 'College graduate')": 60.9, "('Rhode Island', 'Education', 'High school graduate')": 45.8, "('Rhode Island', 'Education', 'Less than high school')": 33.4, "('Rhode Island', 'Education', 'Some college or technical school')": 48.9, "('Rhode Island', 'Gender', 'Male')": 49.2, "('Rhode Island', 'Income', '$15,000 - $24,999')": 40.599999999999994, "('Rhode Island', 'Income', '$35,000 - $49,999')": 48.3, "('Rhode Island', 'Income', '$50,000 - $74,999')": 53.4, "('Rhode Island', 'Income', 'Data not reported')": 46.3, "('Rhode Island', 'Income', 'Less than $15,000')": 39.5, "('Rhode Island', 'Race/Ethnicity', '2 or more races')": 39.9, "('Rhode Island', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('Rhode Island', 'Race/Ethnicity', 'Asian')": 42.8, "('Rhode Island', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Rhode Island', 'Race/Ethnicity', 'Hispanic')": 33.0, "('Rhode Island', 'Race/Ethnicity', 'Non-Hispanic Black')": 41.0, "('Rhode Island', 'Race/Ethnicity', 'Non-Hispanic White')": 53.3, "('South Carolina', 'Age (years)', '35 - 44')": 50.1, "('South Carolina', 'Age (years)', '45 - 54')": 49.55, "('South Carolina', 'Age (years)', '65 or older')": 52.6, "('South Carolina', 'Education', 'College graduate')": 59.4, "('South Carolina', 'Education', 'High school graduate')": 44.5, "('South Carolina', 'Education', 'Less than high school')": 34.6, "('South Carolina', 'Education', 'Some college or technical school')": 51.5, "('South Carolina', 'Gender', 'Female')": 46.9, "('South Carolina', 'Gender', 'Male')": 51.1, "('South Carolina', 'Income', '$15,000 - $24,999')": 44.45, "('South Carolina', 'Income', '$25,000 - $34,999')": 44.900000000000006, "('South Carolina', 'Income', '$35,000 - $49,999')": 47.3, "('South Carolina', 'Income', '$50,000 - $74,999')": 55.3, "('South Carolina', 'Income', '$75,000 or greater')": 60.45, "('South Carolina', 'Income', 'Data not reported')": 44.3, "('South Carolina', 'Income', 'Less than $15,000')": 37.7, "('South Carolina', 'Race/Ethnicity', '2 or more races')": 62.5, "('South Carolina', 'Race/Ethnicity', 'American Indian/Alaska Native')": 43.1, "('South Carolina', 'Race/Ethnicity', 'Asian')": 40.4, "('South Carolina', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('South Carolina', 'Race/Ethnicity', 'Hispanic')": 51.0, "('South Carolina', 'Race/Ethnicity', 'Non-Hispanic Black')": 43.0, "('South Carolina', 'Race/Ethnicity', 'Non-Hispanic White')": 51.7, "('South Carolina', 'Race/Ethnicity', 'Other')": 46.0, "('South Carolina', 'Total', 'Total')": 49.1, "('South Dakota', 'Age (years)', '18 - 24')": 46.0, "('South Dakota', 'Age (years)', '25 - 34')": 55.2, "('South Dakota', 'Age (years)', '35 - 44')": 50.0, "('South Dakota', 'Age (years)', '45 - 54')": 50.6, "('South Dakota', 'Age (years)', '55 - 64')": 45.2, "('South Dakota', 'Education', 'College graduate')": 59.6, "('South Dakota', 'Education', 'High school graduate')": 46.65, "('South Dakota', 'Education', 'Less than high school')": 39.0, "('South Dakota', 'Education', 'Some college or technical school')": 53.6, "('South Dakota', 'Gender', 'Female')": 52.45, "('South Dakota', 'Gender', 'Male')": 50.3, "('South Dakota', 'Income', '$15,000 - $24,999')": 53.0, "('South Dakota', 'Income', '$25,000 - $34,999')": 43.400000000000006, "('South Dakota', 'Income', '$35,000 - $49,999')": 55.1, "('South Dakota', 'Income', 'Data not reported')": 45.1, "('South Dakota', 'Income', 'Less than $15,000')": 38.1, "('South Dakota', 'Race/Ethnicity', 'American Indian/Alaska Native')": 53.1, "('South Dakota', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('South Dakota', 'Race/Ethnicity', 'Hispanic')": 27.2, "('South Dakota', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('South Dakota', 'Race/Ethnicity', 'Non-Hispanic White')": 53.1, "('Tennessee', 'Age (years)', '18 - 24')": 44.03333333333333, "('Tennessee', 'Age (years)', '35 - 44')": 49.7, "('Tennessee', 'Age (years)', '45 - 54')": 39.099999999999994, "('Tennessee', 'Education', 'College graduate')": 60.1, "('Tennessee', 'Education', 'High school graduate')": 44.8, "('Tennessee', 'Education', 'Less than high school')": 24.8, "('Tennessee', 'Education', 'Some college or technical school')": 41.1, "('Tennessee', 'Income', '$15,000 - $24,999')": 40.3, "('Tennessee', 'Income', '$25,000 - $34,999')": 44.4, "('Tennessee', 'Income', '$35,000 - $49,999')": 45.8, "('Tennessee', 'Income', '$50,000 - $74,999')": 42.8, "('Tennessee', 'Income', '$75,000 or greater')": 52.75, "('Tennessee', 'Income', 'Less than $15,000')": 32.833333333333336, "('Tennessee', 'Race/Ethnicity', 'Asian')": 49.8, "('Tennessee', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Tennessee', 'Race/Ethnicity', 'Hispanic')": 49.8, "('Tennessee', 'Race/Ethnicity', 'Non-Hispanic Black')": 32.55, "('Tennessee', 'Race/Ethnicity', 'Other')": 49.8, "('Texas', 'Age (years)', '18 - 24')": 45.2, "('Texas', 'Age (years)', '25 - 34')": 41.0, "('Texas', 'Age (years)', '35 - 44')": 43.425, "('Texas', 'Age (years)', '45 - 54')": 45.8, "('Texas', 'Education', 'College graduate')": 51.05, "('Texas', 'Gender', 'Female')": 46.2, "('Texas', 'Gender', 'Male')": 43.95, "('Texas', 'Income', '$15,000 - $24,999')": 36.9, "('Texas', 'Income', '$35,000 - $49,999')": 50.2, "('Texas', 'Income', '$50,000 - $74,999')": 47.0, "('Texas', 'Income', 'Data not reported')": 37.3, "('Texas', 'Income', 'Less than $15,000')": 37.6, "('Texas', 'Race/Ethnicity', '2 or more races')": 62.8, "('Texas', 'Race/Ethnicity', 'American Indian/Alaska Native')": 65.1, "('Texas', 'Race/Ethnicity', 'Asian')": 52.9, "('Texas', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Texas', 'Race/Ethnicity', 'Non-Hispanic White')": 51.7, "('Texas', 'Race/Ethnicity', 'Other')": 49.4, "('Texas', 'Total', 'Total')": 41.9, "('Utah', 'Age (years)', '18 - 24')": 55.0, "('Utah', 'Age (years)', '25 - 34')": 49.5, "('Utah', 'Age (years)', '45 - 54')": 56.25, "('Utah', 'Age (years)', '55 - 64')": 54.2, "('Utah', 'Age (years)', '65 or older')": 60.1, "('Utah', 'Education', 'College graduate')": 64.1, "('Utah', 'Education', 'High school graduate')": 51.3, "('Utah', 'Education', 'Some college or technical school')": 56.3, "('Utah', 'Gender', 'Female')": 54.35, "('Utah', 'Income', '$15,000 - $24,999')": 43.5, "('Utah', 'Income', '$25,000 - $34,999')": 48.2, "('Utah', 'Income', '$35,000 - $49,999')": 53.1, "('Utah', 'Income', '$50,000 - $74,999')": 56.03333333333333, "('Utah', 'Income', 'Data not reported')": 51.85, "('Utah', 'Race/Ethnicity', 'American Indian/Alaska Native')": 50.2, "('Utah', 'Race/Ethnicity', 'Asian')": 53.4, "('Utah', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Utah', 'Race/Ethnicity', 'Hispanic')": 43.5, "('Utah', 'Race/Ethnicity', 'Non-Hispanic Black')": 48.55, "('Utah', 'Race/Ethnicity', 'Non-Hispanic White')": 57.45, "('Utah', 'Race/Ethnicity', 'Other')": 49.79999999999999, "('Utah', 'Total', 'Total')": 55.7, "('Vermont', 'Age (years)', '18 - 24')": 56.8, "('Vermont', 'Age (years)', '25 - 34')": 56.45, "('Vermont', 'Education', 'College graduate')": 70.5, "('Vermont', 'Education', 'High school graduate')": 51.9, "('Vermont', 'Education', 'Some college or technical school')": 60.95, "('Vermont', 'Gender', 'Female')": 59.800000000000004, "('Vermont', 'Income', '$15,000 - $24,999')": 47.0, "('Vermont', 'Income', '$25,000 - $34,999')": 61.1, "('Vermont', 'Income', '$35,000 - $49,999')": 57.9, "('Vermont', 'Income', '$50,000 - $74,999')": 63.9, "('Vermont', 'Income', '$75,000 or greater')": 71.1, "('Vermont', 'Income', 'Data not reported')": 58.333333333333336, "('Vermont', 'Income', 'Less than $15,000')": 50.6, "('Vermont', 'Race/Ethnicity', '2 or more races')": 59.6, "('Vermont', 'Race/Ethnicity', 'American Indian/Alaska Native')": 51.4, "('Vermont', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Vermont', 'Race/Ethnicity', 'Hispanic')": 52.3, "('Vermont', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('Vermont', 'Race/Ethnicity', 'Non-Hispanic White')": 62.2, "('Vermont', 'Total', 'Total')": 59.05, "('Virgin Islands', 'Education', 'Less than high school')": 49.8, "('Virgin Islands', 'Income', '$25,000 - $34,999')": 49.8, "('Virgin Islands', 'Income', 'Data not reported')": 49.8, "('Virgin Islands', 'Income', 'Less than $15,000')": 49.8, "('Virgin Islands', 'Race/Ethnicity', 'Hispanic')": 49.8, "('Virginia', 'Age (years)', '25 - 34')": 49.4, "('Virginia', 'Age (years)', '35 - 44')": 48.0, "('Virginia', 'Age (years)', '45 - 54')": 49.05, "('Virginia', 'Age (years)', '55 - 64')": 51.0, "('Virginia', 'Age (years)', '65 or older')": 50.650000000000006, "('Virginia', 'Education', 'College graduate')": 60.8, "('Virginia', 'Education', 'High school graduate')": 46.349999999999994, "('Virginia', 'Education', 'Less than high school')": 37.6, "('Virginia', 'Education', 'Some college or technical school')": 52.0, "('Virginia', 'Gender', 'Male')": 54.0, "('Virginia', 'Income', '$35,000 - $49,999')": 47.7, "('Virginia', 'Income', '$50,000 - $74,999')": 49.2, "('Virginia', 'Income', 'Data not reported')": 44.2, "('Virginia', 'Income', 'Less than $15,000')": 38.03333333333333, "('Virginia', 'Race/Ethnicity', 'American Indian/Alaska Native')": 57.199999999999996, "('Virginia', 'Race/Ethnicity', 'Asian')": 56.4, "('Virginia', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Virginia', 'Race/Ethnicity', 'Non-Hispanic Black')": 45.4, "('Virginia', 'Race/Ethnicity', 'Other')": 49.8, "('Virginia', 'Total', 'Total')": 51.4, "('Washington', 'Age (years)', '18 - 24')": 55.1, "('Washington', 'Age (years)', '35 - 44')": 56.95, "('Washington', 'Age (years)', '45 - 54')": 58.6, "('Washington', 'Age (years)', '55 - 64')": 61.2, "('Washington', 'Age (years)', '65 or older')": 61.5, "('Washington', 'Education', 'College graduate')": 66.0, "('Washington', 'Education', 'High school graduate')": 47.4, "('Washington', 'Education', 'Less than high school')": 44.0, "('Washington', 'Gender', 'Male')": 60.4, "('Washington', 'Income', '$15,000 - $24,999')": 48.06666666666666, "('Washington', 'Income', '$50,000 - $74,999')": 58.1, "('Washington', 'Income', '$75,000 or greater')": 63.1, "('Washington', 'Income', 'Data not reported')": 55.05, "('Washington', 'Income', 'Less than $15,000')": 49.63333333333333, "('Washington', 'Race/Ethnicity', '2 or more races')": 62.9, "('Washington', 'Race/Ethnicity', 'American Indian/Alaska Native')": 46.0, "('Washington', 'Race/Ethnicity', 'Asian')": 52.1, "('Washington', 'Race/Ethnicity', 'Hispanic')": 45.8, "('Washington', 'Race/Ethnicity', 'Non-Hispanic Black')": 48.7, "('Washington', 'Race/Ethnicity', 'Non-Hispanic White')": 59.5, "('Washington', 'Race/Ethnicity', 'Other')": 63.1, "('West Virginia', 'Age (years)', '18 - 24')": 52.4, "('West Virginia', 'Age (years)', '25 - 34')": 54.4, "('West Virginia', 'Age (years)', '35 - 44')": 51.4, "('West Virginia', 'Age (years)', '45 - 54')": 46.2, "('West Virginia', 'Age (years)', '55 - 64')": 43.3, "('West Virginia', 'Age (years)', '65 or older')": 47.1, "('West Virginia', 'Education', 'College graduate')": 57.9, "('West Virginia', 'Education', 'High school graduate')": 44.8, "('West Virginia', 'Gender', 'Female')": 45.45, "('West Virginia', 'Gender', 'Male')": 49.45, "('West Virginia', 'Income', '$15,000 - $24,999')": 40.8, "('West Virginia', 'Income', '$25,000 - $34,999')": 46.150000000000006, "('West Virginia', 'Income', '$50,000 - $74,999')": 52.2, "('West Virginia', 'Income', '$75,000 or greater')": 56.6, "('West Virginia', 'Race/Ethnicity', 'American Indian/Alaska Native')": 49.8, "('West Virginia', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('West Virginia', 'Race/Ethnicity', 'Hispanic')": 48.0, "('West Virginia', 'Race/Ethnicity', 'Non-Hispanic White')": 47.6, "('West Virginia', 'Total', 'Total')": 48.0, "('Wisconsin', 'Age (years)', '18 - 24')": 55.1, "('Wisconsin', 'Age (years)', '25 - 34')": 54.7, "('Wisconsin', 'Age (years)', '45 - 54')": 53.5, "('Wisconsin', 'Age (years)', '55 - 64')": 60.2, "('Wisconsin', 'Education', 'College graduate')": 59.6, "('Wisconsin', 'Education', 'High school graduate')": 50.5, "('Wisconsin', 'Education', 'Less than high school')": 43.7, "('Wisconsin', 'Education', 'Some college or technical school')": 56.7, "('Wisconsin', 'Income', '$35,000 - $49,999')": 53.8, "('Wisconsin', 'Income', '$50,000 - $74,999')": 60.5, "('Wisconsin', 'Income', '$75,000 or greater')": 62.8, "('Wisconsin', 'Race/Ethnicity', '2 or more races')": 61.7, "('Wisconsin', 'Race/Ethnicity', 'Asian')": 49.8, "('Wisconsin', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Wisconsin', 'Race/Ethnicity', 'Non-Hispanic Black')": 50.9, "('Wisconsin', 'Race/Ethnicity', 'Non-Hispanic White')": 54.5, "('Wisconsin', 'Race/Ethnicity', 'Other')": 58.3, "('Wisconsin', 'Total', 'Total')": 53.4, "('Wyoming', 'Age (years)', '35 - 44')": 54.1, "('Wyoming', 'Education', 'High school graduate')": 51.1, "('Wyoming', 'Education', 'Less than high school')": 39.800000000000004, "('Wyoming', 'Education', 'Some college or technical school')": 53.6, "('Wyoming', 'Gender', 'Male')": 53.7, "('Wyoming', 'Income', '$15,000 - $24,999')": 47.6, "('Wyoming', 'Income', '$25,000 - $34,999')": 50.7, "('Wyoming', 'Income', '$35,000 - $49,999')": 55.03333333333333, "('Wyoming', 'Income', '$50,000 - $74,999')": 56.5, "('Wyoming', 'Income', '$75,000 or greater')": 61.5, "('Wyoming', 'Income', 'Data not reported')": 50.9, "('Wyoming', 'Income', 'Less than $15,000')": 45.23333333333333, "('Wyoming', 'Race/Ethnicity', '2 or more races')": 44.349999999999994, "('Wyoming', 'Race/Ethnicity', 'American Indian/Alaska Native')": 44.8, "('Wyoming', 'Race/Ethnicity', 'Asian')": 49.8, "('Wyoming', 'Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Wyoming', 'Race/Ethnicity', 'Hispanic')": 44.9, "('Wyoming', 'Race/Ethnicity', 'Non-Hispanic Black')": 49.8, "('Wyoming', 'Race/Ethnicity', 'Non-Hispanic White')": 54.8, "('Wyoming', 'Race/Ethnicity', 'Other')": 49.8, "('Wyoming', 'Total', 'Total')": 55.0}
         self.test_state_mean_by_category_expected_dict = {"Michigan": {"('Age (years)', '18 - 24')": 54.4, "('Age (years)', '25 - 34')": 51.3, "('Age (years)', '35 - 44')": 50.6, "('Age (years)', '45 - 54')": 50.3, "('Age (years)', '65 or older')": 54.5, "('Education', 'College graduate')": 59.35, "('Education', 'Less than high school')": 40.8, "('Education', 'Some college or technical school')": 51.0, "('Gender', 'Female')": 51.3, "('Gender', 'Male')": 53.8, "('Income', '$25,000 - $34,999')": 48.3, "('Income', '$35,000 - $49,999')": 49.6, "('Income', '$50,000 - $74,999')": 49.1, "('Income', '$75,000 or greater')": 57.5, "('Race/Ethnicity', '2 or more races')": 54.8, "('Race/Ethnicity', 'American Indian/Alaska Native')": 49.2, "('Race/Ethnicity', 'Asian')": 47.6, "('Race/Ethnicity', 'Hawaiian/Pacific Islander')": 49.8, "('Race/Ethnicity', 'Hispanic')": 41.9, "('Race/Ethnicity', 'Non-Hispanic Black')": 41.800000000000004, "('Race/Ethnicity', 'Non-Hispanic White')": 54.55, "('Total', 'Total')": 49.5}}
+
+class TestCsvSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.csv_path = os.path.join(self.tmp_dir, "entries.csv")
+        shutil.copy("./nutrition_activity_obesity_usa_subset.csv", self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_snapshot_reload(self):
+        parsed = DataIngestor(self.csv_path)
+        self.assertTrue(os.path.isdir(get_snapshot_dir(self.csv_path)))
+
+        loaded = DataIngestor(self.csv_path)
+        self.assertTrue(parsed.get_csv_file().equals(loaded.get_csv_file()))
+        self.assertTrue(parsed.get_aggregates().equals(loaded.get_aggregates()))
+
+    def test_stale_snapshot(self):
+        rows = len(DataIngestor(self.csv_path).get_csv_file())
+
+        # drop the last row, the snapshot no longer matches the csv file
+        with open(self.csv_path, "r", encoding="utf-8") as csv_file:
+            lines = csv_file.readlines()
+        with open(self.csv_path, "w", encoding="utf-8") as csv_file:
+            csv_file.writelines(lines[:-1])
+
+        self.assertEqual(len(DataIngestor(self.csv_path).get_csv_file()), rows - 1)
+
+    def test_memory_mapped_columns(self):
+        DataIngestor(self.csv_path)
+        entries = csv_snapshot.load_snapshot(self.csv_path, COMPACT_DTYPES)
+
+        # the values and the categorical codes are backed by the snapshot files
+        for values in (entries["Data_Value"].to_numpy(),
+                       entries["Question"].cat.codes.to_numpy()):
+            while not isinstance(values, numpy.memmap):
+                values = values.base
+            self.assertIsInstance(values, numpy.memmap)
+
+    def test_touched_csv(self):
+        DataIngestor(self.csv_path)
+        os.utime(self.csv_path, ns=(0, 0))
+
+        # the csv file is hashed once after it is touched, then its new mtime is recorded
+        with mock.patch.object(csv_snapshot, 'get_csv_hash',
+                               wraps=csv_snapshot.get_csv_hash) as get_csv_hash:
+            self.assertIsNotNone(csv_snapshot.load_snapshot(self.csv_path, COMPACT_DTYPES))
+            self.assertIsNotNone(csv_snapshot.load_snapshot(self.csv_path, COMPACT_DTYPES))
+        self.assertEqual(get_csv_hash.call_count, 1)
+
+    def test_csv_tail(self):
+        data_ingestor = DataIngestor(self.csv_path)
+        with open(self.csv_path, "rb") as csv_file:
+            lines = csv_file.readlines()
+
+        # the rows appended at the end are read, up to the last complete line
+        with open(self.csv_path, "ab") as csv_file:
+            csv_file.write(lines[1] + lines[2][:10])
+        rows, csv_offset = data_ingestor.read_csv_tail()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(csv_offset, os.path.getsize(self.csv_path) - 10)
+
+        # a replaced file, even a larger one, is reloaded instead of being read from the offset
+        replaced_path = os.path.join(self.tmp_dir, "replaced.csv")
+        with open(replaced_path, "wb") as csv_file:
+            csv_file.writelines([lines[0]] + lines[:1:-1] + lines[1:3])
+        os.replace(replaced_path, self.csv_path)
+        self.assertEqual(data_ingestor.read_csv_tail(), (None, None))
+
+class TestIngestProgress(unittest.TestCase):
+
+    def test_progress(self):
+        progress = IngestProgress()
+        self.assertEqual(progress.get_status()['state'], 'loading')
+
+        # the chunked parse counts every row and loads the same entries
+        data_ingestor = DataIngestor("./nutrition_activity_obesity_usa_subset.csv",
+                                     snapshot=False, progress=progress)
+        progress.finish()
+
+        status = progress.get_status()
+        self.assertEqual(status['state'], 'ready')
+        self.assertEqual(status['rows_parsed'], len(data_ingestor.get_csv_file()))
+        self.assertTrue(data_ingestor.get_csv_file().equals(
+            DataIngestor("./nutrition_activity_obesity_usa_subset.csv",
+                         snapshot=False).get_csv_file()))
+
+    def test_failed_load(self):
+        progress = IngestProgress()
+        progress.finish(OSError("missing csv file"))
+        self.assertEqual(progress.get_status()['state'], 'failed')
+
+    @mock.patch.dict(os.environ, {"TP_BACKGROUND_INGEST": "1", "TP_NUM_OF_THREADS": "1"})
+    def test_jobs_queued_before_a_failed_load(self):
+        thread_pool = ThreadPool("./missing.csv")
+        job = {'endpoint': 'state_mean', 'question': 'q', 'state': 'Ohio',
+               'job_id': thread_pool.job_registry.register()}
+        self.assertIsNone(thread_pool.admit_jobs(['state_mean']))
+        thread_pool.add_job(job)
+        thread_pool.start()
+
+        # the job queued while loading is failed, not left running
+        self.assertEqual(thread_pool.job_registry.wait(job['job_id'], 5), JobStatus.FAILED)
+        self.assertEqual(thread_pool.admission.get_stats()['in_flight'], {'state_mean': 0})
+
+        thread_pool.shutdown()
+        thread_pool.join()
+        self.assertTrue(thread_pool.jobs_queue.empty())
+
+class TestResultCache(unittest.TestCase):
+
+    def make_job(self, job_id, question="q1", state=None):
+        job = {"endpoint": "state_mean", "question": question, "job_id": job_id}
+        if state is not None:
+            job["state"] = state
+        return job
+
+    def test_single_flight(self):
+        cache = ResultCache(max_entries=10, max_bytes=1000)
+
+        lookup, key, _ = cache.lookup(self.make_job(1, state="Ohio"))
+        self.assertEqual(lookup, CacheLookup.MISS)
+
+        # identical jobs attach to the computation in flight
+        self.assertEqual(cache.lookup(self.make_job(2, state="Ohio"))[0], CacheLookup.ATTACHED)
+        self.assertEqual(cache.lookup(self.make_job(3, state="Ohio"))[0], CacheLookup.ATTACHED)
+        self.assertEqual(cache.lookup(self.make_job(4, state="Iowa"))[0], CacheLookup.MISS)
+
+        self.assertEqual(cache.complete(key, '{"Ohio": 1.0}'), [2, 3])
+
+        lookup, _, result = cache.lookup(self.make_job(5, state="Ohio"))
+        self.assertEqual(lookup, CacheLookup.HIT)
+        self.assertEqual(result, '{"Ohio": 1.0}')
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["misses"], 4)
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2, max_bytes=30)
+
+        for job_id, question in enumerate(["q1", "q2", "q3"]):
+            _, key, _ = cache.lookup(self.make_job(job_id, question))
+            cache.complete(key, '{"' + question + '": 1.00}')
+
+        # "q1" is the least recently used result
+        self.assertEqual(cache.lookup(self.make_job(10, "q1"))[0], CacheLookup.MISS)
+        self.assertEqual(cache.lookup(self.make_job(11, "q3"))[0], CacheLookup.HIT)
+
+        # the bytes limit evicts "q2" as well
+        _, key, _ = cache.lookup(self.make_job(12, "q4"))
+        cache.complete(key, '{"q4": 1.000000}')
+        self.assertEqual(cache.get_stats()["entries"], 2)
+        self.assertEqual(cache.lookup(self.make_job(13, "q2"))[0], CacheLookup.MISS)
+
+    def test_dataset_versions(self):
+        cache = ResultCache(max_entries=10, max_bytes=1000)
+
+        # a result computed on another dataset version than the key one is not stored
+        _, old_key, _ = cache.lookup(self.make_job(1), version=1)
+        self.assertEqual(cache.lookup(self.make_job(2), version=1)[0], CacheLookup.ATTACHED)
+        self.assertEqual(cache.complete(old_key, '{"q1": 2.0}', version=2), [2])
+        self.assertEqual(cache.lookup(self.make_job(3), version=1)[0], CacheLookup.MISS)
+
+        _, key, _ = cache.lookup(self.make_job(4), version=2)
+        cache.complete(key, '{"q1": 2.0}', version=2)
+
+        # each version has its own results, the old ones are kept until they age out
+        self.assertEqual(cache.lookup(self.make_job(5), version=2)[0], CacheLookup.HIT)
+        self.assertEqual(cache.lookup(self.make_job(6), version=3)[0], CacheLookup.MISS)
+        self.assertEqual(cache.get_stats()["entries"], 1)
+
+class TestJobRegistry(unittest.TestCase):
+
+    def test_count_retention(self):
+        registry = JobRegistry(max_retained=3)
+        job_ids = [registry.register() for _ in range(6)]
+        self.assertEqual(job_ids, [1, 2, 3, 4, 5, 6])
+
+        # job 1 keeps running, the others finish in order
+        evicted = []
+        for job_id in job_ids[1:]:
+            evicted += registry.finish(job_id, JobStatus.DONE, version=1)
+
+        self.assertEqual(evicted, [2, 3])
+        self.assertEqual(registry.get_status(1), JobStatus.RUNNING)
+        self.assertEqual(registry.get_status(2), JobStatus.EXPIRED)
+        self.assertEqual(registry.get_status(6), JobStatus.DONE)
+        self.assertEqual(registry.get_status(7), None)
+        self.assertEqual(registry.get_version(6), 1)
+        self.assertEqual(registry.get_num_running(), 1)
+        self.assertEqual(set(registry.get_statuses()), {1, 4, 5, 6})
+
+        # the jobs are evicted in the order they finished
+        self.assertEqual(registry.finish(1, JobStatus.FAILED), [4])
+        for _ in range(3):
+            registry.finish(registry.register(), JobStatus.DONE)
+
+        # once job 1 is evicted too, the leading expired ids are dropped from the arrays
+        self.assertEqual(registry.get_status(1), JobStatus.EXPIRED)
+        self.assertGreater(registry.base_id, 1)
+        self.assertEqual(registry.get_num_registered(), 9)
+        self.assertEqual(set(registry.get_statuses()), {7, 8, 9})
+
+    def test_stuck_job(self):
+        registry = JobRegistry(max_retained=10)
+        stuck_id = registry.register()
+        for _ in range(1000):
+            registry.finish(registry.register(), JobStatus.DONE, version=1)
+
+        # a job running for long does not hold back the compaction of the arrays
+        self.assertLessEqual(len(registry.statuses), 40)
+        self.assertEqual(registry.get_status(stuck_id), JobStatus.RUNNING)
+        self.assertEqual(set(registry.get_statuses()), {stuck_id, *range(992, 1002)})
+
+        self.assertEqual(registry.finish(stuck_id, JobStatus.FAILED, version=2), [992])
+        self.assertEqual(registry.get_version(stuck_id), 2)
+        self.assertIsNotNone(registry.get_trace(stuck_id)['persist_time'])
+
+        for _ in range(10):
+            registry.finish(registry.register(), JobStatus.DONE)
+        self.assertEqual(registry.get_status(stuck_id), JobStatus.EXPIRED)
+        self.assertEqual(registry.stragglers, {})
+
+    def test_age_retention(self):
+        registry = JobRegistry(max_age=0.05)
+        job_id = registry.register()
+        registry.finish(job_id, JobStatus.DONE)
+        self.assertEqual(registry.evict_expired(), [])
+
+        time.sleep(0.1)
+        self.assertEqual(registry.evict_expired(), [job_id])
+        self.assertEqual(registry.get_status(job_id), JobStatus.EXPIRED)
+
+    def test_trace(self):
+        registry = JobRegistry(max_retained=1)
+        job_id = registry.register()
+
+        trace = registry.get_trace(job_id)
+        self.assertIsNotNone(trace['enqueue_time'])
+        self.assertIsNone(trace['dequeue_time'])
+        self.assertIsNone(trace['worker_id'])
+
+        registry.finish(job_id, JobStatus.DONE, 1,
+                        {'worker_id': 3, 'dequeue_time': 10.0, 'compute_start_time': 11.0,
+                         'compute_end_time': 12.5})
+        trace = registry.get_trace(job_id)
+        self.assertEqual(trace['worker_id'], 3)
+        self.assertEqual((trace['dequeue_time'], trace['compute_start_time'],
+                          trace['compute_end_time']), (10.0, 11.0, 12.5))
+        self.assertGreaterEqual(trace['persist_time'], trace['enqueue_time'])
+
+        # the elastic pool never reuses worker ids, they may grow past 16 bits
+        job_id = registry.register()
+        registry.finish(job_id, JobStatus.DONE, 1, {'worker_id': 40000})
+        self.assertEqual(registry.get_trace(job_id)['worker_id'], 40000)
+
+        # the traces are evicted along with the jobs
+        registry.finish(registry.register(), JobStatus.DONE)
+        self.assertIsNone(registry.get_trace(job_id))
+        self.assertIsNone(registry.get_trace(job_id + 2))
+
+    def test_callbacks(self):
+        registry = JobRegistry()
+        job_id = registry.register()
+        called = []
+
+        self.assertEqual(registry.add_callback(job_id, lambda: called.append("first")),
+                         JobStatus.RUNNING)
+        def removed():
+            called.append("removed")
+        registry.add_callback(job_id, removed)
+        registry.remove_callback(job_id, removed)
+
+        registry.finish(job_id, JobStatus.DONE)
+        self.assertEqual(called, ["first"])
+
+        # a finished job is not waited for
+        self.assertEqual(registry.add_callback(job_id, lambda: called.append("late")),
+                         JobStatus.DONE)
+        registry.finish(registry.register(), JobStatus.DONE)
+        self.assertEqual(called, ["first"])
+
+class TestAsgiApp(unittest.TestCase):
+
+    def test_cancelled_wait(self):
+        registry = JobRegistry()
+        job_id = registry.register()
+        webserver = SimpleNamespace(tasks_runner=SimpleNamespace(job_registry=registry))
+        asgi_app = AsgiApp(webserver, 1)
+
+        async def disconnect():
+            waiter = asyncio.create_task(asgi_app.wait_for_job(job_id, 30))
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(registry.callbacks[job_id]), 1)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+
+        # the callback of a request cancelled while it waits (client disconnect) is removed
+        asyncio.run(disconnect())
+        self.assertEqual(registry.callbacks, {})
+
+class TestResultStore(unittest.TestCase):
+
+    def test_memory_store(self):
+        store = MemoryResultStore()
+        store.put(1, b'{"Ohio": 1.0}')
+
+        self.assertEqual(store.get(1), b'{"Ohio": 1.0}')
+        self.assertIsNone(store.get(2))
+
+        store.remove(1)
+        self.assertIsNone(store.get(1))
+
+    def test_disk_store_spill(self):
+        with tempfile.TemporaryDirectory() as results_dir:
+            store = DiskResultStore(results_dir, memory_cap=20)
+            store.put(1, b'{"Ohio": 1.0}')
+            store.put(2, b'{"Iowa": 2.0}')
+
+            # the oldest result is spilled to disk in the background
+            for _ in range(100):
+                if os.path.exists(store.get_file_name(1)):
+                    break
+                time.sleep(0.01)
+
+            self.assertTrue(os.path.exists(store.get_file_name(1)))
+            self.assertFalse(os.path.exists(store.get_file_name(2)))
+            self.assertEqual(store.get(1), b'{"Ohio": 1.0}')
+            self.assertEqual(store.get(2), b'{"Iowa": 2.0}')
+
+            store.remove(1)
+            self.assertFalse(os.path.exists(store.get_file_name(1)))
+            self.assertIsNone(store.get(1))
+
+    def test_disk_store_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_dir = os.path.join(tmp_dir, "results")
+            store = DiskResultStore(results_dir, memory_cap=20)
+
+            # the spilling fails without the results directory, the results stay in memory
+            store.put(1, b'{"Ohio": 1.0}')
+            store.put(2, b'{"Iowa": 2.0}')
+            time.sleep(0.1)
+            self.assertEqual(store.get(1), b'{"Ohio": 1.0}')
+
+            # the spill thread is still running, the next put over the cap spills
+            os.mkdir(results_dir)
+            store.put(3, b'{"Utah": 3.0}')
+            for _ in range(100):
+                if os.path.exists(store.get_file_name(2)):
+                    break
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(store.get_file_name(2)))
+
+            # a result file removed by a concurrent eviction reads as evicted
+            os.remove(store.get_file_name(1))
+            self.assertIsNone(store.get(1))
+
+class TestSerialization(unittest.TestCase):
+
+    def test_spliced_response(self):
+        data = serialization.dumps({"Ohio": 1.5, "Iowa": 2.0})
+        response = {'status': 'done', 'dataset_version': 1, 'data': serialization.RawJson(data)}
+
+        # the same bytes as jsonify, with the stored data spliced in
+        expected = b'{"data":{"Iowa":2.0,"Ohio":1.5},"dataset_version":1,"status":"done"}'
+        self.assertEqual(serialization.dumps_response(response), expected)
+        self.assertEqual(repr(response['data']), '{"Iowa":2.0,"Ohio":1.5}')
+
+    def test_json_fallback(self):
+        result = {"Ohio": 1.5, "('Iowa', 'Age', '18 - 24')": [1, None]}
+        expected = serialization.dumps(result)
+
+        with mock.patch.object(serialization, 'orjson', None):
+            self.assertEqual(serialization.dumps(result), expected)
+
+        # the non-ASCII characters may be escaped or not, the JSON is the same
+        result = {"Cura\u00e7ao": 2.5}
+        encoded = serialization.dumps(result)
+        with mock.patch.object(serialization, 'orjson', None):
+            self.assertEqual(json.loads(serialization.dumps(result)), json.loads(encoded))
+
+class TestRequestLogging(unittest.TestCase):
+
+    def test_payload_summary(self):
+        payload = {'status': 'done', 'data': {f"State {i}": float(i) for i in range(100)}}
+
+        self.assertEqual(summarize_payload(payload, 0), str(payload))
+        self.assertEqual(summarize_payload(payload, 10000), str(payload))
+
+        summary = summarize_payload(payload, 50)
+        self.assertEqual(summary, str(payload)[:50] + "... (2 items)")
+
+    def test_async_logging(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            handler = logging.FileHandler(os.path.join(log_dir, "test.log"))
+            handler.setFormatter(logging.Formatter("%(funcName)s %(message)s"))
+            logger = logging.getLogger("test_async_logging")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+            request_log = RequestLog(logger, handler, ASYNC_LOGGING, 20, 1.0)
+            request_log.start()
+            payload = {'data': list(range(1000))}
+            logger.info("Responding with: %s", request_log.summary(payload))
+            # the message is merged when logged, later changes of the payload are not written
+            payload['data'] = []
+            request_log.stop()
+            handler.close()
+
+            with open(os.path.join(log_dir, "test.log"), encoding="utf-8") as log_file:
+                self.assertEqual(log_file.read(),
+                                 "test_async_logging Responding with: "
+                                 + str({'data': list(range(1000))})[:20] + "... (1 items)\n")
+            self.assertEqual(request_log.get_dropped(), 0)
+
+    def test_sampling(self):
+        self.assertTrue(all(RequestLog(None, None, sample_rate=1.0).sample() for _ in range(100)))
+        self.assertFalse(any(RequestLog(None, None, sample_rate=0.0).sample() for _ in range(100)))
+
+class TestJobMetrics(unittest.TestCase):
+
+    def test_counters_and_histograms(self):
+        metrics = JobMetrics()
+        metrics.add_submitted("state_mean", 3)
+        metrics.add_completed("state_mean", 2)
+        metrics.add_failed("state_mean")
+        for seconds in (0.0001, 0.001, 0.002, 20.0):
+            metrics.add_execution("state_mean", seconds)
+
+        stats = metrics.get_stats()
+        self.assertEqual(stats['submitted'], {"state_mean": 3})
+        self.assertEqual(stats['completed'], {"state_mean": 2})
+        self.assertEqual(stats['failed'], {"state_mean": 1})
+        self.assertEqual(stats['queue_wait'], {})
+
+        # an observation equal to a bucket bound is counted in that bucket
+        histogram = stats['execution']["state_mean"]
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 20.0031)
+        self.assertEqual(histogram.counts[:4], [1, 1, 1, 0])
+        self.assertEqual(histogram.counts[-1], 1)
+
+    def test_format_labels(self):
+        self.assertEqual(format_labels({}), "")
+        self.assertEqual(format_labels({'endpoint': "best5", 'le': 0.5}),
+                         '{endpoint="best5",le="0.5"}')
+        self.assertEqual(format_labels({'question': 'say "hi"\\'}),
+                         '{question="say \\"hi\\"\\\\"}')
+
+class TestJobScheduler(unittest.TestCase):
+
+    def test_cost_lanes(self):
+        self.assertEqual(get_cost_lane(100, (2000, 5000)), INTERACTIVE_LANE)
+        self.assertEqual(get_cost_lane(3000, (2000, 5000)), STANDARD_LANE)
+        self.assertEqual(get_cost_lane(6000, (2000, 5000)), BULK_LANE)
+
+        # the priority hints move a job by one lane, within the existing lanes
+        self.assertEqual(get_cost_lane(6000, (2000, 5000), "high"), STANDARD_LANE)
+        self.assertEqual(get_cost_lane(100, (2000, 5000), "high"), INTERACTIVE_LANE)
+        self.assertEqual(get_cost_lane(3000, (2000, 5000), "low"), BULK_LANE)
+        self.assertEqual(get_cost_lane(3000, (2000, 5000), "urgent"), STANDARD_LANE)
+
+    def test_weighted_lanes(self):
+        scheduler = JobScheduler({INTERACTIVE_LANE: 3, BULK_LANE: 1})
+        for index in range(8):
+            scheduler.put(("bulk", index), BULK_LANE)
+        for index in range(6):
+            scheduler.put(("interactive", index), INTERACTIVE_LANE)
+        scheduler.put("sentinel")
+
+        self.assertEqual(scheduler.get_depths(), {INTERACTIVE_LANE: 6, BULK_LANE: 8})
+        items = [scheduler.get(timeout=0) for _ in range(15)]
+
+        # the interactive jobs get 3 of every 4 dequeues, the bulk ones are not starved
+        self.assertEqual([lane for lane, _ in items[:8]].count("bulk"), 2)
+        self.assertEqual([lane for lane, _ in items[:8]].count("interactive"), 6)
+
+        # each lane keeps its order and the sentinel comes after all the jobs
+        self.assertEqual([index for lane, index in items[:14] if lane == "bulk"], list(range(8)))
+        self.assertEqual(items[14], "sentinel")
+        self.assertTrue(scheduler.empty())
+        self.assertRaises(queue.Empty, scheduler.get, timeout=0)
+
+    def test_num_jobs(self):
+        scheduler = JobScheduler({INTERACTIVE_LANE: 1})
+        scheduler.put({'endpoint': "state_mean"}, INTERACTIVE_LANE)
+        scheduler.put({'endpoint': "batch", 'jobs': [{}, {}, {}]}, INTERACTIVE_LANE)
+        scheduler.put("sentinel")
+
+        # every item of a batch is a job, the sentinels are not
+        self.assertEqual(scheduler.qsize(), 3)
+        self.assertEqual(scheduler.get_num_jobs(), 4)
+
+        scheduler.get(timeout=0)
+        scheduler.get(timeout=0)
+        self.assertEqual(scheduler.get_num_jobs(), 0)
+
+class TestAdmissionControl(unittest.TestCase):
+
+    def test_limits(self):
+        self.assertEqual(parse_in_flight_limits("200, mean_by_category=20"),
+                         (200, {"mean_by_category": 20}))
+
+        admission = AdmissionControl(100, 0, {"mean_by_category": 2})
+        self.assertIsNone(admission.admit(["mean_by_category", "state_mean"], 0))
+        self.assertIsNone(admission.admit(["mean_by_category"], 0))
+
+        # nothing has been finished yet, the clients retry after the minimum delay
+        self.assertEqual(admission.admit(["mean_by_category"], 0),
+                         ("too many mean_by_category jobs in flight", MIN_RETRY_AFTER))
+
+        # a rejected request is not counted in flight
+        self.assertEqual(admission.get_stats()['in_flight'],
+                         {"mean_by_category": 2, "state_mean": 1})
+
+        admission.release("mean_by_category")
+        self.assertIsNone(admission.admit(["mean_by_category"], 0))
+
+    def test_batch_depth(self):
+        admission = AdmissionControl(10, 0, {})
+
+        # a batch is charged by its items, it only fits if all of them do
+        self.assertEqual(admission.admit(["state_mean"] * 5, 6)[0], "the jobs queue is full")
+        self.assertIsNone(admission.admit(["state_mean"] * 4, 6))
+        self.assertIsNone(admission.admit(["state_mean"], 9))
+        self.assertEqual(admission.admit(["state_mean"], 10)[0], "the jobs queue is full")
+
+    def test_retry_after(self):
+        now = [1000.5]
+        admission = AdmissionControl(100, 0, {}, clock=lambda: now[0])
+        admission.admit(["state_mean"] * 50, 0)
+        admission.release("state_mean", 50)
+
+        # 50 jobs finished within the last second, 100 queued jobs take 2 more seconds
+        self.assertEqual(admission.admit(["state_mean"], 100), ("the jobs queue is full", 2))
+        self.assertEqual(admission.get_stats()['in_flight'], {"state_mean": 0})
+
+        # a second later, the rate is averaged over both seconds
+        now[0] += 1
+        self.assertEqual(admission.admit(["state_mean"], 100), ("the jobs queue is full", 4))
+
+class TestElasticPool(unittest.TestCase):
+
+    @mock.patch.dict(os.environ, {"TP_NUM_OF_THREADS": "1", "TP_MAX_THREADS": "3",
+                                  "TP_POOL_TARGET_WAIT": "0.01", "TP_POOL_IDLE_TIMEOUT": "0.2"})
+    def test_grow_and_retire(self):
+        thread_pool = ThreadPool()
+        self.assertEqual((thread_pool.min_threads, thread_pool.max_threads), (1, 3))
+        thread_pool.start()
+
+        # the pool grows once per target wait period, while the jobs wait for longer
+        thread_pool.grow_if_behind(0.001)
+        self.assertEqual(len(thread_pool.threads), 1)
+        for _ in range(4):
+            time.sleep(0.02)
+            thread_pool.grow_if_behind(1.0)
+        self.assertEqual(len(thread_pool.threads), 3)
+
+        # the idle workers are retired, down to the minimum size
+        for _ in range(100):
+            if len(thread_pool.threads) == 1:
+                break
+            time.sleep(0.05)
+        self.assertEqual(thread_pool.get_pool_stats()['resizes'], {'grow': 2, 'shrink': 2})
+
+        thread_pool.shutdown()
+        thread_pool.join()
+        self.assertTrue(thread_pool.jobs_queue.empty())
+        self.assertTrue(thread_pool.is_drained())
+
+    @mock.patch.dict(os.environ, {"TP_NUM_OF_THREADS": "1", "TP_MIN_THREADS": "0",
+                                  "TP_POOL_IDLE_TIMEOUT": "0.1"})
+    def test_grow_from_empty(self):
+        thread_pool = ThreadPool()
+        thread_pool.start()
+        thread_pool.ready_event.wait()
+        self.assertEqual(len(thread_pool.threads), 0)
+
+        # a single job, however short its queue wait, gets a worker
+        job = {'endpoint': 'state_mean', 'question': 'q', 'state': 'Ohio',
+               'job_id': thread_pool.job_registry.register()}
+        self.assertIsNone(thread_pool.admit_jobs(['state_mean']))
+        thread_pool.add_job(job)
+        self.assertNotEqual(thread_pool.job_registry.wait(job['job_id'], 5), JobStatus.RUNNING)
+        self.assertEqual(thread_pool.get_pool_stats()['resizes']['grow'], 1)
+
+        # the idle worker is retired, the pool shrinks back to nothing
+        for _ in range(100):
+            if not thread_pool.threads:
+                break
+            time.sleep(0.05)
+        self.assertEqual(thread_pool.get_pool_stats()['resizes'], {'grow': 1, 'shrink': 1})
+
+        thread_pool.shutdown()
+        thread_pool.join()
+        self.assertTrue(thread_pool.is_drained())
+
+    @mock.patch.dict(os.environ, {"TP_NUM_OF_THREADS": "1"})
+    def test_failed_job(self):
+        thread_pool = ThreadPool()
+        thread_pool.start()
+        thread_pool.ready_event.wait()
+
+        # any error of a job fails it, along with the identical job attached to it
+        jobs = []
+        with mock.patch.object(TaskRunner, 'execute_job', side_effect=ValueError("broken")):
+            for _ in range(2):
+                job = {'endpoint': 'state_mean', 'question': 'q', 'state': 'Ohio',
+                       'job_id': thread_pool.job_registry.register()}
+                self.assertIsNone(thread_pool.admit_jobs(['state_mean']))
+                thread_pool.add_job(job)
+                jobs.append(job)
+
+            for job in jobs:
+                self.assertEqual(thread_pool.job_registry.wait(job['job_id'], 5),
+                                 JobStatus.FAILED)
+
+        # the worker is still running, the key and the in-flight count are released
+        self.assertTrue(thread_pool.threads[0].is_alive())
+        self.assertEqual(thread_pool.admission.get_stats()['in_flight'], {'state_mean': 0})
+        job = dict(jobs[0], job_id=thread_pool.job_registry.register())
+        thread_pool.add_job(job)
+        self.assertNotEqual(thread_pool.job_registry.wait(job['job_id'], 5), JobStatus.RUNNING)
+
+        thread_pool.shutdown()
+        thread_pool.join()
+
+    @mock.patch.dict(os.environ, {"TP_BACKEND": "process", "TP_NUM_OF_THREADS": "1"})
+    def test_killed_worker_process(self):
+        thread_pool = ThreadPool()
+        thread_pool.start()
+        process_executor = thread_pool.process_executor
+        os.kill(process_executor.submit(os.getpid).result(), signal.SIGKILL)
+
+        # the broken worker processes are replaced and the job is submitted once more
+        job = {'endpoint': 'global_mean', 'job_id': thread_pool.job_registry.register(),
+               'question': "Percent of adults who report consuming fruit less than one time daily"}
+        self.assertIsNone(thread_pool.admit_jobs(['global_mean']))
+        thread_pool.add_job(job)
+        self.assertEqual(thread_pool.job_registry.wait(job['job_id'], 10), JobStatus.DONE)
+        self.assertIsNot(thread_pool.process_executor, process_executor)
+
+        thread_pool.shutdown()
+        thread_pool.join()
+
+class TestRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.client = webserver.test_client()
+        self.assertTrue(webserver.tasks_runner.ready_event.wait(30))
+        self.question = "Percent of adults who report consuming fruit less than one time daily"
+
+    def get_result(self, job_id):
+        # long poll, the job is computed meanwhile
+        return self.client.get(f"/api/get_results/{job_id}?wait=5000").get_json()
+
+    def test_sync(self):
+        response = self.client.post("/api/state_mean?sync=1",
+                                    json={"question": self.question, "state": "Colorado"})
+        self.assertEqual(response.get_json()['status'], 'done')
+
+        # the inline result is the one stored for the job
+        result = self.get_result(response.get_json()['job_id'])
+        self.assertEqual(result['data'], response.get_json()['data'])
+
+    def test_wait(self):
+        response = self.client.post("/api/states_mean", json={"question": self.question})
+        self.assertEqual(response.get_json()['status'], 'success')
+
+        job_id = response.get_json()['job_id']
+        result = self.get_result(job_id)
+        self.assertEqual(result['status'], 'done')
+        self.assertEqual(result['data'], thread_utils.states_mean(
+            self.question, webserver.tasks_runner.data_ingestor.get_aggregates()))
+
+        response = self.client.get(f"/api/get_results/{job_id}?wait=soon")
+        self.assertEqual(response.get_json()['reason'], 'the wait parameter is not numeric')
+
+    def test_batch(self):
+        items = [{"endpoint": "state_mean", "question": self.question, "state": "Colorado"},
+                 {"endpoint": "global_mean", "question": self.question}]
+        response = self.client.post("/api/batch", json={"items": items})
+        self.assertEqual(response.get_json()['status'], 'success')
+
+        job_ids = response.get_json()['job_ids']
+        self.assertEqual(len(job_ids), 2)
+        for job_id in job_ids:
+            self.assertEqual(self.get_result(job_id)['status'], 'done')
+
+        # an invalid item rejects the whole batch, before any job is registered
+        items[0]["state"] = ["Colorado"]
+        response = self.client.post("/api/batch", json={"items": items})
+        self.assertEqual(response.get_json(), {
+            'status': 'error',
+            'reason': 'item 0 has a question or state which is not a string'
+        })
+
+    def test_overloaded(self):
+        admission = webserver.tasks_runner.admission
+        with mock.patch.dict(admission.in_flight_limits, {"global_mean": 1}), \
+             mock.patch.dict(admission.in_flight, {"global_mean": 1}):
+            response = self.client.post("/api/global_mean", json={"question": self.question})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json()['status'], 'overloaded')
+        self.assertEqual(response.headers['Retry-After'],
+                         str(response.get_json()['retry_after']))
+
+        # a batch larger than the whole jobs queue can never be admitted
+        with mock.patch.object(admission, "max_depth", 1):
+            response = self.client.post("/api/batch", json=[
+                {"endpoint": "global_mean", "question": self.question}] * 2)
+        self.assertEqual(response.get_json()['status'], 'error')
+
+    def test_reload(self):
+        dataset_version = webserver.tasks_runner.dataset_version
+        response = self.client.post("/api/admin/reload")
+        self.assertEqual(response.get_json()['status'], 'done')
+        self.assertEqual(response.get_json()['dataset_version'], dataset_version + 1)
+
+    def test_append(self):
+        dataset_version = webserver.tasks_runner.dataset_version
+        entries = webserver.tasks_runner.data_ingestor.get_csv_file()
+        rows = json.loads(entries[USED_COLUMNS].iloc[:2].to_json(orient="records"))
+
+        response = self.client.post("/api/admin/append", json={"rows": rows})
+        self.assertEqual(response.get_json(), {
+            'status': 'done',
+            'dataset_version': dataset_version + 1,
+            'rows_appended': 2
+        })
+        self.assertEqual(len(webserver.tasks_runner.data_ingestor.get_csv_file()),
+                         len(entries) + 2)
+
+        response = self.client.post("/api/admin/append", json={"rows": []})
+        self.assertEqual(response.get_json()['status'], 'error')
+
+def tearDownModule():
+    # the workers of the server are not daemon threads, the tests would not exit otherwise
+    webserver.tasks_runner.shutdown()
+    webserver.tasks_runner.join()